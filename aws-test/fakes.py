@@ -0,0 +1,61 @@
+import os
+import sys
+
+import fakeredis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from services import cache
+
+
+def use_fake_redis(test):
+    """
+    Replaces the Redis clients of services.cache by fakeredis clients sharing one server
+    for the duration of the test. Returns the client decoding the responses.
+    """
+    server = fakeredis.FakeServer()
+    redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+    previous = dict(cache._redis_clients)
+    cache._redis_clients.clear()
+    cache._redis_clients.update({True: redis, False: fakeredis.FakeRedis(server=server)})
+    test.addCleanup(lambda: (cache._redis_clients.clear(), cache._redis_clients.update(previous)))
+    # the Lua scripts are registered on the client of their first call
+    _reset_scripts()
+    test.addCleanup(_reset_scripts)
+    cache.transcript_memory_cache.clear()
+    test.addCleanup(cache.transcript_memory_cache.clear)
+    return redis
+
+
+def _reset_scripts():
+    for module in list(sys.modules.values()):
+        if getattr(module, "__name__", "").startswith("services."):
+            for value in vars(module).values():
+                if isinstance(value, cache.LazyScript):
+                    value._script = None
+
+
+def use_fake_aws(test):
+    """
+    Runs the test against DynamoDB tables mocked by moto (accounts and history tables, key index).
+    """
+    from moto import mock_aws
+    from services import dynamodb
+
+    for name, value in {"AWS_ACCESS_KEY_ID": "testing", "AWS_SECRET_ACCESS_KEY": "testing",
+                        "AWS_DEFAULT_REGION": "eu-west-1"}.items():
+        os.environ.setdefault(name, value)
+    mock = mock_aws()
+    mock.start()
+    test.addCleanup(mock.stop)
+    _reset_dynamodb(dynamodb)
+    test.addCleanup(_reset_dynamodb, dynamodb)
+
+    from scripts.stress_credits import ensure_table
+    ensure_table()
+
+
+def _reset_dynamodb(dynamodb):
+    dynamodb.DYNAMODB_RESOURCE = None
+    dynamodb.DYNAMODB_ID_TABLE = None
+    dynamodb.DYNAMODB_HISTORY_TABLE = None
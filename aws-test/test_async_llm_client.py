@@ -0,0 +1,77 @@
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from services import llm
+from services.aio import run_sync
+from utils.config import LLM_METRICS, TECH_CONFIG
+
+
+COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "test-model",
+    "choices": [{"index": 0, "finish_reason": "stop",
+                 "message": {"role": "assistant", "content": " Bonjour "}}],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+}
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestAsyncLLMClient(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.shutdown)
+        self.addCleanup(llm._async_llm_clients.clear)
+        patches = [
+            patch.dict(TECH_CONFIG, {"openrouter_url": f"http://127.0.0.1:{self.server.server_port}/v1"}),
+            patch.dict(LLM_METRICS, {"enabled": False}),
+            patch("services.llm._get_keys", return_value={"OPENROUTER_API_KEY": "test-key"}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        llm._async_llm_clients.clear()
+
+    def test_completion_through_pooled_async_client(self):
+        """
+        A real request through the pooled AsyncOpenAI client : the trace callbacks
+        installed on its requests must be awaitable by the async connection pool.
+        """
+        config = {"api": "openrouter", "model": "test-model"}
+        messages = [{"role": "user", "content": "Hello"}]
+        before = llm.get_llm_connection_stats().get("openrouter", {}).get("connections", 0)
+
+        answer = run_sync(llm._create_completion_async(config, messages), timeout=30)
+
+        self.assertEqual(answer, "Bonjour")
+        stats = llm.get_llm_connection_stats()["openrouter"]
+        self.assertEqual(stats["connections"], before + 1, "the connect event should be traced")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+import fakeredis
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from services import cache
+from services.cache_admin import invalidate_cache_entries
+
+
+class TestInvalidateCacheEntries(unittest.TestCase):
+
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+        clients = {True: self.redis, False: fakeredis.FakeRedis(server=server)}
+        previous = dict(cache._redis_clients)
+        cache._redis_clients.clear()
+        cache._redis_clients.update(clients)
+        self.addCleanup(lambda: (cache._redis_clients.clear(), cache._redis_clients.update(previous)))
+        for url in ["https://foo.com/", "https://foo.com/x", "https://foo.com/blog/post", "https://bar.com/x"]:
+            self.redis.hset(f"transcript_cache:{url}", "etag", "e")
+
+    def remaining(self):
+        return sorted(self.redis.keys("transcript_cache:*"))
+
+    def test_url_prefix_is_canonicalized(self):
+        """
+        Keys are stored canonicalized : a non canonical prefix must select them as well.
+        """
+        result = invalidate_cache_entries(url_prefix="http://www.FOO.com/")
+        self.assertEqual(result["deleted"], 3)
+        self.assertEqual(self.remaining(), ["transcript_cache:https://bar.com/x"])
+
+    def test_url_prefix_keeps_its_path(self):
+        result = invalidate_cache_entries(url_prefix="https://www.foo.com/blog/")
+        self.assertEqual(result["deleted"], 1)
+        self.assertNotIn("transcript_cache:https://foo.com/blog/post", self.remaining())
+
+
+if __name__ == "__main__":
+    unittest.main()
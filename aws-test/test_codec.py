@@ -0,0 +1,39 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from utils.codec import CODEC_MAGIC, CODEC_RAW, CODEC_ZLIB, CODEC_ZSTD, decode_value, encode_value, zstandard
+
+
+LONG_TEXT = "Une page d'accueil sobre, typographie fine, beaucoup de blanc. " * 40
+
+
+class TestCodec(unittest.TestCase):
+
+    def test_round_trip(self):
+        for compression in ["none", "zlib", "zstd"]:
+            for text in ["", "court", "日本語のテキスト", LONG_TEXT]:
+                self.assertEqual(decode_value(encode_value(text, compression)), text, (compression, text[:10]))
+
+    def test_codec_in_the_envelope(self):
+        self.assertEqual(encode_value("court", "zlib")[:3], bytes((CODEC_MAGIC, 1, CODEC_RAW)))
+        self.assertEqual(encode_value(LONG_TEXT, "zlib")[2], CODEC_ZLIB)
+        self.assertEqual(encode_value(LONG_TEXT, "zstd")[2], CODEC_ZSTD if zstandard is not None else CODEC_ZLIB)
+        self.assertLess(len(encode_value(LONG_TEXT, "zlib")), len(LONG_TEXT))
+
+    def test_legacy_values_without_envelope(self):
+        self.assertEqual(decode_value("Bonjour".encode("utf-8")), "Bonjour")
+        self.assertEqual(decode_value("déjà vu".encode("utf-8")), "déjà vu")
+        self.assertEqual(decode_value(b""), "")
+        self.assertEqual(decode_value("already text"), "already text")
+        self.assertIsNone(decode_value(None))
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            decode_value(bytes((CODEC_MAGIC, 99, CODEC_RAW)) + b"x")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+from decimal import Decimal
+
+from fakes import use_fake_aws, use_fake_redis
+
+from services.dynamodb import add_credits, add_front_key, get_account, get_usage_history, use_credits
+from utils.exceptions import InvalidFrontKeyException, NotEnoughCreditException
+
+
+EMAIL = "client@example.com"
+
+
+class TestCredits(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_redis(self)
+        use_fake_aws(self)
+        add_front_key(EMAIL, "key1", "test")
+
+    def test_debit_records_the_usage(self):
+        use_credits(EMAIL, 1, "https://foo.com/", front_key="key1")
+        account = get_account(EMAIL)
+        self.assertEqual((account.credits_left(), account.credits_used(), account.usage_total()), (1, 1, 1))
+        self.assertEqual(len(get_usage_history(EMAIL)["items"]), 1)
+
+    def test_not_enough_credit(self):
+        use_credits(EMAIL, 2, front_key="key1")
+        with self.assertRaises(NotEnoughCreditException):
+            use_credits(EMAIL, 1, front_key="key1")
+        account = get_account(EMAIL)
+        self.assertEqual((account.credits_left(), account.credits_used()), (0, 2))
+        self.assertEqual(len(get_usage_history(EMAIL)["items"]), 1)
+
+    def test_unknown_front_key(self):
+        with self.assertRaises(InvalidFrontKeyException):
+            use_credits(EMAIL, 1, front_key="other-key")
+        self.assertEqual(get_account(EMAIL).credits_left(), 2)
+
+    def test_unknown_account_is_not_debited(self):
+        use_credits("nobody@example.com", 1)
+        self.assertFalse(get_account("nobody@example.com").exists)
+
+    def test_top_up_with_a_float_amount(self):
+        add_credits(EMAIL, 3.99, 10)
+        add_credits(EMAIL, 0.1, 1)
+        account = get_account(EMAIL)
+        self.assertEqual(account.credits_left(), 13)
+        self.assertEqual(account.foundings_total(), Decimal("4.09"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+
+from fakes import use_fake_redis
+
+from services.cache_admin import invalidate_cache_entries
+from services.fingerprint import find_similar_transcripts, index_fingerprint
+
+
+FINGERPRINT = "0f0f0f0f0f0f0f0f"
+
+
+class TestFingerprintPurge(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        for url in ["https://www.foo.com/a", "https://blog.foo.com/a", "https://bar.com/a"]:
+            self.redis.hset(f"transcript_cache:{url}", "etag", "e")
+            index_fingerprint(url, FINGERPRINT, "en", f"Transcript of {url}")
+
+    def assertPurged(self, *urls):
+        for url in urls:
+            self.assertEqual(find_similar_transcripts(url, FINGERPRINT), (None, None), url)
+
+    def assertServed(self, *urls):
+        for url in urls:
+            self.assertIsNotNone(find_similar_transcripts(url, FINGERPRINT)[1], url)
+
+    def test_domain_purge_removes_fingerprints(self):
+        """
+        A purged transcript must not come back through a similar screenshot of the same domain.
+        """
+        result = invalidate_cache_entries(domain="foo.com")
+        self.assertGreater(result["fingerprints_deleted"], 0)
+        self.assertPurged("https://foo.com/b", "https://blog.foo.com/b")
+        self.assertServed("https://bar.com/b")
+
+    def test_url_prefix_purge_removes_fingerprints_of_its_host(self):
+        result = invalidate_cache_entries(url_prefix="http://www.foo.com/")
+        self.assertGreater(result["fingerprints_deleted"], 0)
+        self.assertPurged("https://foo.com/b")
+        self.assertServed("https://blog.foo.com/b", "https://bar.com/b")
+
+
+if __name__ == "__main__":
+    unittest.main()
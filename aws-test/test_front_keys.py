@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import patch
+
+import redis
+
+from fakes import use_fake_redis
+
+from services import cache, front_keys
+from services.front_keys import check_front_key, get_front_key_cache_stats, record_front_key
+
+
+class TestFrontKeyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        front_keys._validations.clear()
+        self.addCleanup(front_keys._validations.clear)
+        front_keys._pending_metrics.clear()
+        patcher = patch("services.front_keys.is_valid_front_key", side_effect=lambda email, key: key == "good")
+        self.is_valid_front_key = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def new_container(self):
+        front_keys._validations.clear()
+
+    def test_dynamodb_is_read_once(self):
+        self.assertTrue(check_front_key("a@b.c", "good"))
+        self.assertTrue(check_front_key("a@b.c", "good"))
+        self.new_container()
+        self.assertTrue(check_front_key("a@b.c", "good"))
+        self.assertEqual(self.is_valid_front_key.call_count, 1)
+
+    def test_invalid_keys_are_cached(self):
+        self.assertFalse(check_front_key("a@b.c", "bad"))
+        self.new_container()
+        self.assertFalse(check_front_key("a@b.c", "bad"))
+        self.assertEqual(self.is_valid_front_key.call_count, 1)
+
+    def test_the_key_itself_is_not_stored(self):
+        check_front_key("a@b.c", "good")
+        names = self.redis.keys("front_key:*")
+        self.assertEqual(len(names), 1)
+        self.assertNotIn("good", names[0].split(":", 2)[2])
+
+    def test_record_writes_through(self):
+        check_front_key("a@b.c", "good")
+        record_front_key("a@b.c", "good", False)
+        self.assertFalse(check_front_key("a@b.c", "good"))
+        self.new_container()
+        self.assertFalse(check_front_key("a@b.c", "good"))
+        self.assertEqual(self.is_valid_front_key.call_count, 1)
+
+    def test_without_redis(self):
+        with patch.object(cache, "_redis_clients", {}), \
+                patch("services.cache._create_redis_client", side_effect=redis.ConnectionError("down")):
+            self.assertTrue(check_front_key("a@b.c", "good"))
+            self.assertTrue(check_front_key("a@b.c", "good"))
+        self.assertEqual(self.is_valid_front_key.call_count, 2)
+
+    def test_stats(self):
+        check_front_key("a@b.c", "good")
+        self.new_container()
+        check_front_key("a@b.c", "good")
+        # the metrics are sent with the next Redis round trip
+        check_front_key("a@b.c", "other")
+        stats = get_front_key_cache_stats()
+        self.assertEqual((stats["lookups"], stats["redis_hits"], stats["dynamodb_reads"]), (2, 1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from fakes import use_fake_aws, use_fake_redis
+
+from services.dynamodb import (
+    add_front_key, convert_front_keys_list, get_account, get_dynamodb_id_table, get_email_of_front_key,
+    is_valid_front_key, remove_front_key,
+)
+
+
+EMAIL = "client@example.com"
+
+
+class TestFrontKeysSet(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_redis(self)
+        use_fake_aws(self)
+
+    def put_legacy_account(self, keys):
+        get_dynamodb_id_table().put_item(Item={"email": EMAIL, "credits-left": 5, "frontKeys": keys})
+
+    def front_keys(self):
+        return get_account(EMAIL, ["frontKeys"]).front_keys()
+
+    def test_keys_are_a_string_set_with_an_index(self):
+        add_front_key(EMAIL, "key1", "chrome")
+        add_front_key(EMAIL, "key1", "chrome")
+        add_front_key(EMAIL, "key2", "firefox")
+        self.assertEqual(self.front_keys(), {"key1", "key2"})
+        self.assertEqual(get_email_of_front_key("key2"), EMAIL)
+        remove_front_key(EMAIL, "key1")
+        self.assertEqual(self.front_keys(), {"key2"})
+        self.assertIsNone(get_email_of_front_key("key1"))
+
+    def test_convert_list(self):
+        self.put_legacy_account(["key1", "key2", "key1"])
+        self.assertEqual(convert_front_keys_list({"email": EMAIL, "frontKeys": ["key1", "key2", "key1"]}), 2)
+        self.assertEqual(self.front_keys(), {"key1", "key2"})
+        self.assertEqual(get_email_of_front_key("key1"), EMAIL)
+
+    def test_convert_empty_list(self):
+        self.put_legacy_account([])
+        self.assertEqual(convert_front_keys_list({"email": EMAIL, "frontKeys": []}), 0)
+        self.assertNotIn("frontKeys", get_dynamodb_id_table().get_item(Key={"email": EMAIL})["Item"])
+
+    def test_add_and_remove_convert_a_remaining_list(self):
+        self.put_legacy_account(["key1"])
+        add_front_key(EMAIL, "key2", "chrome")
+        self.assertEqual(self.front_keys(), {"key1", "key2"})
+        self.assertEqual(get_account(EMAIL).credits_left(), 5)
+
+        self.put_legacy_account(["key1", "key2"])
+        remove_front_key(EMAIL, "key1")
+        self.assertEqual(self.front_keys(), {"key2"})
+        self.assertTrue(is_valid_front_key(EMAIL, "key2"))
+        self.assertFalse(is_valid_front_key(EMAIL, "key1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from fakes import use_fake_redis
+
+from lambdas import handlers
+
+
+def get_event(**params):
+    return {"httpMethod": "GET", "headers": {"X-Forwarded-For": "1.2.3.4"}, "queryStringParameters": params}
+
+
+class TestCacheGet(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        self.redis.set("email_validation:abc", "x")
+
+    def test_page(self):
+        response = handlers.lambda_handler_cache_get(get_event(count="10"), None)
+        self.assertEqual(response["statusCode"], 200)
+        self.assertEqual(json.loads(response["body"])["next_cursor"], 0)
+
+    def test_invalid_cursor_or_count(self):
+        for params in [{"count": "abc"}, {"cursor": "x"}, {"count": "0"}, {"cursor": "-1"}, {"count": "1.5"}]:
+            response = handlers.lambda_handler_cache_get(get_event(**params), None)
+            self.assertEqual(response["statusCode"], 400, params)
+            self.assertNotIn("traceback", json.loads(response["body"]))
+
+
+class TestLLMStats(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_redis(self)
+
+    def test_hours_are_clamped_to_the_retention(self):
+        with patch("lambdas.handlers.get_llm_stats", return_value={}) as get_llm_stats:
+            response = handlers.lambda_handler_llm_stats(get_event(hours="100000"), None)
+        self.assertEqual(response["statusCode"], 200)
+        get_llm_stats.assert_called_once_with(14 * 24)
+
+
+if __name__ == "__main__":
+    unittest.main()
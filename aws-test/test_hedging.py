@@ -0,0 +1,92 @@
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from services import hedging
+from services.hedging import HedgeStats, hedged_call
+from utils.config import LLM_HEDGING
+
+
+HEDGING = {"percentile": 90, "min_samples": 10, "initial_delay": 15.0, "min_delay": 2.0, "max_hedge_rate": 0.1}
+
+
+class TestHedgeStats(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch.dict(LLM_HEDGING, HEDGING)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_initial_delay_until_enough_samples(self):
+        stats = HedgeStats(window=100, rate_window=100)
+        for _ in range(9):
+            stats.record_latency(3.0)
+        self.assertEqual(stats.threshold(), 15.0)
+
+    def test_threshold_is_the_percentile_of_the_window(self):
+        stats = HedgeStats(window=10, rate_window=100)
+        for seconds in range(1, 21):
+            stats.record_latency(float(seconds))
+        # only the last 10 latencies (11 to 20) are kept
+        self.assertEqual(stats.threshold(), 20.0)
+        for _ in range(10):
+            stats.record_latency(1.0)
+        self.assertEqual(stats.threshold(), 2.0, "never below min_delay")
+
+    def test_hedge_rate_cap(self):
+        stats = HedgeStats(window=100, rate_window=20)
+        self.assertTrue(stats.allow_hedge())
+        for _ in range(18):
+            stats.record_request(hedged=False)
+        stats.record_request(hedged=True, hedge_won=True)
+        self.assertTrue(stats.allow_hedge())
+        stats.record_request(hedged=True)
+        self.assertFalse(stats.allow_hedge())
+        # the hedged requests leave the rolling window
+        for _ in range(20):
+            stats.record_request(hedged=False)
+        self.assertTrue(stats.allow_hedge())
+        self.assertEqual((stats.as_dict()["hedges"], stats.as_dict()["hedge_wins"]), (2, 1))
+
+
+class TestHedgedCall(unittest.TestCase):
+
+    def setUp(self):
+        config = {"test_task": {"main": {"name": "main"}, "secondary": {"name": "secondary", "prompt": "p"}}}
+        patches = [
+            patch.dict(LLM_HEDGING, {**HEDGING, "enabled": True, "tasks": {"test_task": True},
+                                     "initial_delay": 0.05, "min_delay": 0.05}),
+            patch.object(hedging, "LLM_CONFIG", config),
+            patch.dict(hedging._stats, {}, clear=True),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    @staticmethod
+    def call(config, cancel):
+        if config["name"] == "main":
+            deadline = time.monotonic() + 2
+            while time.monotonic() < deadline and not cancel.is_set():
+                time.sleep(0.01)
+        return config["name"]
+
+    def test_secondary_answers_a_slow_main(self):
+        self.assertEqual(hedged_call("test_task", self.call), "secondary")
+        stats = hedging.get_hedging_stats()["test_task"]
+        self.assertEqual((stats["hedges"], stats["hedge_wins"]), (1, 1))
+
+    def test_no_hedge_over_the_rate_cap(self):
+        stats = hedging._get_stats("test_task")
+        stats.record_request(hedged=True)
+        started = time.monotonic()
+        self.assertEqual(hedged_call("test_task", self.call), "main")
+        self.assertGreater(time.monotonic() - started, 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from services.memory_cache import LocalTTLCache
+
+
+class TestLocalTTLCache(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = patch("services.memory_cache.time.monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_ttl(self):
+        cache = LocalTTLCache(max_entries=10, max_bytes=100, ttl=60)
+        cache.set("a", "A")
+        self.now += 59
+        self.assertEqual(cache.get("a"), "A")
+        self.now += 2
+        self.assertIsNone(cache.peek("a"))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_is_evicted(self):
+        cache = LocalTTLCache(max_entries=2, max_bytes=100, ttl=60)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.get("a")
+        cache.set("c", "C")
+        self.assertIsNone(cache.peek("b"))
+        self.assertEqual((cache.peek("a"), cache.peek("c")), ("A", "C"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_peek_does_not_touch_the_lru_order(self):
+        cache = LocalTTLCache(max_entries=2, max_bytes=100, ttl=60)
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.peek("a")
+        cache.set("c", "C")
+        self.assertIsNone(cache.peek("a"))
+        self.assertEqual(cache.stats()["hits"], 0)
+
+    def test_evicts_by_size(self):
+        cache = LocalTTLCache(max_entries=10, max_bytes=10, ttl=60)
+        cache.set("a", "A", size=6)
+        cache.set("b", "B", size=6)
+        self.assertIsNone(cache.peek("a"))
+        self.assertEqual(cache.stats()["bytes"], 6)
+        # larger than the whole cache : not stored
+        cache.set("c", "C", size=11)
+        self.assertIsNone(cache.peek("c"))
+        self.assertEqual(cache.peek("b"), "B")
+
+    def test_replacing_an_entry_updates_its_size(self):
+        cache = LocalTTLCache(max_entries=10, max_bytes=10, ttl=60)
+        cache.set("a", "A", size=8)
+        cache.set("a", "A2", size=2)
+        cache.set("b", "B", size=8)
+        self.assertEqual((cache.peek("a"), cache.peek("b")), ("A2", "B"))
+        cache.invalidate("a")
+        self.assertEqual(cache.stats()["bytes"], 8)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from fakes import use_fake_redis
+
+from lambdas import handlers
+from services.rate_limit import check_rate_limits
+from utils.config import BUSINESS_CONFIG
+
+
+def transcript_event(email, client_key, ip="1.2.3.4"):
+    body = {"email": email, "client_key": client_key, "client_type": "test", "url": "https://foo.com/"}
+    return {"httpMethod": "POST", "headers": {"X-Forwarded-For": ip}, "body": json.dumps(body)}
+
+
+class TestSlidingWindow(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        patcher = patch.dict(BUSINESS_CONFIG, {"rate_limit_window": 60, "ip_limit": 3, "email_limit": 2})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_limit_per_scope(self):
+        with patch("time.time", return_value=1000 * 60 + 1):
+            self.assertIsNone(check_rate_limits({"email": "a@b.c"}))
+            self.assertIsNone(check_rate_limits({"email": "a@b.c"}))
+            self.assertEqual(check_rate_limits({"email": "a@b.c"}), "email")
+            self.assertIsNone(check_rate_limits({"email": "other@b.c"}))
+
+    def test_rejected_request_is_not_counted(self):
+        with patch("time.time", return_value=1000 * 60 + 1):
+            for _ in range(2):
+                check_rate_limits({"ip": "1.2.3.4", "email": "a@b.c"})
+            self.assertEqual(check_rate_limits({"ip": "1.2.3.4", "email": "a@b.c"}), "email")
+            # the ip has 2 requests counted out of 3
+            self.assertIsNone(check_rate_limits({"ip": "1.2.3.4"}))
+            self.assertEqual(check_rate_limits({"ip": "1.2.3.4"}), "ip")
+
+    def test_previous_window_is_weighted(self):
+        with patch("time.time", return_value=1000 * 60 + 1):
+            self.assertIsNone(check_rate_limits({"email": "a@b.c"}))
+            self.assertIsNone(check_rate_limits({"email": "a@b.c"}))
+        # 15 s into the next window : the 2 previous requests still weigh 1.5
+        with patch("time.time", return_value=1001 * 60 + 15):
+            self.assertEqual(check_rate_limits({"email": "a@b.c"}), "email")
+        # 45 s into it : they weigh 0.5
+        with patch("time.time", return_value=1001 * 60 + 45):
+            self.assertIsNone(check_rate_limits({"email": "a@b.c"}))
+
+
+class TestAccountLimitsAfterAuthentication(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        patches = [
+            patch.dict(BUSINESS_CONFIG, {"ip_limit": 100, "email_limit": 2, "client_key_limit": 2}),
+            patch("lambdas.handlers.check_front_key", side_effect=lambda email, key: key == "good-key"),
+            patch("lambdas.handlers.get_design_transcript_concurrently", return_value=(True, "T", None)),
+            patch("lambdas.handlers.get_design_transcript", return_value=(True, "T", None)),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_forged_requests_do_not_lock_the_owner_out(self):
+        for _ in range(5):
+            response = handlers.lambda_handler_transcript(transcript_event("victim@b.c", "forged-key", ip="6.6.6.6"), None)
+            self.assertEqual(json.loads(response["body"])["error"], "InvalidFrontKey")
+        response = handlers.lambda_handler_transcript(transcript_event("victim@b.c", "good-key"), None)
+        self.assertEqual(response["statusCode"], 200)
+
+    def test_verified_requests_are_limited_per_email(self):
+        for _ in range(2):
+            response = handlers.lambda_handler_transcript(transcript_event("user@b.c", "good-key"), None)
+            self.assertEqual(response["statusCode"], 200)
+        response = handlers.lambda_handler_transcript(transcript_event("user@b.c", "good-key"), None)
+        self.assertEqual(json.loads(response["body"])["error"], "TooManyRequest")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fakes import use_fake_redis
+
+from services.cache import (
+    create_cached_url_info, pop_cached_url_info, release_transcript_generation,
+    store_cached_design_transcript, wait_for_cached_design_transcript,
+)
+from utils.config import BUSINESS_CONFIG
+
+
+URL = "https://foo.com/page"
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        patcher = patch.dict(BUSINESS_CONFIG, {"singleflight_poll_interval": 0.01})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_one_caller_is_elected(self):
+        txid = create_cached_url_info("http://www.foo.com/page", "english", "e1")
+        self.assertIsNotNone(txid)
+        # same canonical url and etag : already being generated
+        self.assertIsNone(create_cached_url_info(URL, "french", "e1"))
+        # another etag is another generation
+        self.assertIsNotNone(create_cached_url_info(URL, "english", "e2"))
+        info = pop_cached_url_info(txid)
+        self.assertEqual((info["url"], info["lang"], info["etag"], info["refresh"]), (URL, "english", "e1", False))
+        self.assertIsNone(pop_cached_url_info(txid))
+
+    def test_lock_expires(self):
+        create_cached_url_info(URL, "english", "e1")
+        self.assertGreater(self.redis.ttl(f"transcript_lock:{URL}:e1"), 0)
+
+    def test_only_the_owner_releases_the_lock(self):
+        txid = create_cached_url_info(URL, "english", "e1")
+        release_transcript_generation(URL, "e1", "another-txid")
+        self.assertIsNone(create_cached_url_info(URL, "english", "e1"))
+        release_transcript_generation(URL, "e1", txid)
+        self.assertIsNotNone(create_cached_url_info(URL, "english", "e1"))
+
+    def test_waiters_get_the_transcript(self):
+        create_cached_url_info(URL, "english", "e1")
+        timer = threading.Timer(0.05, store_cached_design_transcript, (URL, "english", "e1", "Hello"))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        self.assertEqual(wait_for_cached_design_transcript(URL, "english", "e1", timeout=2), [("english", "Hello")])
+
+    def test_waiters_stop_when_the_generation_is_abandoned(self):
+        txid = create_cached_url_info(URL, "english", "e1")
+        timer = threading.Timer(0.05, release_transcript_generation, (URL, "e1", txid))
+        timer.start()
+        self.addCleanup(timer.cancel)
+        started = time.monotonic()
+        self.assertIsNone(wait_for_cached_design_transcript(URL, "english", "e1", timeout=2))
+        self.assertLess(time.monotonic() - started, 1)
+
+    def test_wait_times_out(self):
+        create_cached_url_info(URL, "english", "e1")
+        self.assertIsNone(wait_for_cached_design_transcript(URL, "english", "e1", timeout=0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
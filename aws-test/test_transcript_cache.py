@@ -0,0 +1,61 @@
+import json
+import unittest
+
+from fakes import use_fake_redis
+
+from services import cache
+from services.cache import (
+    TRANSCRIPT_FRESH, get_cached_design_transcript, lookup_cached_design_transcript,
+    store_cached_design_transcript, store_cached_design_transcripts,
+)
+from utils.codec import decode_value
+
+
+URL = "https://foo.com/page"
+KEY = f"transcript_cache:{URL}"
+
+
+class TestTranscriptHash(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        self.binary = cache.get_redis_binary_client()
+
+    def lookup(self, lang, etag="e1"):
+        cache.transcript_memory_cache.clear()
+        return lookup_cached_design_transcript(URL, lang, etag)
+
+    def test_one_field_per_language(self):
+        store_cached_design_transcript(URL, "english", "e1", "Hello")
+        store_cached_design_transcript(URL, "french", "e1", "Bonjour")
+        fields = self.binary.hgetall(KEY)
+        self.assertEqual(decode_value(fields[b"lang:english"]), "Hello")
+        self.assertEqual(decode_value(fields[b"lang:french"]), "Bonjour")
+        self.assertEqual(self.lookup("french"), ([("french", "Bonjour")], TRANSCRIPT_FRESH))
+
+    def test_missing_language_returns_every_cached_language(self):
+        store_cached_design_transcripts(URL, "e1", {"english": "Hello", "french": "Bonjour"})
+        transcripts, state = self.lookup("german")
+        self.assertEqual(sorted(transcripts), [("english", "Hello"), ("french", "Bonjour")])
+        self.assertEqual(state, TRANSCRIPT_FRESH)
+
+    def test_new_etag_drops_the_other_languages(self):
+        store_cached_design_transcripts(URL, "e1", {"english": "Hello", "french": "Bonjour"})
+        store_cached_design_transcript(URL, "english", "e2", "Hello again")
+        self.assertEqual(self.binary.hkeys(KEY), [b"etag", b"etag_at", b"lang:english"])
+        self.assertIsNone(get_cached_design_transcript(URL, "french", "e1"))
+
+    def test_if_etag_matches_skips_a_replaced_entry(self):
+        store_cached_design_transcript(URL, "english", "e2", "Hello")
+        self.assertFalse(store_cached_design_transcript(URL, "french", "e1", "Bonjour", if_etag_matches=True))
+        self.assertFalse(self.binary.hexists(KEY, "lang:french"))
+
+    def test_legacy_json_entry_is_migrated(self):
+        self.redis.set(KEY, json.dumps({"etag": "e1", "transcripts": [["english", "Hello"]]}), ex=1000)
+        self.assertEqual(self.lookup("english"), ([("english", "Hello")], TRANSCRIPT_FRESH))
+        self.assertEqual(self.redis.type(KEY), "hash")
+        self.assertGreater(self.redis.ttl(KEY), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from fakes import use_fake_redis
+
+from services import cache
+from services.cache import (
+    TRANSCRIPT_FRESH, TRANSCRIPT_REFRESH, TRANSCRIPT_STALE,
+    lookup_cached_design_transcript, store_cached_design_transcript,
+)
+from services.transcript import get_design_transcript
+from utils.config import BUSINESS_CONFIG
+
+
+URL = "https://foo.com/page"
+
+
+class TestStaleStates(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_redis(self)
+        patcher = patch.dict(BUSINESS_CONFIG, {"serve_stale": True, "early_refresh_beta": 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        store_cached_design_transcript(URL, "en", "e1", "Old transcript", generation_ms=1000)
+        cache.transcript_memory_cache.clear()
+
+    def later(self, seconds):
+        return patch("services.cache.time.time", return_value=time.time() + seconds)
+
+    def test_fresh(self):
+        self.assertEqual(lookup_cached_design_transcript(URL, "en", "e1"), ([("en", "Old transcript")], TRANSCRIPT_FRESH))
+
+    def test_stale_when_the_etag_changed(self):
+        self.assertEqual(lookup_cached_design_transcript(URL, "en", "e2"), ([("en", "Old transcript")], TRANSCRIPT_STALE))
+
+    def test_stale_when_too_old(self):
+        with self.later(BUSINESS_CONFIG['transcript_cache_limit'] + 1):
+            self.assertEqual(lookup_cached_design_transcript(URL, "en", "e1")[1], TRANSCRIPT_STALE)
+
+    def test_not_served_when_serve_stale_is_off(self):
+        with patch.dict(BUSINESS_CONFIG, {"serve_stale": False}):
+            self.assertEqual(lookup_cached_design_transcript(URL, "en", "e2"), (None, None))
+
+    def test_early_refresh_near_expiry(self):
+        with patch.dict(BUSINESS_CONFIG, {"early_refresh_beta": 1.0}), \
+                patch("services.cache.random.random", return_value=0.999999), \
+                self.later(BUSINESS_CONFIG['transcript_cache_limit'] - 1):
+            self.assertEqual(lookup_cached_design_transcript(URL, "en", "e1")[1], TRANSCRIPT_REFRESH)
+
+
+class TestStaleServing(unittest.TestCase):
+
+    def setUp(self):
+        self.redis = use_fake_redis(self)
+        patches = [
+            patch.dict(BUSINESS_CONFIG, {"serve_stale": True, "early_refresh_beta": 0}),
+            patch("services.transcript.use_credits"),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        store_cached_design_transcript(URL, "en", "e1", "Old transcript")
+
+    def test_stale_is_served_to_clients_that_accept_it(self):
+        known, transcript, refresh = get_design_transcript("a@b.c", "k", URL, "e2", "en", accept_stale=True)
+        self.assertTrue(known)
+        self.assertEqual(transcript, "Old transcript")
+        self.assertTrue(refresh["stale"])
+        info = self.redis.get(f"urlinfo_cache:{refresh['txid']}")
+        self.assertIn('"refresh": true', info)
+
+    def test_stale_is_a_miss_for_other_clients(self):
+        known, txid, refresh = get_design_transcript("a@b.c", "k", URL, "e2", "en")
+        self.assertFalse(known)
+        self.assertIsNone(refresh)
+        # the regeneration replaces the obsolete entry
+        self.assertIn('"refresh": true', self.redis.get(f"urlinfo_cache:{txid}"))
+
+    def test_no_early_refresh_election_for_other_clients(self):
+        with patch("services.transcript.lookup_cached_design_transcript",
+                   return_value=([("en", "Old transcript")], TRANSCRIPT_REFRESH)):
+            self.assertEqual(get_design_transcript("a@b.c", "k", URL, "e1", "en"), (True, "Old transcript", None))
+            known, transcript, refresh = get_design_transcript("a@b.c", "k", URL, "e1", "en", accept_stale=True)
+        self.assertEqual(refresh["stale"], False)
+        self.assertIsNotNone(refresh["txid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
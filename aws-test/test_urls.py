@@ -0,0 +1,55 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "aws"))
+
+from utils.config import URL_CANONICALIZATION
+from utils.urls import canonicalize_url, canonicalize_url_prefix, url_domain
+
+
+KEEP_QUERY = {**URL_CANONICALIZATION, "strip_query": False}
+
+
+class TestCanonicalizeUrl(unittest.TestCase):
+
+    def test_variants_share_one_key(self):
+        for url in ["https://foo.com/page", "http://foo.com/page", "https://WWW.Foo.com/page/",
+                    "https://foo.com:443/page#section", "https://foo.com./page?utm_source=x"]:
+            self.assertEqual(canonicalize_url(url), "https://foo.com/page", url)
+
+    def test_root_keeps_its_slash(self):
+        self.assertEqual(canonicalize_url("https://www.foo.com"), "https://foo.com/")
+        self.assertEqual(canonicalize_url("https://foo.com//"), "https://foo.com/")
+
+    def test_other_ports_are_kept(self):
+        self.assertEqual(canonicalize_url("http://foo.com:8080/a"), "https://foo.com:8080/a")
+
+    def test_tracking_params_are_removed(self):
+        url = "https://foo.com/list?utm_campaign=x&page=2&fbclid=y&sort=name&_ga=z"
+        self.assertEqual(canonicalize_url(url, KEEP_QUERY), "https://foo.com/list?page=2&sort=name")
+
+    def test_subdomains_are_distinct(self):
+        self.assertEqual(canonicalize_url("https://blog.foo.com/a"), "https://blog.foo.com/a")
+
+    def test_urls_without_host_are_unchanged(self):
+        self.assertEqual(canonicalize_url("not an url"), "not an url")
+        self.assertEqual(canonicalize_url("http://[::1"), "http://[::1")
+
+
+class TestPrefixAndDomain(unittest.TestCase):
+
+    def test_prefix_without_path_stays_a_host_prefix(self):
+        self.assertEqual(canonicalize_url_prefix("http://www.Foo.com"), "https://foo.com")
+
+    def test_prefix_keeps_its_trailing_slash(self):
+        self.assertEqual(canonicalize_url_prefix("http://www.foo.com/blog/"), "https://foo.com/blog/")
+        self.assertEqual(canonicalize_url_prefix("https://foo.com/blog"), "https://foo.com/blog")
+
+    def test_url_domain(self):
+        self.assertEqual(url_domain("https://WWW.foo.com/a?b=c"), "foo.com")
+        self.assertEqual(url_domain("no host"), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,23 @@
+import unittest
+
+from fakes import use_fake_redis
+
+from scripts.warm_cache import plan_translations
+from services.cache import store_cached_design_transcript
+
+
+class TestPlanTranslations(unittest.TestCase):
+
+    def setUp(self):
+        use_fake_redis(self)
+        store_cached_design_transcript("https://foo.com/", "english", "e1", "Transcript")
+
+    def test_languages_sent_by_the_extension(self):
+        tasks, skipped = plan_translations([("https://foo.com/", 10)])
+        languages = {task[4] for task in tasks}
+        self.assertTrue({"korean", "arabic", "hindi"} <= languages)
+        self.assertFalse({"english", "dutch", "polish"} & languages)
+
+
+if __name__ == "__main__":
+    unittest.main()
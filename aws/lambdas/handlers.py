@@ -3,17 +3,30 @@ Handlers Lambda pour l'application.
 """
 
 import json
+import functools
 
-from services.dynamodb import is_valid_front_key, add_front_key
+from services.dynamodb import add_front_key
+from services.front_keys import check_front_key
 from services.mails import send_registration_mail
-from services.cache import redis_client, shouldBlockIP, create_email_validation_key, get_email_validation_key
-from services.transcript import get_design_transcript, get_design_transcript_with_image
+from services.cache import get_redis_client, create_email_validation_key, get_email_validation_key
+from services.rate_limit import check_rate_limits
+from services.cache_admin import CACHE_NAMESPACES, is_known_prefix, scan_cache_entries, invalidate_cache_entries
+from services.transcript import get_design_transcript, get_design_transcript_with_image, stream_design_transcript_with_image
+from services.transcript_async import get_design_transcript_concurrently
+from services.llm_metrics import get_llm_stats
+from services.diagnostics import DIAGNOSTICS_PROBES, run_diagnostics
+from services.warmup import warm_up
 
+from utils.config import BUSINESS_CONFIG, LLM_METRICS, TECH_CONFIG
 from utils.helpers import logger_business, logger_tech
 from utils.exceptions import BusinessException, InvalidFrontKeyException, TooManyRequestException, InvalidEmailValidationKeyException
 import traceback
 
 
+# Lambda init phase : open the connections of this function while the runtime starts
+warm_up(TECH_CONFIG['warmup'])
+
+
 def get_cors_headers():
     return {
         'Content-Type': 'application/json; charset=utf-8',
@@ -24,7 +37,7 @@ def get_cors_headers():
 
 def get_exception_status_for_log(e):
     if isinstance(e, BusinessException):
-        return e.status_code+"-"+e.internal_code
+        return f"{e.status_code}-{e.internal_code}"
     return 500
 
 def manage_exception(e,lang):
@@ -41,7 +54,78 @@ def manage_exception(e,lang):
     }
 
 
-def lambda_handler_transcript(event, context):
+def get_request_params(event) -> dict:
+    """
+    Renvoie les paramètres de la requête (body JSON ou queryStringParameters).
+    """
+    body = event.get("body")
+    if body is None:
+        return event.get("queryStringParameters") or {}
+    try:
+        params = json.loads(body)
+    except (TypeError, ValueError):
+        return {}
+    return params if isinstance(params, dict) else {}
+
+
+def get_request_ip(event) -> str:
+    headers = event.get('headers') or {}
+    ip_address = headers.get('X-Forwarded-For') or headers.get('x-forwarded-for')
+    if ip_address:
+        return ip_address.split(',')[0].strip()
+    return ((event.get('requestContext') or {}).get('identity') or {}).get('sourceIp')
+
+
+def rate_limited(action: str):
+    """
+    Middleware commun aux handlers : applique la limite par IP (BUSINESS_CONFIG) avant d'exécuter le handler.
+    Les limites par email et client_key portent sur des paramètres non authentifiés à ce stade :
+    elles sont appliquées par check_account_rate_limits, une fois la clé front vérifiée.
+    Le body n'est lu qu'ici (il contient la capture d'écran pour /image-transcript) :
+    le handler reçoit les paramètres, handler(event, context, params).
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(event, context):
+            if event.get('httpMethod') == 'OPTIONS':
+                return handler(event, context, {})
+            params = get_request_params(event)
+            try:
+                exceeded = check_rate_limits({"ip": get_request_ip(event)})
+            except Exception as e:
+                # the limiter must not take the service down with Redis
+                logger_tech.error(f"Rate limiter unavailable: {e}")
+                exceeded = None
+            if exceeded:
+                lang = params.get("lang", "en")
+                e = TooManyRequestException()
+                log_data = {"lambda_event": event, "action": action, "url": params.get("url", ""), "lang": lang,
+                            "email": params.get("email", ""), "credits": 0,
+                            "client_type": params.get("client_type", ""), "client_key": params.get("client_key", "")}
+                logger_business.log(status=get_exception_status_for_log(e), **log_data)
+                return manage_exception(e, lang)
+            return handler(event, context, params)
+        return wrapper
+    return decorator
+
+
+def check_account_rate_limits(email: str, client_key: str) -> None:
+    """
+    Applies the limits per email and client_key, once check_front_key has verified the pair :
+    a request with a forged email cannot consume the quota of its owner.
+    Raises TooManyRequestException if one of them is exceeded.
+    """
+    try:
+        exceeded = check_rate_limits({"email": email, "client_key": client_key})
+    except Exception as e:
+        logger_tech.error(f"Rate limiter unavailable: {e}")
+        return
+    if exceeded:
+        raise TooManyRequestException()
+
+
+@rate_limited("get_transcript")
+def lambda_handler_transcript(event, context, params):
     """
     Lambda entry point.  
     Expects JSON input (e.g. via API Gateway) with the following keys:
@@ -51,8 +135,17 @@ def lambda_handler_transcript(event, context):
         "client_type": <string>,
         "url": <string>,
         "etag": <string, optional>,
-        "lang": <string, optional>
+        "lang": <string, optional>,
+        "accept_stale": <"1" or true, optional>
     }
+    Responses :
+      200 {"known": 1, "transcript": ...} : cached transcript.
+          With accept_stale, an obsolete transcript is served as well, with "stale": 1 and a "txid" :
+          the client must then upload a screenshot with this txid (/image-transcript) to regenerate it.
+          A fresh transcript elected for an early refresh comes with "stale": 0 and a "txid", same upload.
+          Without accept_stale, an obsolete transcript is a miss (201).
+      201 {"known": 0, "txid": ...} : not cached, upload a screenshot with this txid.
+      202 {"known": 0, "pending": 1, "retry_after": ...} : being generated for another request.
     """
     # Handle OPTIONS request for CORS
     if event.get('httpMethod') == 'OPTIONS':
@@ -64,25 +157,14 @@ def lambda_handler_transcript(event, context):
     lang="en"
     log_data = {"lambda_event": event, "action": "get_transcript", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
     try:
-        body = event.get("body")
-        if body is None:
-            # If triggered by GET with queryStringParameters
-            params = event.get("queryStringParameters", {})
-            email = params["email"] 
-            client_type = params["client_type"]
-            client_key = params["client_key"]
-            url = params["url"]
-            etag = params.get("etag", None)
-            lang = params.get("lang", "en")
-        else:
-            # If triggered by POST with JSON body
-            data = json.loads(body)
-            email = data["email"]
-            client_type = data["client_type"]
-            client_key = data["client_key"]
-            url = data["url"]
-            etag = data.get("etag")
-            lang = data.get("lang", "en")
+        # JSON body (POST) or queryStringParameters (GET), read by rate_limited
+        email = params["email"]
+        client_type = params["client_type"]
+        client_key = params["client_key"]
+        url = params["url"]
+        etag = params.get("etag")
+        lang = params.get("lang", "en")
+        accept_stale = params.get("accept_stale") in (True, "1", "true")
 
         log_data["url"] = url
         log_data["lang"] = lang
@@ -91,16 +173,33 @@ def lambda_handler_transcript(event, context):
         log_data["client_key"] = client_key
         log_data["credits"] = 0
         
-        if not is_valid_front_key(email, client_key):
+        if not check_front_key(email, client_key):
             raise InvalidFrontKeyException(email)
+        check_account_rate_limits(email, client_key)
 
-        known, param = get_design_transcript(email, client_key, url, etag, lang,log_data)
+        # independent steps (credits, cache lookup) run concurrently on the service loop
+        get_transcript = get_design_transcript_concurrently if TECH_CONFIG['async_request_path'] else get_design_transcript
+        known, param, refresh = get_transcript(email, client_key, url, etag, lang, log_data, accept_stale)
         if known : 
             logger_business.log(status="200", **log_data)
+            response = {"known": 1, "transcript": param}
+            if refresh:
+                # obsolete or soon expired : the client may upload a screenshot with this txid
+                response["stale"] = 1 if refresh["stale"] else 0
+                if refresh["txid"]:
+                    response["txid"] = refresh["txid"]
             return {
                 "statusCode": 200,
                 'headers': get_cors_headers(),
-                "body": json.dumps({"known": 1, "transcript": param}, ensure_ascii=False)
+                "body": json.dumps(response, ensure_ascii=False)
+            }
+        if param is None:
+            # the same page is being analysed for another user
+            logger_business.log(status="202", **log_data)
+            return {
+                "statusCode": 202,
+                'headers': get_cors_headers(),
+                "body": json.dumps({"known": 0, "pending": 1, "retry_after": BUSINESS_CONFIG['singleflight_retry_after']}, ensure_ascii=False)
             }
         logger_business.log(status="201", **log_data)
         return {
@@ -113,7 +212,8 @@ def lambda_handler_transcript(event, context):
         logger_business.log(status=get_exception_status_for_log(e), **log_data)
         return manage_exception(e, lang)
 
-def lambda_handler_image_transcript(event, context):
+@rate_limited("get_transcript_from_image")
+def lambda_handler_image_transcript(event, context, params):
     """
     Lambda entry point for direct image processing.
     Expects JSON input with the following keys:
@@ -135,71 +235,15 @@ def lambda_handler_image_transcript(event, context):
         }
     lang="en"
     log_data = {"lambda_event": event, "action": "get_transcript_from_image", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
-    
-    # Vérification du rate limiting par IP
-    headers = event.get('headers', {})
-    ip_address = headers.get('X-Forwarded-For')
-    if ip_address:
-        ip_address = ip_address.split(',')[0].strip()
-        if shouldBlockIP(ip_address):
-            raise TooManyRequestException(ip_address)
 
     try:
-        body = event.get("body")
-        if body is None:
-            # If triggered by GET with queryStringParameters
-            params = event.get("queryStringParameters", {})
-            email = params["email"]
-            url = params["url"]
-            txid = params["txid"]
-            image = params["image"]
-            lang = params.get("lang", lang)
-            client_type = params.get("client_type")
-            client_key = params.get("client_key")
-        else:
-            # If triggered by POST with JSON body
-            params = json.loads(body)
-            email = params["email"]
-            url = params["url"]
-            txid = params["txid"]
-            image = params["image"]
-            lang = params.get("lang", lang)
-            client_type = params.get("client_type")
-            client_key = params.get("client_key")
-        
-        log_data["lang"] = lang
-        log_data["email"] = email
-        log_data["client_type"] = client_type
-        log_data["client_key"] = client_key
-        log_data["credits"] = 0
-        log_data["url"] = url
-        # Extract parameters from the event
-        
-        if not txid or not image:
-            logger_business.log(status="400", **log_data)
-            return {
-                'statusCode': 400,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'Missing required parameter: id or image'})
-            }
-
-        if not is_valid_front_key(email, client_key):
-            raise InvalidFrontKeyException(email)
-
-        # Decode base64 image
-        import base64
-        try:
-            image_bytes = base64.b64decode(image) 
-        except Exception as e:
-            logger_business.log(status="400", **log_data)
-            return {
-                'statusCode': 400,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': f'Invalid base64 image data: {str(e)}'})
-            }
+        request = _read_image_request(params, log_data)
+        if 'statusCode' in request:
+            return request
+        lang = request["lang"]
   
         # Generate transcript
-        transcript = get_design_transcript_with_image(txid, image_bytes)
+        transcript = get_design_transcript_with_image(request["txid"], request["image"])
         logger_business.log(status="200", **log_data)
         return {
             'statusCode': 200,
@@ -214,7 +258,104 @@ def lambda_handler_image_transcript(event, context):
         return manage_exception(e, lang)
 
 
-def lambda_handler_send_validation_mail(event, context):
+def _read_image_request(params: dict, log_data: dict) -> dict:
+    """
+    Checks the parameters of an image transcript request, filling log_data.
+    Returns {"txid", "image" (bytes), "lang"} or the 400 response to send.
+    """
+    lang = "en"
+    email = params["email"]
+    url = params["url"]
+    txid = params["txid"]
+    image = params["image"]
+    lang = params.get("lang", lang)
+    client_type = params.get("client_type")
+    client_key = params.get("client_key")
+
+    log_data["lang"] = lang
+    log_data["email"] = email
+    log_data["client_type"] = client_type
+    log_data["client_key"] = client_key
+    log_data["credits"] = 0
+    log_data["url"] = url
+
+    if not txid or not image:
+        logger_business.log(status="400", **log_data)
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': 'Missing required parameter: id or image'})
+        }
+
+    if not check_front_key(email, client_key):
+        raise InvalidFrontKeyException(email)
+    check_account_rate_limits(email, client_key)
+
+    # Decode base64 image
+    import base64
+    try:
+        image_bytes = base64.b64decode(image) 
+    except Exception as e:
+        logger_business.log(status="400", **log_data)
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': f'Invalid base64 image data: {str(e)}'})
+        }
+    return {"txid": txid, "image": image_bytes, "lang": lang}
+
+
+@rate_limited("get_transcript_from_image_stream")
+def lambda_handler_image_transcript_stream(event, context, params):
+    """
+    Streaming version of lambda_handler_image_transcript (same input).
+    On success, 'body' is a generator of NDJSON lines :
+        {"delta": <chunk of transcript>} ... then {"done": true, "transcript": <full transcript>}
+    or {"error": ...} if the generation fails once the response has started.
+    The python Lambda runtime buffers responses : this handler is served by an HTTP server
+    that writes the body as it is produced (scripts/dev_server.py, or a Lambda Web Adapter
+    with a function URL in RESPONSE_STREAM mode).
+    """
+    if event.get('httpMethod') == 'OPTIONS':
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': ''
+        }
+    lang="en"
+    log_data = {"lambda_event": event, "action": "get_transcript_from_image_stream", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
+
+    try:
+        request = _read_image_request(params, log_data)
+        if 'statusCode' in request:
+            return request
+        lang = request["lang"]
+    except Exception as e:
+        logger_business.log(status=get_exception_status_for_log(e), **log_data)
+        return manage_exception(e, lang)
+
+    def ndjson_lines():
+        parts = []
+        try:
+            for chunk in stream_design_transcript_with_image(request["txid"], request["image"]):
+                parts.append(chunk)
+                yield json.dumps({'delta': chunk}, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger_business.log(status=get_exception_status_for_log(e), **log_data)
+            yield json.dumps(json.loads(manage_exception(e, lang)['body'])) + "\n"
+            return
+        logger_business.log(status="200", **log_data)
+        yield json.dumps({'done': True, 'transcript': "".join(parts).strip()}, ensure_ascii=False) + "\n"
+
+    return {
+        'statusCode': 200,
+        'headers': {**get_cors_headers(), 'Content-Type': 'application/x-ndjson; charset=utf-8'},
+        'body': ndjson_lines()
+    }
+
+
+@rate_limited("send_validation_mail")
+def lambda_handler_send_validation_mail(event, context, params):
     """
     Lambda entry point for email registration.
     Expects JSON input with the following keys:
@@ -228,21 +369,11 @@ def lambda_handler_send_validation_mail(event, context):
     lang="en"
     log_data = {"lambda_event": event, "action": "send_validation_mail", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
     try:
-        body = event.get("body")
-        if body is None:
-            # If triggered by GET with queryStringParameters
-            params = event.get("queryStringParameters", {})
-            email = params["email"]
-            lang = params.get("lang", lang)
-            client_type = params.get("client_type")
-            client_key = params.get("client_key")
-        else:
-            # If triggered by POST with JSON body
-            data = json.loads(body)
-            email = data["email"]
-            lang = data.get("lang", lang)
-            client_type = data.get("client_type")
-            client_key = data.get("client_key")
+        # JSON body (POST) or queryStringParameters (GET), read by rate_limited
+        email = params["email"]
+        lang = params.get("lang", lang)
+        client_type = params.get("client_type")
+        client_key = params.get("client_key")
 
         log_data["lang"] = lang
         log_data["email"] = email
@@ -269,7 +400,8 @@ def lambda_handler_send_validation_mail(event, context):
         return manage_exception(e, lang)
  
 
-def lambda_handler_register_key_for_email(event, context):
+@rate_limited("register_key_for_email")
+def lambda_handler_register_key_for_email(event, context, params):
     """
     Lambda entry point for email validation.
     Expects JSON input with the following keys:
@@ -282,19 +414,10 @@ def lambda_handler_register_key_for_email(event, context):
     lang="en"
     log_data = {"lambda_event": event, "action": "register_key_for_email", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "email", "client_key": ""}
     try:
-        body = event.get("body")
-        if body is None:
-            # If triggered by GET with queryStringParameters
-            params = event.get("queryStringParameters", {})
-            validation_key = params["validation_key"]
-            email = params["email"]
-            lang = params.get("lang", lang)
-        else:
-            # If triggered by POST with JSON body
-            data = json.loads(body)
-            validation_key = data["validation_key"]
-            email = data["email"]
-            lang = data.get("lang", lang)
+        # JSON body (POST) or queryStringParameters (GET), read by rate_limited
+        validation_key = params["validation_key"]
+        email = params["email"]
+        lang = params.get("lang", lang)
 
         log_data["email"] = email
         log_data["lang"] = lang
@@ -322,21 +445,52 @@ def lambda_handler_register_key_for_email(event, context):
         return manage_exception(e, lang)
 
 
-def lambda_handler_cache_get(event, context):
-    """Affiche le contenu complet du cache Redis"""
+@rate_limited("cache_get")
+def lambda_handler_cache_get(event, context, params):
+    """
+    Parcourt le cache Redis page par page (SCAN).
+    Query parameters (optionnels) :
+    {
+        "prefix": <string, ex: "transcript_cache:">,
+        "cursor": <int, curseur renvoyé par l'appel précédent>,
+        "count": <int, taille de page>,
+        "values": <"0" pour ne renvoyer que les tailles et les TTL>
+    }
+    """
     lang="en"
     log_data = {"lambda_event": event, "action": "cache_get", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
     try:
-        cache_keys = redis_client.keys("*")
-        cache_data = {key: redis_client.get(key) for key in cache_keys}
+        prefix = params.get("prefix")
+        if prefix and not is_known_prefix(prefix):
+            logger_business.log(status="400", **log_data)
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': f'Unknown prefix, expected one of {CACHE_NAMESPACES}'})
+            }
+        try:
+            cursor = int(params.get("cursor", 0))
+            count = int(params.get("count", 100))
+        except (TypeError, ValueError):
+            cursor, count = -1, 0
+        if cursor < 0 or count <= 0:
+            logger_business.log(status="400", **log_data)
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': 'cursor must be a non-negative integer and count a positive integer'})
+            }
+        page = scan_cache_entries(
+            prefix=prefix,
+            cursor=cursor,
+            count=count,
+            with_values=params.get("values", "1") != "0",
+        )
         logger_business.log(status="200", **log_data)
         return {
             'statusCode': 200,
             'headers': get_cors_headers(),
-                'body': json.dumps({
-                'cache_entries': len(cache_data),
-                'data': cache_data
-            }, ensure_ascii=False)
+            'body': json.dumps(page, ensure_ascii=False)
         }
         
     except Exception as e:
@@ -344,34 +498,135 @@ def lambda_handler_cache_get(event, context):
         return manage_exception(e, "en")
  
 
-
         
-def lambda_handler_cache_clear(event, context):
+@rate_limited("llm_stats")
+def lambda_handler_llm_stats(event, context, params):
+    """
+    Statistiques des appels LLM par modèle (appels, tokens, octets d'image, coût, latences).
+    Query parameters (optionnels) :
+    {
+        "hours": <int, période couverte, 24 par défaut, au plus la durée de rétention des métriques, LLM_METRICS retention>
+    }
+    """
+    log_data = {"lambda_event": event, "action": "llm_stats", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
+    try:
+        try:
+            hours = int(params.get("hours", 24))
+        except ValueError:
+            hours = 0
+        if hours <= 0:
+            logger_business.log(status="400", **log_data)
+            return {
+                'statusCode': 400,
+                'headers': get_cors_headers(),
+                'body': json.dumps({'error': 'hours must be a positive integer'})
+            }
+        # the metrics older than their retention have expired
+        hours = min(hours, LLM_METRICS["retention"] // 3600)
+        stats = get_llm_stats(hours)
+        logger_business.log(status="200", **log_data)
+        return {
+            'statusCode': 200,
+            'headers': get_cors_headers(),
+            'body': json.dumps(stats)
+        }
+    except Exception as e:
+        logger_business.log(status=get_exception_status_for_log(e), **log_data)
+        return manage_exception(e, "en")
+
+
+@rate_limited("diagnostics")
+def lambda_handler_diagnostics(event, context, params):
+    """
+    Diagnostic des dépendances, hors du chemin des requêtes : latences (percentiles) de chaque dépendance.
+    Query parameters (optionnels) :
+    {
+        "dependencies": <string, ex: "dynamodb,redis" ; toutes par défaut>,
+        "rounds": <int, appels par dépendance, 5 par défaut, 20 au plus ; le secret n'est lu qu'une fois>
+    }
+    Répond 503 si une dépendance est en erreur (seul le type de l'erreur est renvoyé).
+    """
+    log_data = {"lambda_event": event, "action": "diagnostics", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
+    try:
+        dependencies = [name for name in params.get("dependencies", "").split(",") if name]
+        rounds = min(int(params.get("rounds", 5)), 20)
+        if rounds <= 0:
+            raise ValueError("rounds must be a positive integer")
+        report = run_diagnostics(dependencies, rounds)
+        status = 200 if report["ok"] else 503
+        logger_business.log(status=str(status), **log_data)
+        return {
+            'statusCode': status,
+            'headers': get_cors_headers(),
+            'body': json.dumps(report)
+        }
+    except ValueError:
+        logger_business.log(status="400", **log_data)
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': f'rounds must be a positive integer and dependencies among {list(DIAGNOSTICS_PROBES)}'})
+        }
+    except Exception as e:
+        # no message nor traceback in the response (see services/diagnostics.py)
+        logger_tech.error(f"Diagnostics failed: {e}")
+        logger_business.log(status=get_exception_status_for_log(e), **log_data)
+        return {
+            'statusCode': 500,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': type(e).__name__})
+        }
+
+
+@rate_limited("cache_clear")
+def lambda_handler_cache_clear(event, context, params):
+    """
+    Supprime des entrées du cache Redis.
+    Query parameters :
+    {
+        "key": <string, une clé précise>
+      ou une sélection par lot :
+        "namespace": <string, ex: "urlinfo_cache:">,
+        "url_prefix": <string, transcripts dont l'url commence par ce préfixe>,
+        "domain": <string, transcripts d'un domaine et de ses sous-domaines>,
+        "older_than": <int, transcripts dont l'etag a plus de N secondes>,
+        "cursor": <int, pour reprendre une suppression interrompue>
+    }
+    """
     log_data = {"lambda_event": event, "action": "cache_clear", "url": "", "lang": "", "email": "", "credits": 0, "client_type": "", "client_key": ""}
     try:
-        # Vérifier si une clé spécifique est fournie
-        params = event.get("queryStringParameters", {})
-        specific_key = None
-        if (params) : 
-            specific_key = params.get("key", None)
+        specific_key = params.get("key", None)
         if specific_key:
             # Supprimer une clé spécifique
-            if redis_client.exists(specific_key):
-                redis_client.delete(specific_key)
-                message = f"Cache key '{specific_key}' deleted successfully"
+            if get_redis_client().unlink(specific_key):
+                result = {'message': f"Cache key '{specific_key}' deleted successfully"}
             else:
-                message = f"Cache key '{specific_key}' not found"
+                result = {'message': f"Cache key '{specific_key}' not found"}
         else:
-            # Supprimer tout le cache
-            redis_client.flushall()
-            message = "All cache entries cleared successfully"
+            namespace = params.get("namespace")
+            older_than = params.get("older_than")
+            if namespace and not is_known_prefix(namespace):
+                raise ValueError(f"Unknown namespace, expected one of {CACHE_NAMESPACES}")
+            result = invalidate_cache_entries(
+                namespace=namespace,
+                url_prefix=params.get("url_prefix"),
+                domain=params.get("domain"),
+                older_than=int(older_than) if older_than is not None else None,
+                cursor=params.get("cursor", 0),
+            )
+            result['message'] = f"{result['deleted']} cache entries deleted"
         logger_business.log(status="200", **log_data)
         return {
             'statusCode': 200,
             'headers': get_cors_headers(),
-            'body': json.dumps({
-                'message': message
-            }, ensure_ascii=False)
+            'body': json.dumps(result, ensure_ascii=False)
+        }
+    except ValueError as e:
+        logger_business.log(status="400", **log_data)
+        return {
+            'statusCode': 400,
+            'headers': get_cors_headers(),
+            'body': json.dumps({'error': str(e)})
         }
     except Exception as e:
         logger_business.log(status=get_exception_status_for_log(e), **log_data)
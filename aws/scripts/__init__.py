@@ -0,0 +1,3 @@
+"""
+Scripts d'exploitation et benchmarks (non déployés dans les Lambdas).
+"""
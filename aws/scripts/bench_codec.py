@@ -0,0 +1,86 @@
+"""
+Benchmark de l'encodage des transcripts dans Redis (taille et temps d'encodage/décodage).
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.bench_codec                      # transcripts lus dans Redis
+    python -m scripts.bench_codec --file transcripts.json   # liste JSON de textes
+"""
+
+import argparse
+import json
+import time
+
+from utils.codec import encode_value, decode_value, zstandard
+
+
+def load_transcripts_from_redis(limit: int) -> list:
+    from services.cache_admin import scan_cache_entries
+
+    transcripts = []
+    cursor = 0
+    while len(transcripts) < limit:
+        page = scan_cache_entries(prefix="transcript_cache:", cursor=cursor, count=200)
+        for entry in page["entries"]:
+            for field, value in (entry.get("value") or {}).items():
+                if field.startswith("lang:") and value:
+                    transcripts.append(value)
+        cursor = page["next_cursor"]
+        if cursor == 0:
+            break
+    return transcripts[:limit]
+
+
+def bench(transcripts: list, compression: str, rounds: int) -> dict:
+    raw_size = sum(len(text.encode("utf-8")) for text in transcripts)
+    encoded = [encode_value(text, compression) for text in transcripts]
+    encoded_size = sum(len(value) for value in encoded)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in transcripts:
+            encode_value(text, compression)
+    encode_time = (time.perf_counter() - start) / (rounds * len(transcripts))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for value in encoded:
+            decode_value(value)
+    decode_time = (time.perf_counter() - start) / (rounds * len(transcripts))
+
+    return {
+        "compression": compression,
+        "raw_bytes": raw_size,
+        "encoded_bytes": encoded_size,
+        "ratio": encoded_size / raw_size if raw_size else 0,
+        "encode_us": encode_time * 1e6,
+        "decode_us": decode_time * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="JSON file holding a list of transcripts")
+    parser.add_argument("--limit", type=int, default=1000, help="max transcripts read from Redis")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            transcripts = json.load(f)
+    else:
+        transcripts = load_transcripts_from_redis(args.limit)
+    if not transcripts:
+        print("No transcript to benchmark")
+        return
+
+    codecs = ["none", "zlib"] + (["zstd"] if zstandard is not None else [])
+    print(f"{len(transcripts)} transcripts")
+    print(f"{'codec':<8}{'raw bytes':>12}{'stored bytes':>14}{'ratio':>8}{'encode µs':>12}{'decode µs':>12}")
+    for compression in codecs:
+        result = bench(transcripts, compression, args.rounds)
+        print(f"{result['compression']:<8}{result['raw_bytes']:>12}{result['encoded_bytes']:>14}"
+              f"{result['ratio']:>8.2f}{result['encode_us']:>12.1f}{result['decode_us']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
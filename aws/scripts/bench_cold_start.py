@@ -0,0 +1,114 @@
+"""
+Benchmark du coût d'import (cold start) de chaque handler déclaré dans template.yaml.
+
+Each handler is imported in a fresh interpreter, as the Lambda runtime does,
+and the script reports the import time and the heavy libraries loaded by the import.
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.bench_cold_start
+    python -m scripts.bench_cold_start --rounds 10 --top 15
+    python -m scripts.bench_cold_start --warmup secrets,redis   # includes the warm-up (network)
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+AWS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["openai", "httpx", "boto3", "botocore", "redis", "PIL", "zstandard"]
+
+# run in the child interpreter : prints the import time and the heavy modules loaded
+_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+module = __import__({module!r}, fromlist=[{handler!r}])
+getattr(module, {handler!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def read_handlers(template_path: str) -> list:
+    """
+    Returns [(function name, "module.handler")] from the SAM template.
+    """
+    handlers = []
+    function = None
+    with open(template_path, encoding="utf-8") as f:
+        for line in f:
+            match = re.match(r"^  (\w+):\s*$", line)
+            if match:
+                function = match.group(1)
+            match = re.match(r"^\s+Handler:\s*(\S+)", line)
+            if match and function and "." in match.group(1) and not match.group(1).startswith("app."):
+                handlers.append((function, match.group(1)))
+    return handlers
+
+
+def parse_importtime(stderr: str, top: int) -> list:
+    """
+    Returns the `top` slowest packages [(package, cumulative ms)] from `python -X importtime`,
+    whatever module imported them (the outermost import of a package has the largest cumulative time).
+    """
+    packages = {}
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)", line)
+        if not match:
+            continue
+        package = match.group(3).split(".")[0]
+        packages[package] = max(packages.get(package, 0), int(match.group(2)) / 1000)
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+
+
+def bench_handler(path: str, rounds: int, top: int, warmup: str) -> dict:
+    module, handler = path.rsplit(".", 1)
+    code = _CHILD.format(module=module, handler=handler, heavy=HEAVY_MODULES)
+    env = dict(os.environ, WARMUP=warmup or "")
+    timings = []
+    result = None
+    for i in range(rounds):
+        command = [sys.executable] + (["-X", "importtime"] if i == 0 else []) + ["-c", code]
+        process = subprocess.run(command, cwd=AWS_DIR, env=env, capture_output=True, text=True)
+        if process.returncode != 0:
+            errors = [line for line in process.stderr.splitlines() if line and not line.startswith("import time:")]
+            return {"error": errors[-1] if errors else "failed"}
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        timings.append(result["ms"])
+        if i == 0:
+            slowest = parse_importtime(process.stderr, top)
+    timings.sort()
+    return {
+        "median_ms": statistics.median(timings),
+        "max_ms": timings[-1],
+        "loaded": result["loaded"],
+        "slowest": slowest,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--template", default=os.path.join(AWS_DIR, "template.yaml"))
+    parser.add_argument("--rounds", type=int, default=5, help="imports per handler")
+    parser.add_argument("--top", type=int, default=8, help="slowest packages shown per handler")
+    parser.add_argument("--warmup", default="", help="WARMUP value (dependencies initialized at import)")
+    args = parser.parse_args()
+
+    for function, path in read_handlers(args.template):
+        result = bench_handler(path, args.rounds, args.top, args.warmup)
+        print(f"{function} ({path})")
+        if "error" in result:
+            print(f"    import failed: {result['error']}")
+            continue
+        print(f"    import median {result['median_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+        print(f"    heavy modules loaded: {', '.join(result['loaded']) or '-'}")
+        for package, ms in result["slowest"]:
+            print(f"    {package:<24}{ms:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark de la préparation des captures d'écran avant le modèle de vision :
+octets économisés, temps de préparation et, avec --llm, latence de l'appel au modèle pour chaque réglage.
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.bench_image capture1.png capture2.png
+    python -m scripts.bench_image --llm --config main capture1.png
+"""
+
+import argparse
+import statistics
+import time
+
+from utils.config import IMAGE_PREPROCESSING, LLM_CONFIG
+from utils.image import preprocess_image
+
+
+# settings compared with the ones of the transcript models (LLM_CONFIG)
+PRESETS = {
+    "untouched": {"enabled": False},
+    "png-1536": {"format": "png"},
+    "jpeg-1536-q85": {"format": "jpeg", "quality": 85},
+    "jpeg-1024-q75": {"format": "jpeg", "max_width": 1024, "max_height": 1024, "quality": 75},
+    "webp-1536-q80": {"format": "webp", "quality": 80},
+    "webp-16:9-q80": {"format": "webp", "quality": 80, "viewport_ratio": 9 / 16},
+    "jpeg-768-low": {"format": "jpeg", "max_width": 768, "max_height": 768, "quality": 80, "detail": "low"},
+}
+
+
+def bench(images: list, settings: dict, llm_config: dict = None) -> dict:
+    from services.llm import _generate
+
+    raw_size, sent_size, preprocess_times, llm_times = 0, 0, [], []
+    for img in images:
+        start = time.perf_counter()
+        data, _ = preprocess_image(img, settings)
+        preprocess_times.append(time.perf_counter() - start)
+        raw_size += len(img)
+        sent_size += len(data)
+
+        if llm_config is not None:
+            start = time.perf_counter()
+            _generate({**llm_config, "image": settings}, img, "en")
+            llm_times.append(time.perf_counter() - start)
+
+    return {
+        "raw_bytes": raw_size,
+        "sent_bytes": sent_size,
+        "saved": 1 - sent_size / raw_size if raw_size else 0,
+        "preprocess_ms": statistics.mean(preprocess_times) * 1000,
+        "llm_ms": statistics.mean(llm_times) * 1000 if llm_times else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("images", nargs="+", help="PNG screenshots, as sent by the extension")
+    parser.add_argument("--llm", action="store_true", help="also measure the latency of the vision call")
+    parser.add_argument("--config", default="main", choices=["main", "secondary"],
+                        help="transcript configuration used for --llm")
+    args = parser.parse_args()
+
+    images = []
+    for path in args.images:
+        with open(path, "rb") as f:
+            images.append(f.read())
+
+    settings = {name: {**IMAGE_PREPROCESSING, **preset} for name, preset in PRESETS.items()}
+    for role, config in LLM_CONFIG["transcript"].items():
+        settings[f"{role} ({config['model']})"] = config["image"]
+    llm_config = LLM_CONFIG["transcript"][args.config] if args.llm else None
+
+    print(f"{len(images)} images")
+    print(f"{'setting':<28}{'raw bytes':>12}{'sent bytes':>12}{'saved':>8}{'prep ms':>10}{'llm ms':>10}")
+    for name, setting in settings.items():
+        result = bench(images, setting, llm_config)
+        llm_ms = f"{result['llm_ms']:>10.0f}" if result["llm_ms"] is not None else f"{'-':>10}"
+        print(f"{name:<28}{result['raw_bytes']:>12}{result['sent_bytes']:>12}"
+              f"{result['saved']:>8.1%}{result['preprocess_ms']:>10.1f}{llm_ms}")
+
+
+if __name__ == "__main__":
+    main()
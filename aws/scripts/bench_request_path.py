@@ -0,0 +1,83 @@
+"""
+Benchmark de bout en bout de /transcript : get_design_transcript (étapes l'une après l'autre)
+contre get_design_transcript_concurrently (crédits et cache en parallèle, services/transcript_async.py).
+
+Chaque appel débite un crédit du compte donné : utiliser un compte de développement.
+Les urls devraient être en cache : pour une url sans transcript, la génération élue par un appel
+est abandonnée aussitôt (verrou libéré), sinon les tours suivants mesureraient l'attente
+du single-flight (singleflight_wait) au lieu du chemin de la requête.
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.bench_request_path --email dev@example.com --client-key KEY --urls https://example.com https://example.org
+    python -m scripts.bench_request_path --email dev@example.com --client-key KEY --urls https://example.com --lang french --rounds 20
+"""
+
+import argparse
+import statistics
+import time
+
+from services.cache import pop_cached_url_info, release_transcript_generation
+from services.transcript import get_design_transcript
+from services.transcript_async import get_design_transcript_concurrently
+
+
+def abandon_generation(url: str, known: bool, param: str, refresh: dict) -> None:
+    """
+    Releases the generation lock (and its url info) taken by a call, as an abandoned upload would.
+    """
+    txid = (refresh or {}).get("txid") if known else param
+    if txid:
+        pop_cached_url_info(txid)
+        release_transcript_generation(url, None, txid)
+
+
+def bench(get_transcript, email: str, client_key: str, urls: list, lang: str, rounds: int) -> dict:
+    timings = []
+    outcomes = {"known": 0, "txid": 0, "pending": 0}
+    for _ in range(rounds):
+        for url in urls:
+            start = time.perf_counter()
+            known, param, refresh = get_transcript(email, client_key, url, None, lang, None)
+            timings.append((time.perf_counter() - start) * 1000)
+            outcomes["known" if known else "txid" if param else "pending"] += 1
+            abandon_generation(url, known, param, refresh)
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": timings[len(timings) // 2],
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "outcomes": outcomes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--email", required=True, help="account debited by the calls")
+    parser.add_argument("--client-key", required=True, help="front key of the account")
+    parser.add_argument("--urls", nargs="+", required=True)
+    parser.add_argument("--lang", default="english")
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    paths = {
+        "sequential": get_design_transcript,
+        "concurrent": get_design_transcript_concurrently,
+    }
+    # first call of each path : connections and clients, not measured
+    for get_transcript in paths.values():
+        known, param, refresh = get_transcript(args.email, args.client_key, args.urls[0], None, args.lang, None)
+        abandon_generation(args.urls[0], known, param, refresh)
+
+    print(f"{len(args.urls)} urls x {args.rounds} rounds")
+    print(f"{'path':<12}{'calls':>7}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}  outcomes")
+    for name, get_transcript in paths.items():
+        result = bench(get_transcript, args.email, args.client_key, args.urls, args.lang, args.rounds)
+        print(f"{name:<12}{result['calls']:>7}{result['mean_ms']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}  {result['outcomes']}")
+        if result["outcomes"]["pending"]:
+            print(f"{'':<12}warning : {result['outcomes']['pending']} calls waited for another generation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Serveur HTTP local de développement : expose les handlers Lambda sur les chemins de l'API,
+et transmet au fil de l'eau les réponses en streaming (/image-transcript/stream).
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.dev_server                  # http://127.0.0.1:3000
+    python -m scripts.dev_server --port 8080
+"""
+
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+
+from lambdas.handlers import (
+    get_cors_headers, lambda_handler_transcript, lambda_handler_image_transcript,
+    lambda_handler_image_transcript_stream, lambda_handler_cache_get, lambda_handler_cache_clear,
+    lambda_handler_llm_stats, lambda_handler_diagnostics, lambda_handler_send_validation_mail, lambda_handler_register_key_for_email
+)
+
+# same paths as the API in template.yaml, plus the streaming route (served outside API Gateway)
+ROUTES = {
+    ("POST", "/transcript"): lambda_handler_transcript,
+    ("POST", "/image-transcript"): lambda_handler_image_transcript,
+    ("POST", "/image-transcript/stream"): lambda_handler_image_transcript_stream,
+    ("GET", "/cache/get"): lambda_handler_cache_get,
+    ("DELETE", "/cache/clear"): lambda_handler_cache_clear,
+    ("GET", "/llm/stats"): lambda_handler_llm_stats,
+    ("GET", "/diagnostics"): lambda_handler_diagnostics,
+    ("POST", "/send-validation-mail"): lambda_handler_send_validation_mail,
+    ("POST", "/register-key-for-email"): lambda_handler_register_key_for_email,
+}
+
+
+class LambdaRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def _event(self, path: str, query: str) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else None
+        return {
+            "httpMethod": self.command,
+            "path": path,
+            "headers": dict(self.headers),
+            "queryStringParameters": dict(parse_qsl(query)) or None,
+            "body": body,
+            "requestContext": {"identity": {"sourceIp": self.client_address[0]}},
+        }
+
+    def _send(self, status: int, headers: dict, body) -> None:
+        self.send_response(status)
+        for name, value in headers.items():
+            if name.lower() not in ("content-length", "transfer-encoding"):
+                self.send_header(name, value)
+        if isinstance(body, (str, bytes)) or body is None:
+            data = body.encode("utf-8") if isinstance(body, str) else (body or b"")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        # streamed body : one HTTP chunk per item, written as soon as it is produced
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for item in body:
+                data = item.encode("utf-8") if isinstance(item, str) else item
+                if data:
+                    self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # the client went away : stop the generation
+            body.close()
+
+    def _dispatch(self) -> None:
+        url = urlsplit(self.path)
+        if self.command == "OPTIONS":
+            self._send(200, get_cors_headers(), "")
+            return
+        handler = ROUTES.get((self.command, url.path))
+        if handler is None:
+            self._send(404, get_cors_headers(), json.dumps({"error": f"No route for {self.command} {url.path}"}))
+            return
+        response = handler(self._event(url.path, url.query), {})
+        self._send(response["statusCode"], response.get("headers") or {}, response.get("body"))
+
+    do_GET = do_POST = do_DELETE = do_OPTIONS = _dispatch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), LambdaRequestHandler)
+    print(f"Serving the Lambda handlers on http://{args.host}:{args.port}")
+    for method, path in ROUTES:
+        print(f"    {method:<7}{path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Diagnostic des dépendances (DynamoDB, Redis, Secrets Manager) depuis un poste de développement :
+latences de chaque dépendance en percentiles (voir services/diagnostics.py).
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.diagnostics
+    python -m scripts.diagnostics --dependencies dynamodb redis --rounds 50
+"""
+
+import argparse
+import sys
+
+from services.diagnostics import DIAGNOSTICS_PROBES, run_diagnostics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dependencies", nargs="+", choices=list(DIAGNOSTICS_PROBES), help="all by default")
+    parser.add_argument("--rounds", type=int, default=20, help="calls per dependency")
+    args = parser.parse_args()
+
+    report = run_diagnostics(args.dependencies, args.rounds)
+    print(f"{'dependency':<18}{'first ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, result in report["dependencies"].items():
+        if not result["ok"]:
+            print(f"{name:<18}  ERROR {result['error']}")
+            continue
+        print(f"{name:<18}{result['first_ms']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+              f"{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}")
+    sys.exit(0 if report["ok"] else 1)
+
+
+if __name__ == "__main__":
+    main()
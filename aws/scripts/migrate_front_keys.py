@@ -0,0 +1,76 @@
+"""
+Migration des clés front : convertit les listes frontKeys des comptes en ensembles (string set)
+et écrit l'item de chaque clé dans la table d'historique, indexé par clé (services/dynamodb.py).
+Un compte non migré est converti par add_front_key et remove_front_key à leur premier appel :
+la migration convertit les autres. Elle peut être relancée.
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.migrate_front_keys --create-index     # ajoute l'index à la table d'historique si besoin
+    python -m scripts.migrate_front_keys --dry-run
+    python -m scripts.migrate_front_keys
+"""
+
+import argparse
+
+from services.dynamodb import get_dynamodb_id_table, get_dynamodb_history_table, FRONT_KEY_ATTRIBUTE, \
+    convert_front_keys_list
+from scripts.migrate_history import front_key_index
+from utils.config import TECH_CONFIG
+
+
+def create_front_key_index() -> None:
+    table = get_dynamodb_history_table()
+    client = table.meta.client
+    description = client.describe_table(TableName=table.name)["Table"]
+    index_name = TECH_CONFIG["dynamodb_front_key_index"]
+    if any(index["IndexName"] == index_name for index in description.get("GlobalSecondaryIndexes", [])):
+        print(f"Index {index_name} already exists")
+        return
+    client.update_table(
+        TableName=table.name,
+        AttributeDefinitions=[{"AttributeName": FRONT_KEY_ATTRIBUTE, "AttributeType": "S"}],
+        GlobalSecondaryIndexUpdates=[{"Create": front_key_index()}],
+    )
+    print(f"Index {index_name} is being created (backfill in progress, see the DynamoDB console)")
+
+
+def migrate_account(account: dict, dry_run: bool) -> int:
+    if dry_run:
+        return len(set(account["frontKeys"]))
+    return convert_front_keys_list(account)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--create-index", action="store_true", help="add the key index to the history table and exit")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be migrated")
+    args = parser.parse_args()
+
+    if args.create_index:
+        create_front_key_index()
+        return
+
+    scan = {
+        "ProjectionExpression": "email, frontKeys",
+        "FilterExpression": "attribute_type(frontKeys, :list)",
+        "ExpressionAttributeValues": {":list": "L"},
+    }
+    accounts = migrated = failed = 0
+    while True:
+        response = get_dynamodb_id_table().scan(**scan)
+        for account in response.get("Items", []):
+            accounts += 1
+            try:
+                migrated += migrate_account(account, args.dry_run)
+            except Exception as e:
+                failed += 1
+                print(f"{account['email']} failed (run the migration again): {e}")
+        if "LastEvaluatedKey" not in response:
+            break
+        scan["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    action = "to migrate" if args.dry_run else "migrated"
+    print(f"{accounts} accounts, {migrated} front keys {action}, {failed} accounts failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Migration des historiques : déplace les listes usage-history et foundings-history des comptes
+vers la table d'historique (un item par événement), puis les retire des comptes.
+La migration peut être relancée : les items migrés ont des clés déterministes.
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.migrate_history --create-table     # crée la table d'historique si besoin
+    python -m scripts.migrate_history --dry-run
+    python -m scripts.migrate_history
+"""
+
+import argparse
+from decimal import Decimal
+
+from services.dynamodb import (
+    get_dynamodb_id_table, get_dynamodb_history_table, HISTORY_USAGE, HISTORY_FOUNDING, FRONT_KEY_ATTRIBUTE
+)
+from utils.config import TECH_CONFIG
+
+
+def front_key_index() -> dict:
+    """
+    Index of the front key items (services/dynamodb.py) : front-key -> email.
+    """
+    return {
+        "IndexName": TECH_CONFIG["dynamodb_front_key_index"],
+        "KeySchema": [{"AttributeName": FRONT_KEY_ATTRIBUTE, "KeyType": "HASH"}],
+        "Projection": {"ProjectionType": "KEYS_ONLY"},
+    }
+
+
+def create_history_table() -> None:
+    table = get_dynamodb_history_table()
+    client = table.meta.client
+    if table.name in client.list_tables()["TableNames"]:
+        print(f"Table {table.name} already exists")
+        return
+    client.create_table(
+        TableName=table.name,
+        KeySchema=[{"AttributeName": "email", "KeyType": "HASH"}, {"AttributeName": "sk", "KeyType": "RANGE"}],
+        AttributeDefinitions=[{"AttributeName": "email", "AttributeType": "S"},
+                              {"AttributeName": "sk", "AttributeType": "S"},
+                              {"AttributeName": FRONT_KEY_ATTRIBUTE, "AttributeType": "S"}],
+        GlobalSecondaryIndexes=[front_key_index()],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    client.get_waiter("table_exists").wait(TableName=table.name)
+    print(f"Table {table.name} created")
+
+
+def history_items(account: dict) -> list:
+    """
+    Returns the history items of the lists of an account : [(date, url, cost)] and [(date, amount, credits)].
+    """
+    email = account["email"]
+    items = []
+    for i, (date, url, cost) in enumerate(account.get("usage-history", [])):
+        items.append({"email": email, "sk": f"{HISTORY_USAGE}#{date}#m{i:06d}", "date": date,
+                      "url": url, "credits": Decimal(str(cost))})
+    for i, (date, amount, credits) in enumerate(account.get("foundings-history", [])):
+        items.append({"email": email, "sk": f"{HISTORY_FOUNDING}#{date}#m{i:06d}", "date": date,
+                      "payed-amount": Decimal(str(amount)), "credits": Decimal(str(credits))})
+    return items
+
+
+def migrate_account(account: dict, dry_run: bool) -> int:
+    items = history_items(account)
+    if dry_run:
+        return len(items)
+    with get_dynamodb_history_table().batch_writer(overwrite_by_pkeys=["email", "sk"]) as batch:
+        for item in items:
+            batch.put_item(Item=item)
+    # the lists are only removed if no entry was appended meanwhile (former code still running)
+    get_dynamodb_id_table().update_item(
+        Key={"email": account["email"]},
+        UpdateExpression="REMOVE #uh, #fh",
+        ConditionExpression="(attribute_not_exists(#uh) OR size(#uh) = :usages) "
+                            "AND (attribute_not_exists(#fh) OR size(#fh) = :foundings)",
+        ExpressionAttributeNames={"#uh": "usage-history", "#fh": "foundings-history"},
+        ExpressionAttributeValues={":usages": len(account.get("usage-history", [])),
+                                   ":foundings": len(account.get("foundings-history", []))},
+    )
+    return len(items)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--create-table", action="store_true", help="create the history table and exit")
+    parser.add_argument("--dry-run", action="store_true", help="only count what would be migrated")
+    args = parser.parse_args()
+
+    if args.create_table:
+        create_history_table()
+        return
+
+    scan = {
+        "ProjectionExpression": "email, #uh, #fh",
+        "FilterExpression": "attribute_exists(#uh) OR attribute_exists(#fh)",
+        "ExpressionAttributeNames": {"#uh": "usage-history", "#fh": "foundings-history"},
+    }
+    accounts = migrated = failed = 0
+    while True:
+        response = get_dynamodb_id_table().scan(**scan)
+        for account in response.get("Items", []):
+            accounts += 1
+            try:
+                migrated += migrate_account(account, args.dry_run)
+            except Exception as e:
+                failed += 1
+                print(f"{account['email']} failed (run the migration again): {e}")
+        if "LastEvaluatedKey" not in response:
+            break
+        scan["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    action = "to migrate" if args.dry_run else "migrated"
+    print(f"{accounts} accounts, {migrated} history items {action}, {failed} accounts failed")
+
+
+if __name__ == "__main__":
+    main()
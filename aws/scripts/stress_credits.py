@@ -0,0 +1,84 @@
+"""
+Test de charge concurrent des crédits (use_credits / add_credits) sur un DynamoDB local :
+vérifie qu'aucun débit ni rechargement n'est perdu et que le solde ne devient jamais négatif.
+
+Usage (depuis le dossier aws/, DynamoDB local lancé par ex. avec
+`docker run -p 8000:8000 amazon/dynamodb-local`) :
+    DYNAMODB_ENDPOINT=http://localhost:8000 python -m scripts.stress_credits
+    DYNAMODB_ENDPOINT=http://localhost:8000 python -m scripts.stress_credits --threads 32 --debits 50 --credits 500
+"""
+
+import argparse
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from services.dynamodb import get_dynamodb_id_table, add_credits, use_credits, add_front_key, get_credits_left, \
+    get_account
+from scripts.migrate_history import create_history_table
+from utils.config import TECH_CONFIG
+from utils.exceptions import NotEnoughCreditException
+
+
+def ensure_table() -> None:
+    table = get_dynamodb_id_table()
+    client = table.meta.client
+    if table.name not in client.list_tables()["TableNames"]:
+        client.create_table(
+            TableName=table.name,
+            KeySchema=[{"AttributeName": "email", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "email", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        client.get_waiter("table_exists").wait(TableName=table.name)
+    create_history_table()
+
+
+def run(threads: int, debits: int, top_ups: int, initial_credits: int, top_up_credits: int) -> bool:
+    email = f"stress-{uuid.uuid4().hex[:8]}@example.com"
+    add_front_key(email, "stress-key", "stress")
+    add_credits(email, 0, initial_credits - get_credits_left(email))
+
+    def debit(_):
+        try:
+            use_credits(email, 1, "https://stress.example.com", front_key="stress-key")
+            return True
+        except NotEnoughCreditException:
+            return False
+
+    def top_up(_):
+        add_credits(email, 1, top_up_credits)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        debit_results = executor.map(debit, range(threads * debits))
+        top_up_results = executor.map(top_up, range(top_ups))
+        accepted = sum(debit_results)
+        list(top_up_results)
+
+    expected_left = initial_credits + top_ups * top_up_credits - accepted
+    account = get_account(email, ['credits-left', 'credits-used'])
+    credits_left, credits_used = account.credits_left(), account.credits_used()
+    print(f"{threads * debits} debits ({accepted} accepted, {threads * debits - accepted} refused), {top_ups} top-ups")
+    print(f"credits-left {credits_left} (expected {expected_left}), credits-used {credits_used} (expected {accepted})")
+    return credits_left == expected_left and credits_used == accepted and credits_left >= 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--debits", type=int, default=20, help="debits per thread")
+    parser.add_argument("--top-ups", type=int, default=20)
+    parser.add_argument("--credits", type=int, default=100, help="initial credits of the account")
+    parser.add_argument("--top-up-credits", type=int, default=5)
+    args = parser.parse_args()
+
+    if not TECH_CONFIG['dynamodb_endpoint']:
+        sys.exit("DYNAMODB_ENDPOINT must point to a local DynamoDB")
+    ensure_table()
+    ok = run(args.threads, args.debits, args.top_ups, args.credits, args.top_up_credits)
+    print("OK" if ok else "FAILED : credits lost or overspent")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Préchauffage du cache : traduit les transcripts des urls les plus demandées dans toutes les langues
+envoyées par l'extension (TRANSCRIPT_LANGUAGE_NAMES), pour que le premier utilisateur d'une langue n'attende pas la traduction.
+Les langues manquantes d'une url sont traduites ensemble (_translate_batch_with_chatgpt) et stockées en une écriture.
+
+Usage (depuis le dossier aws/) :
+    python -m scripts.warm_cache                          # popularité lue dans Redis (popularity:transcripts)
+    python -m scripts.warm_cache --logs business.log ...  # popularité calculée depuis les logs business (JSON)
+    python -m scripts.warm_cache --top 100 --budget 200 --dry-run
+"""
+
+import argparse
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from services.cache import (
+    get_popular_urls, get_cached_transcript_entry, is_transcript_expired, store_cached_design_transcripts
+)
+from services.llm import _translate_batch_with_chatgpt
+from utils.config import BUSINESS_CONFIG
+from utils.i18n import TRANSCRIPT_LANGUAGE_NAMES
+from utils.urls import canonicalize_url
+
+
+def load_popular_urls_from_logs(paths: list, top: int) -> list:
+    """
+    Counts the get_transcript requests per canonical url in business log files
+    (one JSON record per line, optionally prefixed by the CloudWatch timestamp).
+    """
+    counts = Counter()
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                start = line.find("{")
+                if start == -1:
+                    continue
+                try:
+                    record = json.loads(line[start:])
+                except ValueError:
+                    continue
+                if record.get("action") == "get_transcript" and record.get("url"):
+                    counts[canonicalize_url(record["url"])] += 1
+    return counts.most_common(top)
+
+
+def plan_translations(urls: list) -> (list, dict):
+    """
+    Returns the translations to make [(url, etag, source_lang, source_text, lang)]
+    and the number of urls skipped per reason.
+    """
+    languages = list(TRANSCRIPT_LANGUAGE_NAMES.values())
+    tasks = []
+    skipped = Counter()
+    for url, _ in urls:
+        entry = get_cached_transcript_entry(url)
+        if entry is None or not entry["transcripts"]:
+            skipped["not_cached"] += 1
+            continue
+        if is_transcript_expired(entry):
+            skipped["expired"] += 1
+            continue
+        missing = [lang for lang in languages if lang not in entry["transcripts"]]
+        if not missing:
+            skipped["complete"] += 1
+            continue
+        # translate from english when possible, the other translations were made from it
+        source_lang = TRANSCRIPT_LANGUAGE_NAMES['en'] if TRANSCRIPT_LANGUAGE_NAMES['en'] in entry["transcripts"] \
+            else next(iter(entry["transcripts"]))
+        source_text = entry["transcripts"][source_lang]
+        for lang in missing:
+            tasks.append((url, entry["etag"], source_lang, source_text, lang))
+    return tasks, skipped
+
+
+def group_translations(tasks: list) -> list:
+    """
+    Groups the translations of a same url : [(url, etag, source_lang, source_text, [lang, ...])].
+    """
+    groups = {}
+    for url, etag, source_lang, source_text, lang in tasks:
+        groups.setdefault((url, etag, source_lang, source_text), []).append(lang)
+    return [(*key, langs) for key, langs in groups.items()]
+
+
+def translate_and_store(url: str, etag: str, source_lang: str, source_text: str, langs: list) -> bool:
+    translations = _translate_batch_with_chatgpt(source_text, source_lang, langs, hedge=False)
+    # only added if the page has not been regenerated meanwhile
+    return store_cached_design_transcripts(url, etag, translations, if_etag_matches=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logs", nargs="+", help="business log files (JSON lines) instead of the Redis popularity stats")
+    parser.add_argument("--top", type=int, default=BUSINESS_CONFIG['warm_cache_top'], help="number of urls to warm")
+    parser.add_argument("--workers", type=int, default=BUSINESS_CONFIG['warm_cache_workers'],
+                        help="urls translated concurrently")
+    parser.add_argument("--budget", type=int, default=BUSINESS_CONFIG['warm_cache_budget'],
+                        help="max translations for this run")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would be translated")
+    args = parser.parse_args()
+
+    urls = load_popular_urls_from_logs(args.logs, args.top) if args.logs else get_popular_urls(args.top)
+    tasks, skipped = plan_translations(urls)
+    print(f"{len(urls)} urls, {len(tasks)} missing translations, skipped: {dict(skipped)}")
+    tasks = tasks[:args.budget]
+    if args.dry_run:
+        for url, _, source_lang, _, lang in tasks:
+            print(f"{url}: {source_lang} -> {lang}")
+        return
+
+    stored = obsolete = failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(translate_and_store, *group): group for group in group_translations(tasks)}
+        for future in as_completed(futures):
+            url, _, _, _, langs = futures[future]
+            try:
+                if future.result():
+                    stored += len(langs)
+                else:
+                    obsolete += len(langs)
+            except Exception as e:
+                failed += len(langs)
+                print(f"{url} ({', '.join(langs)}) failed: {e}")
+    print(f"{stored} translations stored, {obsolete} dropped (page regenerated), {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
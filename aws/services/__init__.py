@@ -1,26 +1,63 @@
 """
 Services de l'application de transcription de design.
+
+The services are imported on first access (PEP 562) : importing one of them
+(e.g. services.dynamodb from a handler) does not load openai, redis and boto3 for all the others.
 """
 
-from services.dynamodb import (
-    get_dynamodb_id_table, is_valid_front_key, add_front_key, remove_front_key,
-    add_credits, use_credits, get_usage_history, get_foundings_history,
-    get_usage_total, get_foundings_total, get_credits_left, get_credits_used,
-    get_credits_total, test_db
-)
+import importlib
+
+_EXPORTS = {
+    "services.dynamodb": [
+        "get_dynamodb_id_table", "is_valid_front_key", "add_front_key", "remove_front_key",
+        "add_credits", "use_credits", "get_usage_history", "get_foundings_history",
+        "get_usage_total", "get_foundings_total", "get_credits_left", "get_credits_used",
+        "get_credits_total", "AccountSnapshot", "get_account", "get_accounts",
+        "get_email_of_front_key",
+    ],
+    "services.llm": [
+        "_translate_with_chatgpt", "_translate_batch_with_chatgpt",
+        "generate_design_transcript", "stream_design_transcript",
+        "get_llm_client", "get_async_llm_client", "get_llm_connection_stats",
+    ],
+    "services.transcript": [
+        "get_design_transcript", "get_design_transcript_with_image", "stream_design_transcript_with_image",
+    ],
+    "services.transcript_async": ["get_design_transcript_async", "get_design_transcript_concurrently"],
+    "services.fingerprint": ["compute_image_fingerprint", "find_similar_transcripts", "get_fingerprint_stats"],
+    "services.cache": [
+        "get_cached_design_transcript", "lookup_cached_design_transcript", "create_cached_url_info",
+        "pop_cached_url_info", "store_cached_design_transcript", "store_cached_design_transcripts",
+        "create_email_validation_key", "get_email_validation_key", "get_memory_cache_stats",
+        "get_url_alias_counts", "get_popular_urls", "get_cached_transcript_entry",
+        "release_transcript_generation", "wait_for_cached_design_transcript",
+        "get_redis_client", "get_redis_binary_client", "get_async_redis_client", "get_async_redis_binary_client",
+        "lookup_cached_design_transcript_async",
+    ],
+    "services.hedging": ["get_hedging_stats", "hedged_call_async"],
+    "services.aio": ["run_sync", "run_blocking"],
+    "services.front_keys": ["check_front_key", "record_front_key", "get_front_key_cache_stats"],
+    "services.diagnostics": ["run_diagnostics"],
+    "services.llm_metrics": ["record_llm_call", "get_llm_stats"],
+    "services.rate_limit": ["check_rate_limits"],
+    "services.cache_admin": ["scan_cache_entries", "invalidate_cache_entries"],
+    "services.mails": ["send_registration_mail"],
+    "services.warmup": ["warm_up"],
+}
+
+_MODULE_OF = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_MODULE_OF)
 
-from services.llm import (_translate_with_chatgpt, generate_design_transcript)
 
-from services.transcript import (
-    get_design_transcript, get_design_transcript_with_image,
-)
+def __getattr__(name):
+    module = _MODULE_OF.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
 
-from services.cache import (
-    get_cached_design_transcript, create_cached_url_info,
-    pop_cached_url_info, store_cached_design_transcript,shouldBlockIP,
-    create_email_validation_key, get_email_validation_key
-)
 
-from services.mails import (
-    send_registration_mail
-)
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,53 @@
+"""
+Boucle asyncio des services, exécutée dans un thread dédié du conteneur : les clients async
+(Redis, LLM) lui sont liés, et les handlers synchrones lui soumettent leurs coroutines (run_sync).
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.config import TECH_CONFIG
+from utils.helpers import logger_tech
+
+
+# The loop lives as long as the container : the connection pools of the async clients
+# created on it are reused across invocations, as the sync ones are.
+_loop = None
+_loop_lock = threading.Lock()
+
+# Blocking calls (boto3, sync Redis scripts) awaited from the loop
+_blocking_executor = ThreadPoolExecutor(max_workers=TECH_CONFIG["async_blocking_workers"],
+                                        thread_name_prefix="aio-blocking")
+
+
+def get_service_loop() -> asyncio.AbstractEventLoop:
+    """
+    Returns the service loop, started on first use.
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="aio-loop", daemon=True).start()
+                logger_tech.debug("Service event loop started")
+                _loop = loop
+    return _loop
+
+
+def run_sync(coro, timeout: float = None):
+    """
+    Runs a coroutine on the service loop and returns its result (sync shim for the handlers).
+    Can be called from any thread but the loop's own.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_service_loop()).result(timeout)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Awaits a blocking call, run in the executor so that the loop keeps serving the other steps.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_blocking_executor, functools.partial(func, *args, **kwargs))
@@ -3,13 +3,21 @@ Fonctions de gestion du cache Redis.
 """
 
 import redis
+import redis.asyncio
 import json
-import hashlib
 import uuid
+import time
+import math
+import random
+import threading
+from collections import Counter
 
 from utils.config import TECH_CONFIG, BUSINESS_CONFIG
 from utils.auth import _get_keys
 from utils.helpers import logger_tech
+from utils.urls import canonicalize_url
+from utils.codec import encode_value, decode_value
+from services.memory_cache import LocalTTLCache
 
 
 # -----------------------------------------------------------------------------
@@ -18,163 +26,653 @@ from utils.helpers import logger_tech
 
 
 
-# Initialize Redis client
-try:
+def _create_redis_client(decode_responses: bool = True, client_class=redis.Redis) -> redis.Redis:
     # Configuration pour Upstash en production
     if TECH_CONFIG['redis_host'] != "localhost" and TECH_CONFIG['redis_host'] != "host.docker.internal":
-        redis_client = redis.Redis(
+        client = client_class(
             host=TECH_CONFIG['redis_host'],
             port=TECH_CONFIG['redis_port'],
             password=_get_keys()['REDIS_KEY'],
             ssl=True,
-            decode_responses=True
+            decode_responses=decode_responses
         )
         logger_tech.debug(f"Connected to Upstash Redis at {TECH_CONFIG['redis_host']}")
     # Configuration locale pour le développement
     else:
-        redis_client = redis.Redis(
+        client = client_class(
             host="127.0.0.1",
             port=TECH_CONFIG['redis_port'],
-            decode_responses=True
+            decode_responses=decode_responses
         )
         logger_tech.debug(f"Connected to local Redis at {TECH_CONFIG['redis_host']}")
-    
-    # Test de connexion
-    redis_client.ping()
+    return client
+
+
+# Redis clients, created on first use so that importing this module (and the
+# handlers that never touch Redis) does not fetch the secrets nor open a connection.
+# get_redis_client() : text values (decoded responses)
+# get_redis_binary_client() : transcripts, stored as encoded bytes (see utils/codec.py)
+_redis_clients = {}
+_redis_clients_lock = threading.Lock()
+
+
+def _get_client(decode_responses: bool) -> redis.Redis:
+    client = _redis_clients.get(decode_responses)
+    if client is None:
+        with _redis_clients_lock:
+            client = _redis_clients.get(decode_responses)
+            if client is None:
+                try:
+                    client = _create_redis_client(decode_responses=decode_responses)
+                except Exception as e:
+                    logger_tech.info(f"Failed to create Redis client: {str(e)}")
+                    raise e
+                _redis_clients[decode_responses] = client
+    return client
+
+
+def get_redis_client() -> redis.Redis:
+    return _get_client(decode_responses=True)
+
+
+def get_redis_binary_client() -> redis.Redis:
+    return _get_client(decode_responses=False)
+
+
+# Async clients (services/transcript_async.py), bound to the service loop (services/aio.py)
+_async_redis_clients = {}
+
+
+def _get_async_client(decode_responses: bool) -> redis.asyncio.Redis:
+    client = _async_redis_clients.get(decode_responses)
+    if client is None:
+        with _redis_clients_lock:
+            client = _async_redis_clients.get(decode_responses)
+            if client is None:
+                client = _create_redis_client(decode_responses=decode_responses, client_class=redis.asyncio.Redis)
+                _async_redis_clients[decode_responses] = client
+    return client
+
+
+def get_async_redis_client() -> redis.asyncio.Redis:
+    return _get_async_client(decode_responses=True)
+
+
+def get_async_redis_binary_client() -> redis.asyncio.Redis:
+    return _get_async_client(decode_responses=False)
+
+
+def ping_redis() -> None:
+    """
+    Opens the connection to Redis (connection test, used by the warm-up).
+    """
+    get_redis_client().ping()
     logger_tech.debug("Redis connection test successful")
-    
-except redis.ConnectionError as e:
-    logger_tech.info(f"Failed to connect to Redis: {str(e)}")
-    raise e
-except Exception as e:
-    logger_tech.info(f"Unexpected error while connecting to Redis: {str(e)}")
-    raise e
 
 
-def get_cached_design_transcript(url: str, lang: str, etag: str) -> list ( (str, str)):
+class LazyScript:
     """
-    Fetches the transcript in the specified language from ElastiCache (Redis).
-    If the page's etag has not changed,
-    uses the cache and translates to the specified language if needed.
-    The translations are then added to the cache.
+    Lua script registered on its client at the first call
+    (register_script only computes the sha, the script is loaded by the first EVALSHA).
     """
-    logger_tech.debug("Checking cached transcript...")
-    cache_key = f"transcript_cache:{url}"
-    cached_value = redis_client.get(cache_key)
 
-    if not cached_value:
-        logger_tech.debug("No cache entry found.")
-        return None
+    def __init__(self, source: str, binary: bool = False) -> None:
+        self.source = source
+        self.binary = binary
+        self._script = None
+
+    def __call__(self, keys=[], args=[], client=None):
+        if self._script is None:
+            self._script = _get_client(decode_responses=not self.binary).register_script(self.source)
+        return self._script(keys=keys, args=args, client=client)
+
+
+# Transcripts are stored as one hash per URL :
+#   transcript_cache:{url} -> { "etag": etag, "etag_at": timestamp, "gen_ms": generation time,
+#                               "lang:en": transcript, "lang:fr": transcript, ... }
+# so that a lookup only reads the etag and the requested language,
+# and a translation only writes its own field.
+# Language fields hold values encoded by utils/codec.py (compressed, versioned)
+# and are read with get_redis_binary_client().
+
+TRANSCRIPT_ETAG_FIELD = "etag"
+TRANSCRIPT_ETAG_AT_FIELD = "etag_at"  # date (epoch seconds) at which this etag was first stored
+TRANSCRIPT_GEN_MS_FIELD = "gen_ms"    # time (ms) taken to generate the transcript, used for early refresh
+TRANSCRIPT_LANG_FIELD_PREFIX = "lang:"
+
+# States of a cached transcript (see lookup_cached_design_transcript)
+TRANSCRIPT_FRESH = "fresh"
+TRANSCRIPT_REFRESH = "refresh"  # fresh, but elected for an early refresh
+TRANSCRIPT_STALE = "stale"      # obsolete (etag changed or too old), served while it is regenerated
+
+
+# In-process tier : url -> {"etag": etag, "etag_at": timestamp, "gen_ms": ms, "transcripts": {lang: transcript}}
+transcript_memory_cache = LocalTTLCache(
+    max_entries=BUSINESS_CONFIG['memory_cache_max_entries'],
+    max_bytes=BUSINESS_CONFIG['memory_cache_max_bytes'],
+    ttl=BUSINESS_CONFIG['memory_cache_ttl'],
+)
+
+
+def _remember_transcript(url: str, lang: str, etag: str, transcript: str,
+                         etag_at: int = None, gen_ms: int = None, reset: bool = False) -> None:
+    """
+    Adds a transcript to the in-process tier. A new etag (or a reset) replaces
+    every language previously kept for this url.
+    """
+    entry = transcript_memory_cache.peek(url)
+    transcripts = {}
+    if entry is not None and entry["etag"] == etag and not reset:
+        transcripts = dict(entry["transcripts"])
+        etag_at = entry["etag_at"] or etag_at
+        gen_ms = gen_ms or entry["gen_ms"]
+    transcripts[lang] = transcript
+    size = sum(len(text) for text in transcripts.values())
+    transcript_memory_cache.set(
+        url, {"etag": etag, "etag_at": etag_at, "gen_ms": gen_ms, "transcripts": transcripts}, size
+    )
+
+
+def get_memory_cache_stats() -> dict:
+    return transcript_memory_cache.stats()
+
+
+def _transcript_cache_key(url: str) -> str:
+    return f"transcript_cache:{url}"
+
 
+def _transcript_lang_field(lang: str) -> str:
+    return f"{TRANSCRIPT_LANG_FIELD_PREFIX}{lang}"
+
+
+def _is_wrong_type_error(e: Exception) -> bool:
+    return isinstance(e, redis.ResponseError) and "WRONGTYPE" in str(e)
+
+
+def _migrate_legacy_transcript_entry(cache_key: str) -> None:
+    """
+    Converts an entry stored with the former layout (a single JSON blob
+    {"etag": ..., "transcripts": [(lang, transcript), ...]}) into the hash layout,
+    keeping its remaining TTL.
+    """
+    legacy_value = get_redis_binary_client().get(cache_key)
+    if legacy_value is None:
+        return
+    ttl = get_redis_binary_client().ttl(cache_key)
     try:
-        cache_data = json.loads(cached_value)
-    except json.JSONDecodeError:
-        logger_tech.debug("Cache data is not valid JSON. Ignoring.")
-        return None
+        legacy_data = json.loads(legacy_value)
+    except ValueError:
+        logger_tech.debug("Legacy cache data is not valid JSON. Dropping it.")
+        get_redis_binary_client().delete(cache_key)
+        return
 
-    # Check ETag match 
-    #  # since cache is removed every 2 weeks we do not need to check lastmodifieddate
-    cached_etag = cache_data.get("etag")
-    transcripts = cache_data.get("transcripts", [])  # List of tuples (lang, transcript)
+    mapping = {TRANSCRIPT_ETAG_FIELD: legacy_data.get("etag") or ""}
+    for (trans_lang, trans_text) in legacy_data.get("transcripts", []):
+        mapping[_transcript_lang_field(trans_lang)] = encode_value(trans_text)
+
+    pipe = get_redis_binary_client().pipeline(transaction=True)
+    pipe.delete(cache_key)
+    pipe.hset(cache_key, mapping=mapping)
+    pipe.expire(cache_key, ttl if ttl and ttl > 0 else BUSINESS_CONFIG['transcript_cache_limit'])
+    pipe.execute()
+    logger_tech.debug(f"Migrated legacy transcript cache entry {cache_key}")
+
+
+def _read_all_transcripts(cache_key: str) -> list:
+    return _parse_transcript_fields(get_redis_binary_client().hgetall(cache_key))
+
+
+def _parse_transcript_fields(fields: dict) -> list:
+    transcripts = []
+    for field, value in fields.items():
+        field = field.decode("utf-8")
+        if field.startswith(TRANSCRIPT_LANG_FIELD_PREFIX):
+            transcripts.append((field[len(TRANSCRIPT_LANG_FIELD_PREFIX):], decode_value(value)))
+    return transcripts
+
+
+# Distinct raw URLs seen for each canonical URL (HyperLogLog)
+#   urlalias:{canonical_url} -> PFCOUNT = number of raw URLs collapsed onto it
+# _seen_url_aliases avoids re-sending the same (canonical, raw) pair from a warm container.
+_seen_url_aliases = LocalTTLCache(max_entries=5000, max_bytes=2*1024*1024, ttl=60*60)
+
+
+def _url_alias_key(canonical_url: str) -> str:
+    return f"urlalias:{canonical_url}"
+
+
+def _record_url_alias(pipe, raw_url: str, canonical_url: str) -> None:
+    pipe.pfadd(_url_alias_key(canonical_url), raw_url)
+    pipe.expire(_url_alias_key(canonical_url), BUSINESS_CONFIG['transcript_cache_limit'])
+    _seen_url_aliases.set((canonical_url, raw_url), True, len(raw_url))
+
+
+# Popularity of the transcripts (warming job, scripts/warm_cache.py)
+#   popularity:transcripts -> sorted set {canonical_url: number of requests}
+# Requests served from the memory tier are counted locally and sent with the
+# next Redis round trip, or after popularity_flush_interval seconds.
+POPULARITY_KEY = "popularity:transcripts"
+_pending_popularity = Counter()
+_popularity_lock = threading.Lock()
+_popularity_flushed_at = time.monotonic()
+
+
+def _count_transcript_request(url: str) -> bool:
+    """
+    Counts a request locally. Returns True when the pending counts should be flushed.
+    """
+    with _popularity_lock:
+        _pending_popularity[url] += 1
+        return time.monotonic() - _popularity_flushed_at >= BUSINESS_CONFIG['popularity_flush_interval']
+
+
+def _flush_transcript_requests(pipe) -> None:
+    global _popularity_flushed_at
+    with _popularity_lock:
+        pending = dict(_pending_popularity)
+        _pending_popularity.clear()
+        _popularity_flushed_at = time.monotonic()
+    for url, count in pending.items():
+        pipe.zincrby(POPULARITY_KEY, count, url)
+
+
+def get_popular_urls(top: int) -> list:
+    """
+    Returns the `top` most requested canonical URLs as [(url, requests), ...].
+    """
+    return [(url, int(score)) for url, score in get_redis_client().zrevrange(POPULARITY_KEY, 0, top - 1, withscores=True)]
+
+
+def get_url_alias_counts(urls: list) -> dict:
+    """
+    Returns, for each URL, the number of distinct raw URLs that were canonicalized onto it.
+    """
+    canonical_urls = [canonicalize_url(url) for url in urls]
+    pipe = get_redis_client().pipeline(transaction=False)
+    for canonical_url in canonical_urls:
+        pipe.pfcount(_url_alias_key(canonical_url))
+    return dict(zip(canonical_urls, pipe.execute()))
+
+
+def _is_expired(etag_at: int, now: float) -> bool:
+    return etag_at is not None and now - etag_at >= BUSINESS_CONFIG['transcript_cache_limit']
+
+
+def _should_refresh_early(etag_at: int, gen_ms: int, now: float) -> bool:
+    """
+    Probabilistic early expiration (XFetch) : the closer the entry is to its
+    expiry, the more likely a request is elected to regenerate it, so that
+    popular pages are refreshed before they expire.
+    """
+    if etag_at is None or BUSINESS_CONFIG['early_refresh_beta'] <= 0:
+        return False
+    delta = max((gen_ms or 0) / 1000, BUSINESS_CONFIG['early_refresh_min_delta'])
+    expires_at = etag_at + BUSINESS_CONFIG['transcript_cache_limit']
+    return now - delta * BUSINESS_CONFIG['early_refresh_beta'] * math.log(1 - random.random()) >= expires_at
 
-   
+
+def _to_int(value) -> int:
+    value = decode_value(value)
+    return int(value) if value else None
+
+
+# _transcript_from_fields : the requested language is missing, every cached language must be read
+_ALL_LANGUAGES = "all_languages"
+
+
+def _lookup_memory_tier(url: str, lang: str, etag: str, now: float) -> (list, str):
+    entry = transcript_memory_cache.get(url)
+    if entry is not None and (not etag or etag == entry["etag"]) and lang in entry["transcripts"] \
+            and not _is_expired(entry["etag_at"], now):
+        logger_tech.debug("Transcript found in memory cache.")
+        state = TRANSCRIPT_REFRESH if _should_refresh_early(entry["etag_at"], entry["gen_ms"], now) else TRANSCRIPT_FRESH
+        return ([(lang, entry["transcripts"][lang])], state)
+    return None
+
+
+def _queue_request_counters(pipe, raw_url: str, url: str, memory_hit: bool) -> bool:
+    """
+    Counts the request (popularity) and queues the alias and popularity updates on pipe.
+    A memory hit only sends them when the counts are due or the alias is new :
+    returns False when nothing was queued.
+    """
+    flush = _count_transcript_request(url)
+    if memory_hit and not flush and _seen_url_aliases.peek((url, raw_url)) is not None:
+        return False
+    _record_url_alias(pipe, raw_url, url)
+    _flush_transcript_requests(pipe)
+    return True
+
+
+def _lookup_fields(lang: str) -> list:
+    return [TRANSCRIPT_ETAG_FIELD, _transcript_lang_field(lang), TRANSCRIPT_ETAG_AT_FIELD, TRANSCRIPT_GEN_MS_FIELD]
+
+
+def _transcript_from_fields(url: str, lang: str, etag: str, cached_fields: list, now: float) -> (list, str):
+    """
+    Interprets the fields read by a lookup (see lookup_cached_design_transcript).
+    Returns (_ALL_LANGUAGES, TRANSCRIPT_FRESH) when the requested language is missing from a valid entry.
+    """
+    cached_etag = decode_value(cached_fields[0])
+    cached_transcript = decode_value(cached_fields[1])
+    etag_at = _to_int(cached_fields[2])
+    gen_ms = _to_int(cached_fields[3])
+
+    if cached_etag is None:
+        logger_tech.debug("No cache entry found.")
+        return (None, None)
+
+    # Check ETag match 
+    # entries written before etag_at existed are only limited by their TTL
     if (etag) :
         match = (etag == cached_etag) 
         logger_tech.debug("Checking cache for ETag : " + str(match))
     else:
         match = True 
-    if match:
-        logger_tech.debug("Cache is valid. Checking for language availability.")
-        return transcripts
+    if not match or _is_expired(etag_at, now):
+        if cached_transcript is not None and BUSINESS_CONFIG['serve_stale']:
+            logger_tech.debug("Cache is obsolete. Serving stale transcript.")
+            return ([(lang, cached_transcript)], TRANSCRIPT_STALE)
+        logger_tech.debug("Cache is present but does not meet criteria or no suitable transcript found.")
+        return (None, None)
+
+    logger_tech.debug("Cache is valid. Checking for language availability.")
+    if cached_transcript is not None:
+        _remember_transcript(url, lang, cached_etag, cached_transcript, etag_at, gen_ms)
+        state = TRANSCRIPT_REFRESH if _should_refresh_early(etag_at, gen_ms, now) else TRANSCRIPT_FRESH
+        return ([(lang, cached_transcript)], state)
+    # requested language missing : return the other languages as translation sources
+    return (_ALL_LANGUAGES, TRANSCRIPT_FRESH)
+
+
+def lookup_cached_design_transcript(url: str, lang: str, etag: str) -> (list, str):
+    """
+    Fetches the transcript in the specified language from ElastiCache (Redis).
+    Returns (transcripts, state) :
+      - the page's etag has not changed and the entry is not older than transcript_cache_limit :
+        state is TRANSCRIPT_FRESH (or TRANSCRIPT_REFRESH when elected for an early refresh),
+        transcripts is [(lang, transcript)] when the requested language is cached,
+        otherwise every cached language so that the caller can translate one of them.
+      - the entry is obsolete but holds the requested language and serve_stale is on :
+        ([(lang, transcript)], TRANSCRIPT_STALE).
+      - otherwise (None, None).
+    The url is canonicalized first (see utils.urls).
+    """
+    logger_tech.debug("Checking cached transcript...")
+    raw_url = url
+    url = canonicalize_url(raw_url)
+    now = time.time()
+    cached = _lookup_memory_tier(url, lang, etag, now)
+    if cached is not None:
+        pipe = get_redis_client().pipeline(transaction=False)
+        if _queue_request_counters(pipe, raw_url, url, memory_hit=True):
+            pipe.execute()
+        return cached
+
+    cache_key = _transcript_cache_key(url)
+    fields = _lookup_fields(lang)
+    pipe = get_redis_binary_client().pipeline(transaction=False)
+    pipe.hmget(cache_key, fields)
+    _queue_request_counters(pipe, raw_url, url, memory_hit=False)
+    cached_fields = pipe.execute(raise_on_error=False)[0]
+    if isinstance(cached_fields, Exception):
+        if not _is_wrong_type_error(cached_fields):
+            raise cached_fields
+        _migrate_legacy_transcript_entry(cache_key)
+        cached_fields = get_redis_binary_client().hmget(cache_key, fields)
+
+    transcripts, state = _transcript_from_fields(url, lang, etag, cached_fields, now)
+    if transcripts is _ALL_LANGUAGES:
+        transcripts = _read_all_transcripts(cache_key)
+    return (transcripts, state)
+
+
+async def lookup_cached_design_transcript_async(url: str, lang: str, etag: str) -> (list, str):
+    """
+    Same as lookup_cached_design_transcript, with the async Redis clients.
+    """
+    from services.aio import run_blocking
+
+    logger_tech.debug("Checking cached transcript...")
+    raw_url = url
+    url = canonicalize_url(raw_url)
+    now = time.time()
+    cached = _lookup_memory_tier(url, lang, etag, now)
+    if cached is not None:
+        pipe = get_async_redis_client().pipeline(transaction=False)
+        if _queue_request_counters(pipe, raw_url, url, memory_hit=True):
+            await pipe.execute()
+        return cached
+
+    cache_key = _transcript_cache_key(url)
+    fields = _lookup_fields(lang)
+    pipe = get_async_redis_binary_client().pipeline(transaction=False)
+    pipe.hmget(cache_key, fields)
+    _queue_request_counters(pipe, raw_url, url, memory_hit=False)
+    cached_fields = (await pipe.execute(raise_on_error=False))[0]
+    if isinstance(cached_fields, Exception):
+        if not _is_wrong_type_error(cached_fields):
+            raise cached_fields
+        await run_blocking(_migrate_legacy_transcript_entry, cache_key)
+        cached_fields = await get_async_redis_binary_client().hmget(cache_key, fields)
+
+    transcripts, state = _transcript_from_fields(url, lang, etag, cached_fields, now)
+    if transcripts is _ALL_LANGUAGES:
+        transcripts = _parse_transcript_fields(await get_async_redis_binary_client().hgetall(cache_key))
+    return (transcripts, state)
+
+
+def get_cached_design_transcript(url: str, lang: str, etag: str) -> list ( (str, str)):
+    """
+    Same as lookup_cached_design_transcript, without stale entries :
+    returns the valid cached transcripts or None.
+    """
+    transcripts, state = lookup_cached_design_transcript(url, lang, etag)
+    if state == TRANSCRIPT_STALE:
+        return None
+    return transcripts
 
-    logger_tech.debug("Cache is present but does not meet criteria or no suitable transcript found.")
-    return None
 
+# Single-flight : only one caller generates the transcript of an (url, etag).
+#   transcript_lock:{url}:{etag} -> txid of the caller in charge (expires after singleflight_lock_ttl)
+# The lock and the url info of the elected caller are written by one script,
+# the other callers wait for the transcript (polling) or get a "pending" answer.
+_ACQUIRE_GENERATION_SCRIPT = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    redis.call('SET', KEYS[2], ARGV[3], 'EX', ARGV[4])
+    return 1
+end
+return 0
+"""
+_acquire_generation_script = LazyScript(_ACQUIRE_GENERATION_SCRIPT)
+
+# Deletes the lock only if it still belongs to the given txid
+_RELEASE_GENERATION_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+_release_generation_script = LazyScript(_RELEASE_GENERATION_SCRIPT)
 
-def create_cached_url_info(url: str, lang: str, etag: str) -> str:
+
+def _generation_lock_key(url: str, etag: str) -> str:
+    return f"transcript_lock:{url}:{etag or ''}"
+
+
+def create_cached_url_info(url: str, lang: str, etag: str, refresh: bool = False) -> str:
+    """
+    Elects the caller to generate the transcript of (url, etag) and stores what
+    /image-transcript will need under a new txid. `refresh` marks the regeneration
+    of a stale (or early refreshed) transcript.
+    Returns the txid, or None if another caller is already generating it.
+    """
     logger_tech.debug("Storing url info in cache.")
+    url = canonicalize_url(url)
     #generate unique id
-    url_md5 = hashlib.md5(url.encode()).hexdigest()
-    short_id = url_md5 #[:8]
+    short_id = uuid.uuid4().hex
     cache_key = f"urlinfo_cache:{short_id}"
     cache_value = {
         "url": url,
         "lang":lang,
         "etag": etag,
+        "refresh": refresh,
     }
-    redis_client.set(cache_key, json.dumps(cache_value), ex=BUSINESS_CONFIG['id_cache_limit'])
+    elected = _acquire_generation_script(
+        keys=[_generation_lock_key(url, etag), cache_key],
+        args=[short_id, BUSINESS_CONFIG['singleflight_lock_ttl'],
+              json.dumps(cache_value), BUSINESS_CONFIG['id_cache_limit']],
+    )
+    if not elected:
+        logger_tech.debug("Transcript generation already in progress.")
+        return None
     return short_id
 
-def pop_cached_url_info(short_id: str) -> str:
+
+def release_transcript_generation(url: str, etag: str, short_id: str) -> None:
+    _release_generation_script(keys=[_generation_lock_key(canonicalize_url(url), etag)], args=[short_id])
+
+
+def wait_for_cached_design_transcript(url: str, lang: str, etag: str, timeout: float) -> list:
+    """
+    Polls the cache while another caller generates the transcript of (url, etag).
+    Returns the cached transcripts as get_cached_design_transcript does, or None
+    on timeout or if the generation was abandoned (lock released without transcript).
+    """
+    url = canonicalize_url(url)
+    cache_key = _transcript_cache_key(url)
+    lock_key = _generation_lock_key(url, etag)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(BUSINESS_CONFIG['singleflight_poll_interval'])
+        pipe = get_redis_binary_client().pipeline(transaction=False)
+        pipe.hget(cache_key, TRANSCRIPT_ETAG_FIELD)
+        pipe.exists(lock_key)
+        cached_etag, locked = pipe.execute(raise_on_error=False)
+        if not isinstance(cached_etag, Exception) and cached_etag is not None \
+                and (not etag or decode_value(cached_etag) == etag):
+            return get_cached_design_transcript(url, lang, etag)
+        if not locked:
+            return None
+    return None
+
+
+def pop_cached_url_info(short_id: str) -> dict:
     logger_tech.debug("Popping url info from cache.")
     cache_key = f"urlinfo_cache:{short_id}"
-    cache_value = redis_client.get(cache_key)
+    cache_value = get_redis_client().get(cache_key)
     if cache_value is None:
         return None
-    redis_client.delete(cache_key)
-    return json.loads(cache_value)
+    get_redis_client().delete(cache_key)
+    cache_value = json.loads(cache_value)
+    cache_value["txid"] = short_id
+    return cache_value
 
 
-def store_cached_design_transcript(url: str, lang: str, etag: str, transcript: str) -> None:
+# Writes language fields. If the stored etag differs (or on a reset), the previous
+# transcripts are obsolete and the hash is reset (with a new etag_at) before writing.
+# ARGV : etag field, etag, etag_at field, now, ttl,
+#        mode ("0" write, "1" reset, "2" write only if the stored etag is the same),
+#        then the field/value pairs to write (lang:xx, gen_ms).
+# Returns 1 when written, 0 when skipped (mode "2"), -1 when the key still holds a legacy JSON blob.
+_STORE_TRANSCRIPT_SCRIPT = """
+local key_type = redis.call('TYPE', KEYS[1])['ok']
+if key_type ~= 'hash' and key_type ~= 'none' then
+    return -1
+end
+local same_etag = redis.call('HGET', KEYS[1], ARGV[1]) == ARGV[2]
+if ARGV[6] == '2' and not same_etag then
+    return 0
+end
+if ARGV[6] == '1' or not same_etag then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2], ARGV[3], ARGV[4])
+end
+for i = 7, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+_store_transcript_script = LazyScript(_STORE_TRANSCRIPT_SCRIPT, binary=True)
+
+
+def store_cached_design_transcript(url: str, lang: str, etag: str, transcript: str,
+                                   generation_ms: int = None, reset: bool = False,
+                                   if_etag_matches: bool = False) -> bool:
+    """
+    Stores a transcript. `generation_ms` is the time taken to generate it (early refresh),
+    `reset` drops the other languages even if the etag did not change (regenerated transcript),
+    `if_etag_matches` only adds the language to an entry that still has this etag (background jobs).
+    The entry is kept transcript_stale_grace seconds after it becomes obsolete,
+    to be served while it is regenerated.
+    Returns False if nothing was written.
+    """
+    return store_cached_design_transcripts(url, etag, {lang: transcript}, generation_ms, reset, if_etag_matches)
+
+
+def store_cached_design_transcripts(url: str, etag: str, transcripts: dict,
+                                    generation_ms: int = None, reset: bool = False,
+                                    if_etag_matches: bool = False) -> bool:
+    """
+    Stores the transcripts of several languages {lang: transcript} in one atomic write,
+    with the options of store_cached_design_transcript.
+    Returns False if nothing was written.
+    """
     logger_tech.debug("Storing transcript in cache.")
-    cache_key = f"transcript_cache:{url}"
-    
-    # Check if an entry already exists
-    existing_cache = redis_client.get(cache_key)
-    if existing_cache:
-        existing_value = json.loads(existing_cache)
-        # If same etag, update the transcripts list
-        if existing_value.get("etag") == etag:
-            # Check if this language already exists in the transcripts
-            transcripts = existing_value.get("transcripts", [])
-            for i, (existing_lang, _) in enumerate(transcripts):
-                if existing_lang == lang:
-                    # Replace existing language entry
-                    transcripts[i] = (lang, transcript)
-                    break
-            else:
-                # Language not found, append it
-                transcripts.append((lang, transcript))
-            
-            # Update cache with modified transcripts
-            existing_value["transcripts"] = transcripts
-            redis_client.set(cache_key, json.dumps(existing_value), ex=BUSINESS_CONFIG['transcript_cache_limit'])
-            return
-    
-    # No existing cache or different etag, create new entry
-    cache_value = {
-        "etag": etag,
-        "transcripts": [
-            (lang, transcript)
-        ]
-    }
-    redis_client.set(cache_key, json.dumps(cache_value), ex=BUSINESS_CONFIG['transcript_cache_limit'])
+    url = canonicalize_url(url)
+    cache_key = _transcript_cache_key(url)
+    now = int(time.time())
+    mode = "1" if reset else "2" if if_etag_matches else "0"
+    args = [
+        TRANSCRIPT_ETAG_FIELD, etag or "",
+        TRANSCRIPT_ETAG_AT_FIELD, now,
+        BUSINESS_CONFIG['transcript_cache_limit'] + BUSINESS_CONFIG['transcript_stale_grace'],
+        mode,
+    ]
+    for lang, transcript in transcripts.items():
+        args += [_transcript_lang_field(lang), encode_value(transcript)]
+    if generation_ms is not None:
+        args += [TRANSCRIPT_GEN_MS_FIELD, int(generation_ms)]
+    written = _store_transcript_script(keys=[cache_key], args=args)
+    if written == -1:
+        _migrate_legacy_transcript_entry(cache_key)
+        written = _store_transcript_script(keys=[cache_key], args=args)
+    if written != 1:
+        return False
+    for i, (lang, transcript) in enumerate(transcripts.items()):
+        _remember_transcript(url, lang, etag or "", transcript, now, generation_ms, reset and i == 0)
+    return True
 
-# -----------------------------------------------------------------------------
-# Rate Limiting Functions
-# -----------------------------------------------------------------------------
 
-def shouldBlockIP(ip: str) -> bool:
-    """
-    Vérifie si une IP peut faire une requête.
-    - Si l'IP n'est pas dans le cache, l'ajoute avec TTL=60s et retourne True
-    - Si l'IP est dans le cache, change le TTL à 120s et retourne False
-    """
-    cache_key = f"iplog:{ip}"
-    
-    # Vérifie si l'IP est dans le cache
-    if redis_client.exists(cache_key):
-        # IP trouvée, on étend le TTL à 120s
-        # verifie la durée restante
-        time = redis_client.ttl(cache_key)
-        redis_client.expire(cache_key, time*2)
-        if (time > 100) : 
-            return True
-    else:
-        # Nouvelle IP, on l'ajoute avec TTL=60s
-        redis_client.set(cache_key, "1", ex=30)
-    return False
+def get_cached_transcript_entry(url: str) -> dict:
+    """
+    Returns the whole cache entry of an url :
+    {"etag": etag, "etag_at": timestamp, "transcripts": {lang: transcript}}, or None.
+    """
+    cache_key = _transcript_cache_key(canonicalize_url(url))
+    try:
+        fields = get_redis_binary_client().hgetall(cache_key)
+    except redis.ResponseError as e:
+        if not _is_wrong_type_error(e):
+            raise
+        _migrate_legacy_transcript_entry(cache_key)
+        fields = get_redis_binary_client().hgetall(cache_key)
+    if not fields:
+        return None
+    fields = {field.decode("utf-8"): value for field, value in fields.items()}
+    return {
+        "etag": decode_value(fields.get(TRANSCRIPT_ETAG_FIELD)),
+        "etag_at": _to_int(fields.get(TRANSCRIPT_ETAG_AT_FIELD)),
+        "transcripts": {
+            field[len(TRANSCRIPT_LANG_FIELD_PREFIX):]: decode_value(value)
+            for field, value in fields.items() if field.startswith(TRANSCRIPT_LANG_FIELD_PREFIX)
+        },
+    }
+
 
+def is_transcript_expired(entry: dict) -> bool:
+    return _is_expired(entry["etag_at"], time.time())
 
 """"
 Email registration validation key cache
@@ -190,15 +688,15 @@ def create_email_validation_key( email: str, key:str, tool:str) -> str:
         "key":key,
         "tool": tool,
     }
-    redis_client.set(cache_key, json.dumps(cache_value), ex=BUSINESS_CONFIG['email_validation_limit'])
+    get_redis_client().set(cache_key, json.dumps(cache_value), ex=BUSINESS_CONFIG['email_validation_limit'])
     return short_id
 
 def get_email_validation_key(validation_key: str) -> str:
     logger_tech.debug("Popping url info from cache.")
     cache_key = f"email_validation_key:{validation_key}"
-    cache_value = redis_client.get(cache_key)
+    cache_value = get_redis_client().get(cache_key)
     if cache_value is None:
        return None
     # on efface pas le cache pour si la validation est utilisé plusieurs fois ainsi on ne renvoie pas une erreur pour rien - le cache s’efface après 24h
-    #redis_client.delete(cache_key)
+    #get_redis_client().delete(cache_key)
     return json.loads(cache_value)
\ No newline at end of file
@@ -0,0 +1,242 @@
+"""
+Fonctions d'inspection et d'administration du cache Redis.
+"""
+
+import time
+from urllib.parse import urlparse
+
+from services.cache import (
+    get_redis_client, get_redis_binary_client, transcript_memory_cache, TRANSCRIPT_ETAG_AT_FIELD
+)
+from services.fingerprint import FINGERPRINT_PREFIX, FINGERPRINT_BAND_PREFIX
+from utils.config import BUSINESS_CONFIG
+from utils.helpers import logger_tech
+from utils.urls import canonicalize_host, canonicalize_url_prefix, url_domain
+from utils.codec import decode_value
+
+
+# Préfixes des clés utilisées par l'application
+CACHE_NAMESPACES = [
+    "transcript_cache:",
+    "urlinfo_cache:",
+    "iplog:",
+    "ratelimit:",
+    "email_validation_key:",
+    "urlalias:",
+    "transcript_lock:",
+    "phash:",
+    "phash_band:",
+    "metrics:",
+    "popularity:",
+    "front_key:",
+]
+
+SCAN_MAX_COUNT = 1000
+
+TRANSCRIPT_NAMESPACE = "transcript_cache:"
+
+
+def _escape_pattern(prefix: str) -> str:
+    """
+    Escapes the glob special characters of a key prefix for SCAN MATCH.
+    """
+    for char in "\\*?[]":
+        prefix = prefix.replace(char, "\\" + char)
+    return prefix
+
+
+def is_known_prefix(prefix: str) -> bool:
+    return any(prefix.startswith(namespace) for namespace in CACHE_NAMESPACES)
+
+
+def scan_cache_entries(prefix: str = None, cursor: int = 0, count: int = 100, with_values: bool = True) -> dict:
+    """
+    Returns one page of cache entries whose key starts with `prefix`.
+    Every entry gives its type, TTL and size (MEMORY USAGE), plus its value when
+    `with_values` is set. Iteration goes on with the returned `next_cursor`
+    until it is 0.
+    """
+    count = max(1, min(int(count), SCAN_MAX_COUNT))
+    match = f"{_escape_pattern(prefix)}*" if prefix else "*"
+    next_cursor, keys = get_redis_client().scan(cursor=int(cursor), match=match, count=count)
+    logger_tech.debug(f"Cache scan {match} from cursor {cursor} : {len(keys)} keys")
+
+    transcript_keys = [key for key in keys if key.startswith(TRANSCRIPT_NAMESPACE)]
+    pipe = get_redis_client().pipeline(transaction=False)
+    for key in keys:
+        pipe.type(key)
+        pipe.ttl(key)
+        pipe.memory_usage(key)
+    for key in transcript_keys:
+        # number of raw URLs canonicalized onto this transcript
+        pipe.pfcount(f"urlalias:{key[len(TRANSCRIPT_NAMESPACE):]}")
+    metadata = pipe.execute(raise_on_error=False)
+    aliases = dict(zip(transcript_keys, metadata[3 * len(keys):]))
+
+    entries = []
+    for i, key in enumerate(keys):
+        key_type, ttl, size = metadata[3 * i: 3 * i + 3]
+        entry = {
+            "key": key,
+            "type": key_type,
+            "ttl": ttl,
+            "size": None if isinstance(size, Exception) else size,
+        }
+        if key in aliases:
+            entry["url_aliases"] = None if isinstance(aliases[key], Exception) else aliases[key]
+        entries.append(entry)
+
+    if with_values and entries:
+        # HyperLogLog values (urlalias:) are binary, their count is what matters
+        string_entries = [entry for entry in entries
+                          if entry["type"] == "string" and not entry["key"].startswith("urlalias:")]
+        hash_entries = [entry for entry in entries if entry["type"] == "hash"]
+        # values are read raw : transcripts are encoded by utils/codec.py
+        pipe = get_redis_binary_client().pipeline(transaction=False)
+        if string_entries:
+            pipe.mget([entry["key"] for entry in string_entries])
+        for entry in hash_entries:
+            pipe.hgetall(entry["key"])
+        results = pipe.execute(raise_on_error=False)
+        if string_entries:
+            values = results.pop(0)
+            if isinstance(values, Exception):
+                values = [None] * len(string_entries)
+            for entry, value in zip(string_entries, values):
+                entry["value"] = decode_value(value)
+        for entry, value in zip(hash_entries, results):
+            if isinstance(value, Exception):
+                entry["value"] = None
+            else:
+                entry["value"] = {field.decode("utf-8"): decode_value(field_value)
+                                  for field, field_value in value.items()}
+
+    return {
+        "next_cursor": next_cursor,
+        "count": len(entries),
+        "entries": entries,
+    }
+
+
+def _matches_domain(cache_key: str, domain: str) -> bool:
+    host = urlparse(cache_key[len(TRANSCRIPT_NAMESPACE):]).hostname or ""
+    return host == domain or host.endswith("." + domain)
+
+
+def _filter_older_than(keys: list, older_than: int) -> list:
+    """
+    Keeps the transcript keys whose etag was stored more than `older_than` seconds ago.
+    Entries without etag_at (former layout) are dated from their remaining TTL.
+    """
+    pipe = get_redis_client().pipeline(transaction=False)
+    for key in keys:
+        pipe.hget(key, TRANSCRIPT_ETAG_AT_FIELD)
+        pipe.ttl(key)
+    results = pipe.execute(raise_on_error=False)
+    now = int(time.time())
+    selected = []
+    for i, key in enumerate(keys):
+        etag_at, ttl = results[2 * i: 2 * i + 2]
+        if not isinstance(etag_at, Exception) and etag_at is not None:
+            age = now - int(etag_at)
+        elif isinstance(ttl, int) and ttl >= 0:
+            age = BUSINESS_CONFIG['transcript_cache_limit'] - ttl
+        else:
+            continue
+        if age >= older_than:
+            selected.append(key)
+    return selected
+
+
+def _fingerprint_patterns(url_prefix: str = None, domain: str = None) -> list:
+    """
+    SCAN patterns of the screenshot fingerprints (services/fingerprint.py) of a domain and its
+    subdomains, or of the host of an URL prefix : the fingerprints are indexed per domain,
+    so an URL prefix selects every fingerprint of its host.
+    """
+    if domain:
+        hosts = [f"{_escape_pattern(domain)}:", f"*.{_escape_pattern(domain)}:"]
+    else:
+        host = url_domain(url_prefix)
+        if not host:
+            return []
+        has_path = "/" in url_prefix.split("://", 1)[-1]
+        # a prefix without path may end in the middle of the host ("https://foo.co")
+        hosts = [f"{_escape_pattern(host)}:" if has_path else _escape_pattern(host)]
+    return [f"{prefix}{host}*" for prefix in (FINGERPRINT_PREFIX, FINGERPRINT_BAND_PREFIX) for host in hosts]
+
+
+def _invalidate_fingerprints(patterns: list, batch_size: int) -> int:
+    deleted = 0
+    for match in patterns:
+        cursor = 0
+        while True:
+            cursor, keys = get_redis_client().scan(cursor=cursor, match=match, count=batch_size)
+            if keys:
+                deleted += get_redis_client().unlink(*keys)
+            if cursor == 0:
+                break
+    return deleted
+
+
+def invalidate_cache_entries(namespace: str = None, url_prefix: str = None, domain: str = None,
+                             older_than: int = None, cursor: int = 0,
+                             batch_size: int = 500, max_keys: int = 20000) -> dict:
+    """
+    Deletes the cache entries selected by one namespace (key prefix), an URL prefix,
+    a domain (and its subdomains) or an etag age in seconds - the last three only
+    apply to transcripts and can be combined.
+    Keys are iterated with SCAN and deleted with UNLINK, one pipeline per batch, so
+    Redis is never blocked. At most `max_keys` keys are scanned per call : when the
+    returned `next_cursor` is not 0, call again with it to resume.
+    With an URL prefix or a domain, the screenshot fingerprints of the selected hosts are
+    deleted too (on the first call), otherwise they would bring the purged transcripts back.
+    """
+    if domain:
+        domain = canonicalize_host(domain)
+    if url_prefix:
+        # transcript keys are canonical URLs (utils/urls.py)
+        url_prefix = canonicalize_url_prefix(url_prefix)
+    if namespace:
+        match = f"{_escape_pattern(namespace)}*"
+    elif url_prefix:
+        match = f"{TRANSCRIPT_NAMESPACE}{_escape_pattern(url_prefix)}*"
+    elif domain or older_than is not None:
+        match = f"{TRANSCRIPT_NAMESPACE}*"
+    else:
+        raise ValueError("A namespace, url_prefix, domain or older_than is required")
+
+    cursor = int(cursor)
+    scanned = 0
+    deleted = 0
+    batches = 0
+    fingerprints_deleted = 0
+    if not namespace and (url_prefix or domain) and cursor == 0:
+        fingerprints_deleted = _invalidate_fingerprints(_fingerprint_patterns(url_prefix, domain), batch_size)
+    while True:
+        cursor, keys = get_redis_client().scan(cursor=cursor, match=match, count=batch_size)
+        scanned += len(keys)
+        if domain:
+            keys = [key for key in keys if _matches_domain(key, domain)]
+        if older_than is not None and keys:
+            keys = _filter_older_than(keys, int(older_than))
+        if keys:
+            pipe = get_redis_client().pipeline(transaction=False)
+            for start in range(0, len(keys), batch_size):
+                pipe.unlink(*keys[start:start + batch_size])
+            deleted += sum(pipe.execute())
+            batches += 1
+            for key in keys:
+                if key.startswith(TRANSCRIPT_NAMESPACE):
+                    transcript_memory_cache.invalidate(key[len(TRANSCRIPT_NAMESPACE):])
+        if cursor == 0 or scanned >= max_keys:
+            break
+
+    logger_tech.info(f"Cache invalidation {match} : {scanned} scanned, {deleted} deleted, next cursor {cursor}")
+    return {
+        "next_cursor": cursor,
+        "scanned": scanned,
+        "deleted": deleted,
+        "batches": batches,
+        "fingerprints_deleted": fingerprints_deleted,
+    }
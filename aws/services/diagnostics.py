@@ -0,0 +1,90 @@
+"""
+Diagnostic des dépendances (DynamoDB, Redis, Secrets Manager) en dehors du chemin des requêtes :
+chaque dépendance est appelée plusieurs fois en lecture seule, et ses latences sont résumées en percentiles.
+"""
+
+import time
+
+from utils.helpers import logger_tech
+
+
+# Account read by the DynamoDB probe (need not exist : the read is what is measured)
+DIAGNOSTICS_EMAIL = "diagnostics@design-emotion.invalid"
+
+
+def _probe_dynamodb() -> None:
+    from services.dynamodb import get_dynamodb_id_table
+    get_dynamodb_id_table().get_item(Key={'email': DIAGNOSTICS_EMAIL}, ProjectionExpression='email')
+
+
+def _probe_dynamodb_history() -> None:
+    from services.dynamodb import get_usage_history
+    get_usage_history(DIAGNOSTICS_EMAIL, limit=1)
+
+
+def _probe_redis() -> None:
+    from services.cache import get_redis_client
+    get_redis_client().ping()
+
+
+def _probe_secrets() -> None:
+    from utils.auth import _fetch_secret
+    _fetch_secret()
+
+
+DIAGNOSTICS_PROBES = {
+    "dynamodb": _probe_dynamodb,
+    "dynamodb_history": _probe_dynamodb_history,
+    "redis": _probe_redis,
+    "secrets": _probe_secrets,
+}
+
+# Probed once per run whatever `rounds` : each GetSecretValue call is billed
+# (and the handlers read the secret once per container anyway)
+DIAGNOSTICS_SINGLE_ROUND = {"secrets"}
+
+
+def _percentile(sorted_values: list, percentile: float) -> float:
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))
+    return round(sorted_values[index], 1)
+
+
+def _run_probe(probe, rounds: int) -> dict:
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        try:
+            probe()
+        except Exception as e:
+            # only the exception type is reported : the message may hold hosts, table names or account ids
+            logger_tech.warning(f"Diagnostics probe failed: {e}")
+            return {"ok": False, "error": type(e).__name__, "rounds": len(timings)}
+        timings.append((time.perf_counter() - start) * 1000)
+    # the first call includes the connection (and client creation on a cold container)
+    first_ms = timings[0]
+    timings.sort()
+    return {
+        "ok": True,
+        "rounds": rounds,
+        "first_ms": round(first_ms, 1),
+        "p50_ms": _percentile(timings, 50),
+        "p95_ms": _percentile(timings, 95),
+        "p99_ms": _percentile(timings, 99),
+        "max_ms": round(timings[-1], 1),
+    }
+
+
+def run_diagnostics(dependencies: list = None, rounds: int = 5) -> dict:
+    """
+    Calls each dependency (keys of DIAGNOSTICS_PROBES, all by default) `rounds` times
+    (once for DIAGNOSTICS_SINGLE_ROUND).
+    Returns {"ok": all dependencies answered, "dependencies": {name: {"ok", latencies in ms or "error"}}}.
+    """
+    unknown = [name for name in dependencies or [] if name not in DIAGNOSTICS_PROBES]
+    if unknown:
+        raise ValueError(f"Unknown dependencies {unknown}, expected some of {list(DIAGNOSTICS_PROBES)}")
+    results = {
+        name: _run_probe(DIAGNOSTICS_PROBES[name], 1 if name in DIAGNOSTICS_SINGLE_ROUND else rounds)
+        for name in dependencies or DIAGNOSTICS_PROBES
+    }
+    return {"ok": all(result["ok"] for result in results.values()), "dependencies": results}
@@ -2,13 +2,13 @@
 Fonctions DynamoDB pour l'application.
 """
 
-import boto3
+import time
+import uuid
 from decimal import Decimal
-from boto3.dynamodb.conditions import Key
 
-from utils.config import TECH_CONFIG
+from utils.config import TECH_CONFIG, BUSINESS_CONFIG
 from utils.helpers import get_current_date, logger_tech 
-from utils.exceptions import NotEnoughCreditException, InvalidEmailValidationKeyException
+from utils.exceptions import NotEnoughCreditException, InvalidFrontKeyException, InvalidEmailValidationKeyException
 
 # -----------------------------------------------------------------------------
 # DynamoDB Functions 
@@ -20,11 +20,9 @@ from utils.exceptions import NotEnoughCreditException, InvalidEmailValidationKey
 #  "email": email,
 #  "credits-left": creditsLeft,
 #  "credits-used": creditsUsed,
-#  "frontKeys": list[FrontendKeys],
+#  "frontKeys": set[FrontendKeys],   (string set, absent when the account has no key)
 #  "usage-total": accessCount,
-#  "usage-history": list[(date, url, creditCost)],
-#  "foundings-total": totalAmount,
-#  "foundings-history": list[(date, payedAmount, credits)]
+#  "foundings-total": totalAmount
 #}
 
 # example : 
@@ -32,268 +30,456 @@ from utils.exceptions import NotEnoughCreditException, InvalidEmailValidationKey
 #  "email": "client@example.com",
 #  "credits-left": 45,
 #  "credits-used": 12,
-#  "frontKeys": ["key1", "key2"],
+#  "frontKeys": {"key1", "key2"},
 #  "usage-total": 12,
-#  "usage-history": [("2025-01-01", "www.mysite.org",1)],
-#  "foundings-total": 3.99,
-#  "foundings-history": [("2025-01-01", "3.99","50")]
+#  "foundings-total": 3.99
 #}
 
+# The usage and funding history is a time series, one item per event, in the history table
+# (TECH_CONFIG dynamodb_history_table, key : email + sk), written in the same transaction
+# as the counters of the account :
+#{
+#  "email": email,
+#  "sk": "usage#{date}#{id}" | "founding#{date}#{id}",
+#  "date": date,
+#  "url": url, "credits": creditCost                  (usage)
+#  "payed-amount": payedAmount, "credits": credits    (founding)
+#}
+# (scripts/migrate_history.py moves the former usage-history and foundings-history lists there)
+# The same table indexes the front keys, one item per key written with the frontKeys of the account :
+#{
+#  "email": email,
+#  "sk": "frontkey#{key}",
+#  "front-key": key,       (partition key of the index TECH_CONFIG dynamodb_front_key_index)
+#  "date": date
+#}
+# (scripts/migrate_front_keys.py converts the former frontKeys lists and creates the index)
+HISTORY_USAGE = "usage"
+HISTORY_FOUNDING = "founding"
+HISTORY_FRONT_KEY = "frontkey"
+FRONT_KEY_ATTRIBUTE = "front-key"
+
 # ----------------------------------------------------------------------------
+DYNAMODB_RESOURCE = None
 DYNAMODB_ID_TABLE = None
+DYNAMODB_HISTORY_TABLE = None
+
+def _get_dynamodb_resource():
+    global DYNAMODB_RESOURCE
+    if DYNAMODB_RESOURCE is None:
+        # boto3 is imported on first use : it weighs on the cold start of the handlers without DynamoDB
+        import boto3
+        DYNAMODB_RESOURCE = boto3.resource('dynamodb', region_name=TECH_CONFIG['dynamodb_region'],
+                                           endpoint_url=TECH_CONFIG['dynamodb_endpoint'])
+    return DYNAMODB_RESOURCE
 
 def get_dynamodb_id_table():
     global DYNAMODB_ID_TABLE
     if DYNAMODB_ID_TABLE is None:
-        dynamodb = boto3.resource('dynamodb', region_name=TECH_CONFIG['dynamodb_region'])
-        DYNAMODB_ID_TABLE = dynamodb.Table(TECH_CONFIG['dynamodb_id_table'])
+        DYNAMODB_ID_TABLE = _get_dynamodb_resource().Table(TECH_CONFIG['dynamodb_id_table'])
     return DYNAMODB_ID_TABLE
 
+def get_dynamodb_history_table():
+    global DYNAMODB_HISTORY_TABLE
+    if DYNAMODB_HISTORY_TABLE is None:
+        DYNAMODB_HISTORY_TABLE = _get_dynamodb_resource().Table(TECH_CONFIG['dynamodb_history_table'])
+    return DYNAMODB_HISTORY_TABLE
+
 def is_valid_front_key(email: str, key: str) -> bool:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' not in response:
-        return False
-    
-    if 'frontKeys' not in response['Item']:
-        return False
-    
-    return key in response['Item']['frontKeys']
-    
-def add_front_key(email: str, key: str, tool: str) -> None:
-    table = get_dynamodb_id_table()
-    
-    # First check if the email exists
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' not in response:
-        # Create new user record if not exists
-        table.put_item(
-            Item={
-                'email': email,
-                'credits-left': 2,
-                'credits-used': 0,
-                'frontKeys': [key],
-                'tools': [(key,tool)],
-                'usage-total': 0,
-                'usage-history': [],
-                'foundings-total': 0.0,
-                'foundings-history': []
-            }
-        )
+    """
+    Reads the keys of the account only (see services.front_keys.check_front_key for the cached check).
+    """
+    return key in get_account(email, ['frontKeys']).front_keys()
+
+def _record_front_key(email: str, key: str, valid: bool) -> None:
+    # services.front_keys imports this module (and redis) : imported on first use
+    from services.front_keys import record_front_key
+    record_front_key(email, key, valid)
+
+def _is_front_keys_list_error(e: Exception) -> bool:
+    """
+    True when an ADD / DELETE on frontKeys failed because the account still holds
+    the former list (not converted yet by scripts/migrate_front_keys.py).
+    """
+    response = getattr(e, "response", {})
+    code = response.get("Error", {}).get("Code")
+    if code == "TransactionCanceledException":
+        return any(reason.get("Code") == "ValidationError" for reason in response.get("CancellationReasons") or [])
+    return code == "ValidationException" and "data type" in response.get("Error", {}).get("Message", "")
+
+def convert_front_keys_list(account: dict) -> int:
+    """
+    Converts the frontKeys list of an account ({"email", "frontKeys"}) into a string set and writes
+    its key index items. The list is only replaced if it did not change meanwhile ;
+    an empty list is removed (a set cannot be empty). Returns the number of keys.
+    """
+    email = account["email"]
+    keys = list(dict.fromkeys(account["frontKeys"]))
+    with get_dynamodb_history_table().batch_writer(overwrite_by_pkeys=["email", "sk"]) as batch:
+        for key in keys:
+            batch.put_item(Item=front_key_item(email, key))
+    update = {
+        'Key': {'email': email},
+        'ConditionExpression': 'frontKeys = :old_keys',
+        'ExpressionAttributeValues': {':old_keys': account["frontKeys"]},
+    }
+    if keys:
+        update['UpdateExpression'] = 'SET frontKeys = :keys'
+        update['ExpressionAttributeValues'][':keys'] = set(keys)
     else:
-        # Add key to existing user
-        front_keys = response['Item'].get('frontKeys', [])
-        if key not in front_keys:
-            front_keys.append(key)
-            table.update_item(
-                Key={'email': email},
-                UpdateExpression='SET frontKeys = :keys',
-                ExpressionAttributeValues={':keys': front_keys}
-            )
+        update['UpdateExpression'] = 'REMOVE frontKeys'
+    get_dynamodb_id_table().update_item(**update)
+    return len(keys)
+
+def _with_front_keys_set(email: str, operation) -> None:
+    """
+    Runs an ADD / DELETE on frontKeys ; an account still holding the former list
+    is converted first, then the operation is run again.
+    """
+    try:
+        operation()
+        return
+    except Exception as e:
+        if not _is_front_keys_list_error(e):
+            raise
+    logger_tech.info(f"Converting the front keys list of {email}")
+    account = get_account(email, ['frontKeys'])
+    if isinstance(account.front_keys(), list):
+        try:
+            convert_front_keys_list({"email": email, "frontKeys": account.front_keys()})
+        except Exception as e:
+            # converted meanwhile by another call or the migration
+            if getattr(e, "response", {}).get("Error", {}).get("Code") != "ConditionalCheckFailedException":
+                raise
+    operation()
+
+def add_front_key(email: str, key: str, tool: str) -> None:
+    """
+    Adds a key to the account (created with the initial credits if needed) and its entry
+    in the key index, in one transaction.
+    """
+    _with_front_keys_set(email, lambda: _update_with_history({
+        'Key': {'email': email},
+        'UpdateExpression': 'ADD frontKeys :keys '
+                            'SET #cl = if_not_exists(#cl, :initial_credits), #cu = if_not_exists(#cu, :zero), '
+                            '#ut = if_not_exists(#ut, :zero), #ft = if_not_exists(#ft, :zero), '
+                            'tools = if_not_exists(tools, :tools)',
+        'ExpressionAttributeNames': {
+            '#cl': 'credits-left',
+            '#cu': 'credits-used',
+            '#ut': 'usage-total',
+            '#ft': 'foundings-total'
+        },
+        'ExpressionAttributeValues': {
+            ':keys': {key},
+            ':tools': [(key, tool)],
+            ':initial_credits': 2,
+            ':zero': 0
+        }
+    }, {'Put': front_key_item(email, key)}))
+    _record_front_key(email, key, True)
 
 def remove_front_key(email: str, key: str) -> None:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
+    """
+    Removes a key from the account and from the key index, in one transaction.
+    An unknown account is left as is.
+    """
+    try:
+        _with_front_keys_set(email, lambda: _update_with_history({
+            'Key': {'email': email},
+            'UpdateExpression': 'DELETE frontKeys :keys',
+            'ConditionExpression': 'attribute_exists(email)',
+            'ExpressionAttributeValues': {':keys': {key}}
+        }, {'Delete': {'email': email, 'sk': _front_key_sk(key)}}))
+    except Exception as e:
+        failed, _ = _failed_condition_item(e)
+        if not failed:
+            raise
+    _record_front_key(email, key, False)
+
+def get_email_of_front_key(key: str) -> str:
+    """
+    Returns the email of the account holding the key (None if unknown), from the key index :
+    the account item is not read.
+    """
+    from boto3.dynamodb.conditions import Key
+
+    response = get_dynamodb_history_table().query(
+        IndexName=TECH_CONFIG['dynamodb_front_key_index'],
+        KeyConditionExpression=Key(FRONT_KEY_ATTRIBUTE).eq(key),
+        Limit=1,
     )
-    
-    if 'Item' in response and 'frontKeys' in response['Item']:
-        front_keys = response['Item']['frontKeys']
-        if key in front_keys:
-            front_keys.remove(key)
-            table.update_item(
-                Key={'email': email},
-                UpdateExpression='SET frontKeys = :keys',
-                ExpressionAttributeValues={':keys': front_keys}
-            )
+    items = response.get('Items', [])
+    return items[0]['email'] if items else None
 
-def add_credits(email: str, payed_amount: float, credits: int) -> None:
+def _history_item(email: str, kind: str, date: str, **fields) -> dict:
+    return {'email': email, 'sk': f"{kind}#{date}#{uuid.uuid4().hex[:8]}", 'date': date, **fields}
+
+
+def _front_key_sk(key: str) -> str:
+    return f"{HISTORY_FRONT_KEY}#{key}"
+
+
+def front_key_item(email: str, key: str) -> dict:
+    return {'email': email, 'sk': _front_key_sk(key), FRONT_KEY_ATTRIBUTE: key, 'date': get_current_date()}
+
+
+def _update_with_history(update: dict, *history_writes: dict) -> None:
+    """
+    Applies an update of the accounts table (update_item arguments) and the writes of the history
+    table ({'Put': item} or {'Delete': key}) in one transaction (TransactWriteItems, one call).
+    The client of the DynamoDB resource serializes the python values itself, as the Table does.
+    """
     table = get_dynamodb_id_table()
+    history_table_name = get_dynamodb_history_table().name
+    transact_items = [{'Update': {**update, 'TableName': table.name}}]
+    for write in history_writes:
+        if 'Put' in write:
+            transact_items.append({'Put': {'TableName': history_table_name, 'Item': write['Put']}})
+        else:
+            transact_items.append({'Delete': {'TableName': history_table_name, 'Key': write['Delete']}})
+    table.meta.client.transact_write_items(TransactItems=transact_items)
+
+
+def _failed_condition_item(e: Exception) -> (bool, dict):
+    """
+    Returns (True, account item or None if it does not exist) when the transaction of
+    _update_with_history was cancelled by the condition of its update, (False, None) otherwise.
+    The item is the one returned by ReturnValuesOnConditionCheckFailure, as the Table resource would return it.
+    """
+    from boto3.dynamodb.types import TypeDeserializer
+
+    response = getattr(e, "response", {})
+    if response.get("Error", {}).get("Code") != "TransactionCanceledException":
+        return (False, None)
+    reason = (response.get("CancellationReasons") or [{}])[0]
+    if reason.get("Code") != "ConditionalCheckFailed":
+        return (False, None)
+    item = reason.get("Item")
+    if item is None:
+        return (True, None)
+    deserializer = TypeDeserializer()
+    return (True, {name: deserializer.deserialize(value) for name, value in item.items()})
+
+
+def add_credits(email: str, payed_amount: float, credits: int) -> None:
+    """
+    Adds credits to an account (created if needed) and records the funding, in one transaction :
+    concurrent top-ups and debits are never lost.
+    """
     #fixe la date à la date du jour avec l'heure
     date = get_current_date()
-    payed_amount = Decimal(payed_amount)
-    # Check if user exists
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' not in response:
-        # Create new user with credits
-        table.put_item(
-            Item={
-                'email': email,
-                'credits-left': credits,
-                'credits-used': 0,
-                'frontKeys': [],
-                'tools': [],
-                'usage-total': 0,
-                'usage-history': [],
-                'foundings-total': payed_amount,
-                'foundings-history': [(date, str(payed_amount), str(credits))]
-            }
-        )
-    else:
-        # Update existing user
-        item = response['Item']
-        credits_left = item.get('credits-left', 0) + credits
-        foundings_total = Decimal(item.get('foundings-total', 0)) + payed_amount
-        foundings_history = item.get('foundings-history', [])
-        foundings_history.append((date, str(payed_amount), str(credits)))
-        
-        table.update_item(
-            Key={'email': email},
-            UpdateExpression='SET #cl = :credits_left, #ft = :foundings_total, #fh = :foundings_history',
-            ExpressionAttributeNames={
+    payed_amount = Decimal(str(payed_amount))
+    _update_with_history({
+        'Key': {'email': email},
+        'UpdateExpression': 'ADD #cl :credits, #ft :payed_amount '
+                            'SET #cu = if_not_exists(#cu, :zero), #ut = if_not_exists(#ut, :zero), '
+                            'tools = if_not_exists(tools, :empty_list)',
+        'ExpressionAttributeNames': {
+            '#cl': 'credits-left',
+            '#cu': 'credits-used',
+            '#ut': 'usage-total',
+            '#ft': 'foundings-total'
+        },
+        'ExpressionAttributeValues': {
+            ':credits': credits,
+            ':payed_amount': payed_amount,
+            ':empty_list': [],
+            ':zero': 0
+        }
+    }, {'Put': _history_item(email, HISTORY_FOUNDING, date, **{'payed-amount': payed_amount, 'credits': credits})})
+
+def use_credits(email: str, credits_cost: int, url: str = "test-url", front_key: str = None) -> None:
+    """
+    Debits credits_cost credits and records the usage in one transaction, conditioned on
+    the account existing and holding enough credits (and on front_key, when given, being one of its keys).
+    Raises NotEnoughCreditException (or InvalidFrontKeyException) otherwise ;
+    an unknown account is not debited, as before.
+    """
+    date = get_current_date()
+    condition = 'attribute_exists(email) AND #cl >= :cost'
+    values = {
+        ':cost': credits_cost,
+        ':neg_cost': -credits_cost,
+        ':one': 1
+    }
+    if front_key is not None:
+        condition += ' AND contains(frontKeys, :key)'
+        values[':key'] = front_key
+    try:
+        _update_with_history({
+            'Key': {'email': email},
+            'UpdateExpression': 'ADD #cl :neg_cost, #cu :cost, #ut :one',
+            'ConditionExpression': condition,
+            'ExpressionAttributeNames': {
                 '#cl': 'credits-left',
-                '#ft': 'foundings-total',
-                '#fh': 'foundings-history'
+                '#cu': 'credits-used',
+                '#ut': 'usage-total'
             },
-            ExpressionAttributeValues={
-                ':credits_left': credits_left,
-                ':foundings_total': foundings_total,
-                ':foundings_history': foundings_history
-            }
-        )
-
-def use_credits(email: str, credits_cost: int, url: str = "test-url") -> None:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response:
-        item = response['Item']
-        credits_left = item.get('credits-left', 0)
-        
-        # Check if user has enough credits
-        if credits_left >= credits_cost:
-            credits_left -= credits_cost
-            credits_used = item.get('credits-used', 0) + credits_cost
-            usage_total = item.get('usage-total', 0) + 1
-            usage_history = item.get('usage-history', [])
-            date = get_current_date()
-            usage_history.append((date, url, str(credits_cost)))
-            
-            table.update_item(
-                Key={'email': email},
-                UpdateExpression='SET #cl = :credits_left, #cu = :credits_used, #ut = :usage_total, #uh = :usage_history',
-                ExpressionAttributeNames={
-                    '#cl': 'credits-left',
-                    '#cu': 'credits-used',
-                    '#ut': 'usage-total',
-                    '#uh': 'usage-history'
-                },
-                ExpressionAttributeValues={
-                    ':credits_left': credits_left,
-                    ':credits_used': credits_used,
-                    ':usage_total': usage_total,
-                    ':usage_history': usage_history
-                }
-            )
-        else : 
-            raise NotEnoughCreditException(credits_cost, credits_left)
-            
-
-def get_usage_history(email: str) -> list:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response and 'usage-history' in response['Item']:
-        return response['Item']['usage-history']
-    return []
+            'ExpressionAttributeValues': values,
+            'ReturnValuesOnConditionCheckFailure': 'ALL_OLD'
+        }, {'Put': _history_item(email, HISTORY_USAGE, date, url=url, credits=credits_cost)})
+    except Exception as e:
+        failed, item = _failed_condition_item(e)
+        if not failed:
+            raise
+        if item is None:
+            return
+        if front_key is not None and front_key not in item.get('frontKeys', []):
+            raise InvalidFrontKeyException(email)
+        raise NotEnoughCreditException(credits_cost, item.get('credits-left', 0))
 
-def get_foundings_history(email: str) -> list:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response and 'foundings-history' in response['Item']:
-        return response['Item']['foundings-history']
-    return []
+
+def _query_history(email: str, kind: str, limit: int, cursor: str, entry) -> dict:
+    """
+    Returns a page of the history of an account, most recent first :
+    {"items": [entry(item), ...], "cursor": cursor of the next page or None}.
+    """
+    from boto3.dynamodb.conditions import Key
+
+    query = {
+        'KeyConditionExpression': Key('email').eq(email) & Key('sk').begins_with(f"{kind}#"),
+        'ScanIndexForward': False,
+        'Limit': limit or BUSINESS_CONFIG['history_page_size'],
+    }
+    if cursor:
+        query['ExclusiveStartKey'] = {'email': email, 'sk': cursor}
+    response = get_dynamodb_history_table().query(**query)
+    last_key = response.get('LastEvaluatedKey')
+    return {
+        "items": [entry(item) for item in response.get('Items', [])],
+        "cursor": last_key['sk'] if last_key else None,
+    }
+
+def get_usage_history(email: str, limit: int = None, cursor: str = None) -> dict:
+    """
+    Page of usages [(date, url, creditCost)], see _query_history.
+    """
+    return _query_history(email, HISTORY_USAGE, limit, cursor,
+                          lambda item: (item['date'], item['url'], str(item['credits'])))
+
+def get_foundings_history(email: str, limit: int = None, cursor: str = None) -> dict:
+    """
+    Page of fundings [(date, payedAmount, credits)], see _query_history.
+    """
+    return _query_history(email, HISTORY_FOUNDING, limit, cursor,
+                          lambda item: (item['date'], str(item['payed-amount']), str(item['credits'])))
+
+# -----------------------------------------------------------------------------
+# Account snapshot : the attributes of an account read in one get_item
+
+# Attributes read by default (frontKeys and tools on request only : they grow with the account)
+ACCOUNT_COUNTERS = ['credits-left', 'credits-used', 'usage-total', 'foundings-total']
+_ACCOUNT_DEFAULTS = {
+    'credits-left': 0, 'credits-used': 0, 'usage-total': 0, 'foundings-total': 0.0, 'frontKeys': frozenset(), 'tools': []
+}
+BATCH_GET_MAX_KEYS = 100
+
+def _projection(attributes: list) -> dict:
+    # the names with a '-' must go through ExpressionAttributeNames ;
+    # email is always read : it tells an existing account without attributes from a missing one
+    names = {f"#a{i}": name for i, name in enumerate(['email', *attributes])}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+
+class AccountSnapshot:
+    """
+    Attributes of an account read once, with the accessors of the module getters.
+    Build one per invocation (get_account / get_accounts) and pass it around instead of
+    calling the getters one by one ; the history pages it returns are memoized too.
+    """
+
+    def __init__(self, email: str, item: dict, attributes: list) -> None:
+        self.email = email
+        self.item = item
+        self.attributes = attributes
+        self._history_pages = {}
+
+    @property
+    def exists(self) -> bool:
+        return self.item is not None
+
+    def _get(self, name: str):
+        if name not in self.attributes:
+            raise ValueError(f"{name} was not read in the snapshot of {self.email} ({self.attributes})")
+        if self.item is None:
+            return _ACCOUNT_DEFAULTS[name]
+        return self.item.get(name, _ACCOUNT_DEFAULTS[name])
+
+    def credits_left(self) -> int:
+        return self._get('credits-left')
+
+    def credits_used(self) -> int:
+        return self._get('credits-used')
+
+    def credits_total(self) -> int:
+        return self.credits_left() + self.credits_used()
+
+    def usage_total(self) -> int:
+        return self._get('usage-total')
+
+    def foundings_total(self) -> float:
+        return self._get('foundings-total')
+
+    def front_keys(self) -> set:
+        return self._get('frontKeys')
+
+    def _history_page(self, kind: str, query, limit: int, cursor: str) -> dict:
+        key = (kind, limit, cursor)
+        if key not in self._history_pages:
+            self._history_pages[key] = query(self.email, limit, cursor)
+        return self._history_pages[key]
+
+    def usage_history(self, limit: int = None, cursor: str = None) -> dict:
+        return self._history_page(HISTORY_USAGE, get_usage_history, limit, cursor)
+
+    def foundings_history(self, limit: int = None, cursor: str = None) -> dict:
+        return self._history_page(HISTORY_FOUNDING, get_foundings_history, limit, cursor)
+
+
+def get_account(email: str, attributes: list = None) -> AccountSnapshot:
+    """
+    Reads the account once, limited to `attributes` (ACCOUNT_COUNTERS by default).
+    """
+    attributes = list(attributes or ACCOUNT_COUNTERS)
+    response = get_dynamodb_id_table().get_item(Key={'email': email}, **_projection(attributes))
+    return AccountSnapshot(email, response.get('Item'), attributes)
+
+def get_accounts(emails: list, attributes: list = None) -> dict:
+    """
+    Reads many accounts with BatchGetItem (BATCH_GET_MAX_KEYS per call), limited to `attributes`.
+    Returns {email: AccountSnapshot}, missing accounts included (exists is False).
+    """
+    attributes = list(attributes or ACCOUNT_COUNTERS)
+    emails = list(dict.fromkeys(emails))
+    table_name = get_dynamodb_id_table().name
+    items = {}
+    for start in range(0, len(emails), BATCH_GET_MAX_KEYS):
+        request = {table_name: {'Keys': [{'email': email} for email in emails[start:start + BATCH_GET_MAX_KEYS]],
+                                **_projection(attributes)}}
+        attempt = 0
+        while request:
+            response = _get_dynamodb_resource().batch_get_item(RequestItems=request)
+            for item in response.get('Responses', {}).get(table_name, []):
+                items[item['email']] = item
+            # keys left over by throttling : retried with an exponential backoff
+            request = response.get('UnprocessedKeys')
+            if request:
+                time.sleep(min(0.05 * 2 ** attempt, 1.0))
+                attempt += 1
+    return {email: AccountSnapshot(email, items.get(email), attributes) for email in emails}
 
 def get_usage_total(email: str) -> int:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response and 'usage-total' in response['Item']:
-        return response['Item']['usage-total']
-    return 0
+    return get_account(email, ['usage-total']).usage_total()
 
 def get_foundings_total(email: str) -> float:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response and 'foundings-total' in response['Item']:
-        return response['Item']['foundings-total']
-    return 0.0
+    return get_account(email, ['foundings-total']).foundings_total()
 
 def get_credits_left(email: str) -> int:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response and 'credits-left' in response['Item']:
-        return response['Item']['credits-left']
-    return 0
+    return get_account(email, ['credits-left']).credits_left()
 
 def get_credits_used(email: str) -> int:
-    table = get_dynamodb_id_table()
-    
-    response = table.get_item(
-        Key={'email': email}
-    )
-    
-    if 'Item' in response and 'credits-used' in response['Item']:
-        return response['Item']['credits-used']
-    return 0
+    return get_account(email, ['credits-used']).credits_used()
 
 def get_credits_total(email: str) -> int:
-    return get_credits_left(email) + get_credits_used(email)
-
-
-def test_db():
-    # Test add_credits
-    add_credits("olivier.motelet@gmail.com", 1.5, 2)
-    logger_tech.info(">>>> test DB : oli credit left : " + str(get_credits_left("olivier.motelet@gmail.com")))
-    
-    # Test use_credits
-    logger_tech.info(">>>> test DB : oli credit left after use : " + str(get_credits_left("olivier.motelet@gmail.com")))
-    logger_tech.info(">>>> test DB : oli credit used : " + str(get_credits_used("olivier.motelet@gmail.com")))
-    
-    # Test get_credits_total
-    logger_tech.info(">>>> test DB : oli credit total : " + str(get_credits_total("olivier.motelet@gmail.com")))
-    
-    # Test get_usage_history
-    logger_tech.info(">>>> test DB : oli usage history : " + str(get_usage_history("olivier.motelet@gmail.com")))
-    
-    # Test get_foundings_history
-    logger_tech.info(">>>> test DB : oli foundings history : " + str(get_foundings_history("olivier.motelet@gmail.com")))
-    
-    # Test get_usage_total
-    logger_tech.info(">>>> test DB : oli usage total : " + str(get_usage_total("olivier.motelet@gmail.com")))
-    
-    # Test get_foundings_total
-    logger_tech.info(">>>> test DB : oli foundings total : " + str(get_foundings_total("olivier.motelet@gmail.com")))
-      
+    return get_account(email, ['credits-left', 'credits-used']).credits_total()
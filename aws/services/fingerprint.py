@@ -0,0 +1,139 @@
+"""
+Index des captures d'écran par empreinte perceptuelle (dHash), pour réutiliser
+le transcript d'une page visuellement identique au lieu d'appeler le modèle de vision.
+"""
+
+import io
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from services.cache import get_redis_client, get_redis_binary_client
+from utils.codec import encode_value, decode_value
+from utils.config import BUSINESS_CONFIG
+from utils.helpers import logger_tech
+from utils.urls import url_domain
+
+
+# 64 bits hash split in 4 bands of 16 bits, indexed per canonical domain
+# (a transcript is only reused for a screenshot of the same site) :
+#   phash:{domain}:{hash}             -> { "lang:en": transcript, ... }
+#   phash_band:{domain}:{i}:{band}    -> set of the hashes having this band at position i
+# Two hashes within a Hamming distance of 3 share at least one band, so looking up
+# the 4 bands finds every near-duplicate when phash_max_distance <= 3.
+HASH_SIZE = 8
+BANDS = 4
+BAND_BITS = HASH_SIZE * HASH_SIZE // BANDS
+
+if BUSINESS_CONFIG['phash_max_distance'] > BANDS - 1:
+    raise ValueError(f"phash_max_distance must be at most {BANDS - 1} : "
+                     f"the {BANDS} bands index does not find the hashes further apart")
+
+FINGERPRINT_PREFIX = "phash:"
+FINGERPRINT_BAND_PREFIX = "phash_band:"
+FINGERPRINT_METRICS_KEY = "metrics:fingerprint"
+
+
+def compute_image_fingerprint(img: bytes) -> str:
+    """
+    Returns the difference hash (dHash) of a screenshot as 16 hex chars,
+    or None when Pillow is not available or the image cannot be read.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(img)) as image:
+            pixels = list(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+    except Exception as e:
+        logger_tech.info(f"Cannot fingerprint image: {e}")
+        return None
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return f"{value:016x}"
+
+
+def _bands(fingerprint: str) -> list:
+    value = int(fingerprint, 16)
+    mask = (1 << BAND_BITS) - 1
+    return [f"{(value >> (BAND_BITS * i)) & mask:04x}" for i in range(BANDS)]
+
+
+def _hamming_distance(a: str, b: str) -> int:
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+
+def is_informative_fingerprint(fingerprint: str) -> bool:
+    """
+    False for the hashes of near-uniform screenshots (almost all bits at 0, or at 1) :
+    unrelated pages with the same background would match each other.
+    """
+    bits = bin(int(fingerprint, 16)).count("1")
+    min_bits = BUSINESS_CONFIG['phash_min_bits']
+    return min_bits <= bits <= HASH_SIZE * HASH_SIZE - min_bits
+
+
+def find_similar_transcripts(url: str, fingerprint: str) -> (str, list):
+    """
+    Looks for the closest indexed screenshot of the same domain as url within phash_max_distance.
+    Returns (its fingerprint, [(lang, transcript), ...]) or (None, None).
+    """
+    domain = url_domain(url)
+    if not domain or not is_informative_fingerprint(fingerprint):
+        return (None, None)
+    pipe = get_redis_client().pipeline(transaction=False)
+    for i, band in enumerate(_bands(fingerprint)):
+        pipe.smembers(f"{FINGERPRINT_BAND_PREFIX}{domain}:{i}:{band}")
+    candidates = set().union(*pipe.execute())
+
+    best, best_distance = None, None
+    for candidate in candidates:
+        distance = _hamming_distance(fingerprint, candidate)
+        if distance <= BUSINESS_CONFIG['phash_max_distance'] and (best is None or distance < best_distance):
+            best, best_distance = candidate, distance
+    if best is None:
+        return (None, None)
+
+    fields = get_redis_binary_client().hgetall(f"{FINGERPRINT_PREFIX}{domain}:{best}")
+    transcripts = [(field.decode("utf-8")[len("lang:"):], decode_value(value))
+                   for field, value in fields.items() if field.startswith(b"lang:")]
+    if not transcripts:
+        return (None, None)
+    logger_tech.debug(f"Similar screenshot found (distance {best_distance})")
+    return (best, transcripts)
+
+
+def index_fingerprint(url: str, fingerprint: str, lang: str, transcript: str) -> None:
+    domain = url_domain(url)
+    if not domain or not is_informative_fingerprint(fingerprint):
+        return
+    ttl = BUSINESS_CONFIG['transcript_cache_limit']
+    pipe = get_redis_binary_client().pipeline(transaction=False)
+    pipe.hset(f"{FINGERPRINT_PREFIX}{domain}:{fingerprint}", f"lang:{lang}", encode_value(transcript))
+    pipe.expire(f"{FINGERPRINT_PREFIX}{domain}:{fingerprint}", ttl)
+    for i, band in enumerate(_bands(fingerprint)):
+        pipe.sadd(f"{FINGERPRINT_BAND_PREFIX}{domain}:{i}:{band}", fingerprint)
+        pipe.expire(f"{FINGERPRINT_BAND_PREFIX}{domain}:{i}:{band}", ttl)
+    pipe.execute()
+
+
+def record_fingerprint_lookup(hit: bool, translated: bool = False) -> None:
+    pipe = get_redis_client().pipeline(transaction=False)
+    pipe.hincrby(FINGERPRINT_METRICS_KEY, "lookups", 1)
+    if hit:
+        pipe.hincrby(FINGERPRINT_METRICS_KEY, "llm_calls_avoided", 1)
+    if translated:
+        pipe.hincrby(FINGERPRINT_METRICS_KEY, "translations", 1)
+    pipe.execute()
+
+
+def get_fingerprint_stats() -> dict:
+    stats = {field: int(value) for field, value in get_redis_client().hgetall(FINGERPRINT_METRICS_KEY).items()}
+    lookups = stats.get("lookups", 0)
+    stats["hit_rate"] = stats.get("llm_calls_avoided", 0) / lookups if lookups else 0.0
+    return stats
@@ -0,0 +1,124 @@
+"""
+Validation des clés front (email, clé) avec un cache à deux niveaux, mémoire du conteneur puis Redis,
+devant la lecture du compte dans DynamoDB.
+"""
+
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from services.cache import get_redis_client
+from services.dynamodb import is_valid_front_key
+from services.memory_cache import LocalTTLCache
+from utils.config import BUSINESS_CONFIG
+from utils.helpers import logger_tech
+
+
+# front_key:{email}:{sha256 of the key} -> "1" (valid) or "0" (invalid), TTL front_key_cache_ttl
+# Invalid keys are cached too : a client retrying with a wrong key does not read DynamoDB each time.
+# add_front_key / remove_front_key write the new state through (Redis and the memory of their container),
+# the lookups only fill a missing entry (SET NX) : a lookup racing with them cannot restore the former state.
+# The memory of the other containers keeps the former state at most front_key_memory_ttl seconds.
+FRONT_KEY_CACHE_PREFIX = "front_key:"
+
+# metrics:front_key -> { "lookups", "memory_hits", "redis_hits", "dynamodb_reads" }
+# counted locally and sent with the next Redis round trip, or after front_key_metrics_flush_interval seconds
+FRONT_KEY_METRICS_KEY = "metrics:front_key"
+
+_validations = LocalTTLCache(
+    max_entries=BUSINESS_CONFIG['front_key_memory_max_entries'],
+    max_bytes=BUSINESS_CONFIG['front_key_memory_max_entries'] * 256,
+    ttl=BUSINESS_CONFIG['front_key_memory_ttl'],
+)
+_pending_metrics = Counter()
+_metrics_lock = threading.Lock()
+_metrics_flushed_at = time.monotonic()
+
+
+def _front_key_cache_key(email: str, key: str) -> str:
+    # the keys are secrets : only their hash appears in the Redis key names
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return f"{FRONT_KEY_CACHE_PREFIX}{email}:{digest}"
+
+
+def _count_lookup(outcome: str) -> bool:
+    """
+    Counts a lookup locally. Returns True when the pending counts should be flushed.
+    """
+    with _metrics_lock:
+        _pending_metrics["lookups"] += 1
+        _pending_metrics[outcome] += 1
+        return time.monotonic() - _metrics_flushed_at >= BUSINESS_CONFIG['front_key_metrics_flush_interval']
+
+
+def _flush_metrics(pipe) -> None:
+    global _metrics_flushed_at
+    with _metrics_lock:
+        pending = dict(_pending_metrics)
+        _pending_metrics.clear()
+        _metrics_flushed_at = time.monotonic()
+    for field, count in pending.items():
+        pipe.hincrby(FRONT_KEY_METRICS_KEY, field, count)
+
+
+def check_front_key(email: str, key: str) -> bool:
+    """
+    Same result as services.dynamodb.is_valid_front_key, cached per (email, key) in memory
+    then in Redis. Without Redis, the account is read in DynamoDB as before.
+    """
+    cache_key = _front_key_cache_key(email, key)
+    valid = _validations.get(cache_key)
+    if valid is not None:
+        if _count_lookup("memory_hits"):
+            try:
+                pipe = get_redis_client().pipeline(transaction=False)
+                _flush_metrics(pipe)
+                pipe.execute()
+            except Exception as e:
+                logger_tech.warning(f"Cannot record front key metrics: {e}")
+        return valid
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.get(cache_key)
+        _flush_metrics(pipe)
+        cached = pipe.execute()[0]
+    except Exception as e:
+        logger_tech.warning(f"Front key cache unavailable: {e}")
+        return is_valid_front_key(email, key)
+
+    if cached is not None:
+        valid = cached == "1"
+        _count_lookup("redis_hits")
+    else:
+        valid = is_valid_front_key(email, key)
+        _count_lookup("dynamodb_reads")
+        try:
+            get_redis_client().set(cache_key, "1" if valid else "0", ex=BUSINESS_CONFIG['front_key_cache_ttl'], nx=True)
+        except Exception as e:
+            logger_tech.warning(f"Cannot cache front key validation: {e}")
+    _validations.set(cache_key, valid, len(cache_key))
+    return valid
+
+
+def record_front_key(email: str, key: str, valid: bool) -> None:
+    """
+    Writes the state of a key after it was added (valid) or removed (not valid) in DynamoDB.
+    """
+    cache_key = _front_key_cache_key(email, key)
+    _validations.set(cache_key, valid, len(cache_key))
+    try:
+        get_redis_client().set(cache_key, "1" if valid else "0", ex=BUSINESS_CONFIG['front_key_cache_ttl'])
+    except Exception as e:
+        # the former state is kept at most front_key_cache_ttl seconds
+        logger_tech.warning(f"Cannot update front key cache of {email}: {e}")
+
+
+def get_front_key_cache_stats() -> dict:
+    stats = {field: int(value) for field, value in get_redis_client().hgetall(FRONT_KEY_METRICS_KEY).items()}
+    lookups = stats.get("lookups", 0)
+    hits = stats.get("memory_hits", 0) + stats.get("redis_hits", 0)
+    stats["hit_rate"] = hits / lookups if lookups else 0.0
+    stats["memory"] = _validations.stats()
+    return stats
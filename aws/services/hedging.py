@@ -0,0 +1,187 @@
+"""
+Requêtes LLM couvertes (hedging) : la configuration secondaire est appelée quand la
+principale tarde à répondre, et la première réponse est retenue.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.config import LLM_CONFIG, LLM_HEDGING
+from utils.helpers import logger_tech
+
+
+_executor = ThreadPoolExecutor(max_workers=LLM_HEDGING["max_workers"], thread_name_prefix="llm-hedge")
+
+
+class HedgeStats:
+    """
+    Rolling latencies of the main configuration of a task (for its percentile)
+    and rolling record of the hedged requests (for the hedge rate cap).
+    """
+
+    def __init__(self, window: int, rate_window: int) -> None:
+        self.latencies = deque(maxlen=window)
+        self.hedged = deque(maxlen=rate_window)
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+
+    def record_latency(self, seconds: float) -> None:
+        with self._lock:
+            self.latencies.append(seconds)
+
+    def threshold(self) -> float:
+        """
+        Delay after which the secondary request is sent : the configured percentile
+        of the recent main latencies, initial_delay until there are enough of them.
+        """
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if len(latencies) < LLM_HEDGING["min_samples"]:
+            return LLM_HEDGING["initial_delay"]
+        index = min(len(latencies) - 1, int(len(latencies) * LLM_HEDGING["percentile"] / 100))
+        return max(LLM_HEDGING["min_delay"], latencies[index])
+
+    def allow_hedge(self) -> bool:
+        with self._lock:
+            rate = sum(self.hedged) / len(self.hedged) if self.hedged else 0.0
+            return rate < LLM_HEDGING["max_hedge_rate"]
+
+    def record_request(self, hedged: bool, hedge_won: bool = False) -> None:
+        with self._lock:
+            self.hedged.append(hedged)
+            self.hedges += hedged
+            self.hedge_wins += hedge_won
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "requests": len(self.hedged),
+                "hedge_rate": sum(self.hedged) / len(self.hedged) if self.hedged else 0.0,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "samples": len(self.latencies),
+            }
+
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _get_stats(task: str) -> HedgeStats:
+    with _stats_lock:
+        if task not in _stats:
+            _stats[task] = HedgeStats(LLM_HEDGING["window"], LLM_HEDGING["rate_window"])
+        return _stats[task]
+
+
+def get_hedging_stats() -> dict:
+    with _stats_lock:
+        tasks = dict(_stats)
+    return {task: {**stats.as_dict(), "threshold": stats.threshold()} for task, stats in tasks.items()}
+
+
+def _can_hedge(task: str) -> bool:
+    if not LLM_HEDGING["enabled"] or not LLM_HEDGING["tasks"].get(task, False):
+        return False
+    # no secondary prompt for this task (e.g. translate on openrouter)
+    return LLM_CONFIG[task]["secondary"]["prompt"] is not None
+
+
+def _timed(call, config: dict, cancel: threading.Event):
+    start = time.perf_counter()
+    result = call(config, cancel)
+    return result, time.perf_counter() - start
+
+
+def hedged_call(task: str, call):
+    """
+    Runs call(config, cancel) with the main configuration of the task (LLM_CONFIG[task]).
+    If it has not answered after the task threshold and the hedge rate allows it,
+    the same call is sent with the secondary configuration : the first answer is returned
+    and the other request is cancelled (`cancel` is set, the call stops reading its response).
+    """
+    main, secondary = LLM_CONFIG[task]["main"], LLM_CONFIG[task]["secondary"]
+    stats = _get_stats(task)
+    if not _can_hedge(task):
+        result, elapsed = _timed(call, main, None)
+        stats.record_latency(elapsed)
+        return result
+
+    start = time.perf_counter()
+    cancel_main, cancel_secondary = threading.Event(), threading.Event()
+    main_future = _executor.submit(_timed, call, main, cancel_main)
+    done, _ = wait([main_future], timeout=stats.threshold())
+    if done or not stats.allow_hedge():
+        result, elapsed = main_future.result()
+        stats.record_latency(elapsed)
+        stats.record_request(hedged=False)
+        return result
+
+    logger_tech.info(f"Hedging {task}: main request slower than {stats.threshold():.1f}s, calling the secondary")
+    secondary_future = _executor.submit(_timed, call, secondary, cancel_secondary)
+    pending = {main_future, secondary_future}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result, elapsed = future.result()
+            except Exception as e:
+                error = e
+                continue
+            hedge_won = future is secondary_future
+            # the main latency is at least the time it ran before being cancelled
+            stats.record_latency(time.perf_counter() - start if hedge_won else elapsed)
+            (cancel_main if hedge_won else cancel_secondary).set()
+            stats.record_request(hedged=True, hedge_won=hedge_won)
+            logger_tech.info(f"Hedging {task}: {'secondary' if hedge_won else 'main'} answered first")
+            return result
+    stats.record_request(hedged=True)
+    raise error
+
+
+async def hedged_call_async(task: str, call):
+    """
+    Same as hedged_call for a coroutine function call(config) : the request that loses
+    the race is cancelled (its task is cancelled, which closes the HTTP request).
+    """
+    main, secondary = LLM_CONFIG[task]["main"], LLM_CONFIG[task]["secondary"]
+    stats = _get_stats(task)
+    start = time.perf_counter()
+    if not _can_hedge(task):
+        result = await call(main)
+        stats.record_latency(time.perf_counter() - start)
+        return result
+
+    main_task = asyncio.ensure_future(call(main))
+    done, _ = await asyncio.wait({main_task}, timeout=stats.threshold())
+    if done or not stats.allow_hedge():
+        result = await main_task
+        stats.record_latency(time.perf_counter() - start)
+        stats.record_request(hedged=False)
+        return result
+
+    logger_tech.info(f"Hedging {task}: main request slower than {stats.threshold():.1f}s, calling the secondary")
+    secondary_task = asyncio.ensure_future(call(secondary))
+    pending = {main_task, secondary_task}
+    error = None
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+                continue
+            hedge_won = future is secondary_task
+            # the main latency is at least the time it ran before being cancelled
+            stats.record_latency(time.perf_counter() - start)
+            for other in pending:
+                other.cancel()
+            stats.record_request(hedged=True, hedge_won=hedge_won)
+            logger_tech.info(f"Hedging {task}: {'secondary' if hedge_won else 'main'} answered first")
+            return future.result()
+    stats.record_request(hedged=True)
+    raise error
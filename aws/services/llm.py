@@ -2,111 +2,443 @@
 Fonctions d'interaction avec les modèles de langage (LLM).
 """
 
+import asyncio
 import base64
-import openai
+import importlib.util
+import json
+import threading
+import time
+from collections import Counter
 
-from utils.config import TECH_CONFIG,  LLM_CONFIG
+from utils.config import TECH_CONFIG, BUSINESS_CONFIG, LLM_CONFIG, LLM_HTTP_CONFIG
 from utils.auth import _get_keys
 
 from utils.helpers import logger_tech
+from utils.image import preprocess_image
+from services.hedging import hedged_call, hedged_call_async
+from services.llm_metrics import record_llm_call, image_bytes_of
 
 
+# One client per API, reused across the invocations of a warm container :
+# its connection pool keeps the TLS connections to the provider alive.
+_llm_clients = {}
+_llm_clients_lock = threading.Lock()
 
-def _translate_with_chatgpt(text: str, source_lang: str, target_lang: str, use_secondary:bool = False) -> str:
+# Connection reuse, per API (httpcore trace events)
+_llm_connection_stats = {}
+_llm_connection_stats_lock = threading.Lock()
+
+
+def _llm_http_config(api: str) -> dict:
+    return {**LLM_HTTP_CONFIG["default"], **LLM_HTTP_CONFIG.get(api, {})}
+
+
+def _count_connection_event(api: str, event: str) -> None:
+    with _llm_connection_stats_lock:
+        stats = _llm_connection_stats.setdefault(api, Counter())
+        stats[event] += 1
+
+
+def _on_trace_event(api: str, event_name: str) -> None:
+    if event_name == "connection.connect_tcp.complete":
+        _count_connection_event(api, "connections")
+        logger_tech.debug(f"New connection to the {api} API")
+    elif event_name == "connection.start_tls.complete":
+        _count_connection_event(api, "tls_handshakes")
+
+
+def _trace_requests(api: str):
+    """
+    Returns the request hook that counts the requests of an API and the new connections
+    (TCP connect, TLS handshake) they needed, from the httpcore trace extension.
+    """
+    def trace(event_name: str, info: dict) -> None:
+        _on_trace_event(api, event_name)
+
+    def on_request(request) -> None:
+        _count_connection_event(api, "requests")
+        request.extensions["trace"] = trace
+
+    return on_request
+
+
+def _trace_async_requests(api: str):
+    """
+    Same as _trace_requests for the async clients : httpx awaits their hooks
+    and the async httpcore pool awaits the trace callback, so both are coroutines.
+    """
+    async def trace(event_name: str, info: dict) -> None:
+        _on_trace_event(api, event_name)
+
+    async def on_request(request) -> None:
+        _count_connection_event(api, "requests")
+        request.extensions["trace"] = trace
+
+    return on_request
+
+
+def get_llm_connection_stats() -> dict:
+    """
+    Returns, per API, the requests sent by this container, the connections opened for them
+    and the connection reuse rate.
+    """
+    with _llm_connection_stats_lock:
+        stats = {api: dict(counts) for api, counts in _llm_connection_stats.items()}
+    for counts in stats.values():
+        requests = counts.get("requests", 0)
+        counts["reuse_rate"] = 1 - counts.get("connections", 0) / requests if requests else 0.0
+    return stats
+
+
+def _create_llm_client(api: str, is_async: bool = False):
+    """
+    Creates the OpenAI compatible client of an API ("openai" or "openrouter"),
+    with the connection pool and timeouts of LLM_HTTP_CONFIG.
+    is_async : AsyncOpenAI client, for the service loop (services/aio.py).
+    openai is imported here : it is only needed by the handlers calling a model.
+    """
+    import httpx
+    import openai
+
+    if (api == "openrouter"):
+        base_url, api_key = TECH_CONFIG["openrouter_url"], _get_keys()["OPENROUTER_API_KEY"]
+    elif (api == "openai"):
+        base_url, api_key = None, _get_keys()["OPENAI_API_KEY"]
+    else:
+        raise ValueError("Invalid LLM API specified in configuration.")
+
+    config = _llm_http_config(api)
+    http2 = config["http2"] and importlib.util.find_spec("h2") is not None
+    http_client_class = openai.DefaultAsyncHttpxClient if is_async else openai.DefaultHttpxClient
+    trace = _trace_async_requests(api) if is_async else _trace_requests(api)
+    http_client = http_client_class(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(config["read_timeout"], connect=config["connect_timeout"]),
+        event_hooks={"request": [trace]},
+    )
+    logger_tech.debug(f"LLM client created for {api} (http2={http2}, async={is_async})")
+    client_class = openai.AsyncOpenAI if is_async else openai.OpenAI
+    return client_class(
+        base_url=base_url,
+        api_key=api_key,
+        max_retries=config["max_retries"],
+        http_client=http_client,
+    )
+
+
+def get_llm_client(api: str):
+    """
+    Returns the client of an API, created on first use.
+    """
+    client = _llm_clients.get(api)
+    if client is None:
+        with _llm_clients_lock:
+            client = _llm_clients.get(api)
+            if client is None:
+                client = _create_llm_client(api)
+                _llm_clients[api] = client
+    return client
+
+
+_async_llm_clients = {}
+
+
+def get_async_llm_client(api: str):
+    """
+    Returns the async client of an API, created on first use (bound to the service loop).
+    """
+    client = _async_llm_clients.get(api)
+    if client is None:
+        with _llm_clients_lock:
+            client = _async_llm_clients.get(api)
+            if client is None:
+                client = _create_llm_client(api, is_async=True)
+                _async_llm_clients[api] = client
+    return client
+
+
+def _stream_completion(config: dict, messages: list, **kwargs):
+    """
+    Sends a streamed chat completion and yields the text chunks as they arrive.
+    Closing the generator closes the stream, which abandons the request.
+    """
+    client = get_llm_client(config["api"])
+    start = time.perf_counter()
+    status, usage, answered_by = "cancelled", None, None
+    try:
+        stream = client.chat.completions.create(model=config["model"], messages=messages, stream=True,
+                                                stream_options={"include_usage": True}, **kwargs)
+        try:
+            for chunk in stream:
+                answered_by = chunk.model or answered_by
+                if chunk.usage:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            status = "ok"
+        finally:
+            stream.close()
+    except GeneratorExit:
+        raise
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        record_llm_call(config, status, time.perf_counter() - start, usage, image_bytes_of(messages), answered_by)
+
+
+def _create_completion(config: dict, messages: list, cancel: threading.Event = None, **kwargs) -> str:
+    """
+    Sends a chat completion and returns its text.
+    With a `cancel` event (hedged request), the answer is streamed and the request is
+    abandoned as soon as the event is set : returns None in that case.
+    Every call is measured (services/llm_metrics.py).
+    """
+    if cancel is None:
+        client = get_llm_client(config["api"])
+        start = time.perf_counter()
+        try:
+            response = client.chat.completions.create(model=config["model"], messages=messages, **kwargs)
+        except Exception:
+            record_llm_call(config, "error", time.perf_counter() - start, image_bytes=image_bytes_of(messages))
+            raise
+        record_llm_call(config, "ok", time.perf_counter() - start, response.usage, image_bytes_of(messages), response.model)
+        return response.choices[0].message.content.strip()
+
+    parts = []
+    chunks = _stream_completion(config, messages, **kwargs)
+    try:
+        for chunk in chunks:
+            if cancel.is_set():
+                logger_tech.debug(f"Request to {config['model']} cancelled")
+                return None
+            parts.append(chunk)
+    finally:
+        chunks.close()
+    return "".join(parts).strip()
+
+
+def _translate(config: dict, text: str, source_lang: str, target_lang: str, cancel: threading.Event = None) -> str:
+    try:
+        context={
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+        }
+        prompt = config["prompt"].format(**context)
+        return _create_completion(config, [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": text}
+        ], cancel)
+    except Exception as e:
+        logger_tech.error(f"Error translating text via ChatGPT: {e}")
+        raise
+
+
+def _translate_with_chatgpt(text: str, source_lang: str, target_lang: str, use_secondary:bool = False,
+                            hedge: bool = True) -> str:
     """
     Helper function to translate a given text from source_lang to target_lang using ChatGPT.
+    The secondary configuration is used if use_secondary, or as a hedge when the main one is slow
+    (hedge=False for the background jobs).
     """
     logger_tech.debug(f"Translating transcript from {source_lang} to {target_lang} ")
-    config = LLM_CONFIG["translate"]["main"]
     if use_secondary:
-        config = LLM_CONFIG["translate"]["secondary"]
-    if (config["api"] == "openrouter"):
-        client = openai.OpenAI(
-            base_url=TECH_CONFIG["openrouter_url"],
-            api_key=_get_keys()["OPENROUTER_API_KEY"],
-        )
-    elif (config["api"] == "openai"):
-        client = openai.OpenAI(api_key=_get_keys()["OPENAI_API_KEY"])
-    else:
-        raise ValueError("Invalid LLM API specified in configuration.")
+        return _translate(LLM_CONFIG["translate"]["secondary"], text, source_lang, target_lang)
+    if not hedge:
+        return _translate(LLM_CONFIG["translate"]["main"], text, source_lang, target_lang)
+    return hedged_call("translate", lambda config, cancel: _translate(config, text, source_lang, target_lang, cancel))
+
+
+async def _create_completion_async(config: dict, messages: list, **kwargs) -> str:
+    """
+    Same as _create_completion (without `cancel`) with the async client :
+    a cancelled task abandons the request.
+    """
+    from services.aio import run_blocking
+
+    client = get_async_llm_client(config["api"])
+    start = time.perf_counter()
+    try:
+        response = await client.chat.completions.create(model=config["model"], messages=messages, **kwargs)
+    except asyncio.CancelledError:
+        # recorded in the background : the cancellation is not delayed
+        asyncio.ensure_future(run_blocking(record_llm_call, config, "cancelled", time.perf_counter() - start,
+                                           image_bytes=image_bytes_of(messages)))
+        raise
+    except Exception:
+        await run_blocking(record_llm_call, config, "error", time.perf_counter() - start,
+                           image_bytes=image_bytes_of(messages))
+        raise
+    await run_blocking(record_llm_call, config, "ok", time.perf_counter() - start, response.usage,
+                       image_bytes_of(messages), response.model)
+    return response.choices[0].message.content.strip()
 
+
+async def _translate_async(config: dict, text: str, source_lang: str, target_lang: str) -> str:
     try:
         context={
             "source_lang": source_lang,
             "target_lang": target_lang,
         }
         prompt = config["prompt"].format(**context)
-        response = client.chat.completions.create(
-            model=config["model"],
-            messages=[
-                {"role": "system", "content": prompt},
-                {"role": "user", "content": text}
-            ]
-        )
-        return response.choices[0].message.content.strip()
+        return await _create_completion_async(config, [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": text}
+        ])
     except Exception as e:
         logger_tech.error(f"Error translating text via ChatGPT: {e}")
         raise
 
 
+async def _translate_with_chatgpt_async(text: str, source_lang: str, target_lang: str) -> str:
+    """
+    Async version of _translate_with_chatgpt (hedged with the secondary configuration).
+    """
+    logger_tech.debug(f"Translating transcript from {source_lang} to {target_lang} ")
+    return await hedged_call_async("translate",
+                                   lambda config: _translate_async(config, text, source_lang, target_lang))
 
 
-def generate_design_transcript(img: bytes, lang: str, use_secondary:bool = False) -> str:
+def _translate_multi(config: dict, text: str, source_lang: str, target_langs: list,
+                     cancel: threading.Event = None) -> str:
+    try:
+        context={
+            "source_lang": source_lang,
+            "target_langs": ", ".join(target_langs),
+        }
+        prompt = config["prompt"].format(**context)
+        return _create_completion(config, [
+            {"role": "system", "content": prompt},
+            {"role": "user", "content": text}
+        ], cancel, response_format={"type": "json_object"})
+    except Exception as e:
+        logger_tech.error(f"Error translating text via ChatGPT: {e}")
+        raise
+
+
+def _split_translations(answer: str, target_langs: list) -> dict:
     """
-    Sends the image to ChatGPT-4 with a predefined prompt stored in an environment variable (PROMPT).
-    The ChatGPT API key is stored in AWS Secret Manager.
+    Returns the valid translations of a translate_multi answer {lang: translation}
+    (language names matched case insensitively, non empty strings only).
     """
-    logger_tech.debug("Generating design transcript via ChatGPT.")
-    
-    config = LLM_CONFIG["transcript"]["main"]
-    if use_secondary:
-        config = LLM_CONFIG["transcript"]["secondary"]
-    
-    if (config["api"] == "openrouter"):
-        client = openai.OpenAI(
-            base_url=TECH_CONFIG["openrouter_url"],
-            api_key=_get_keys()["OPENROUTER_API_KEY"],
-        )
-    else :
-        if (config["api"] == "openai"):
-            client = openai.OpenAI(api_key=_get_keys()["OPENAI_API_KEY"])
-        else:
-            raise ValueError("Invalid LLM API specified in configuration.")
-
-
-    # Convert bytes to base64 string
-    if isinstance(img, bytes):
-        base64_image = base64.b64encode(img).decode('utf-8')
-    else:
-        logger_tech.error("Expected bytes for image data")
-        raise ValueError("Image data must be bytes")
+    try:
+        translations = json.loads(answer)
+    except (TypeError, ValueError):
+        logger_tech.warning("Batch translation is not valid JSON")
+        return {}
+    if not isinstance(translations, dict):
+        return {}
+    translations = {str(lang).strip().lower(): value for lang, value in translations.items()}
+    valid = {}
+    for lang in target_langs:
+        value = translations.get(lang.lower())
+        if isinstance(value, str) and value.strip():
+            valid[lang] = value.strip()
+    return valid
+
+
+def _translate_batch_with_chatgpt(text: str, source_lang: str, target_langs: list, hedge: bool = True) -> dict:
+    """
+    Translates a text to several languages, translate_batch_size languages per LLM call
+    (structured JSON answer). The languages missing or invalid in the answer are translated
+    one by one with _translate_with_chatgpt.
+    Returns {lang: translation} for every target language.
+    """
+    logger_tech.debug(f"Translating transcript from {source_lang} to {target_langs}")
+    translations = {}
+    batch_size = BUSINESS_CONFIG["translate_batch_size"]
+    for i in range(0, len(target_langs), batch_size):
+        batch = target_langs[i:i + batch_size]
+        try:
+            if hedge:
+                answer = hedged_call("translate_multi",
+                                     lambda config, cancel, batch=batch: _translate_multi(config, text, source_lang, batch, cancel))
+            else:
+                answer = _translate_multi(LLM_CONFIG["translate_multi"]["main"], text, source_lang, batch)
+            translations.update(_split_translations(answer, batch))
+        except Exception as e:
+            logger_tech.warning(f"Batch translation failed, translating one language at a time: {e}")
+
+    missing = [lang for lang in target_langs if lang not in translations]
+    if missing:
+        logger_tech.info(f"Batch translation incomplete, falling back for {missing}")
+    for lang in missing:
+        translations[lang] = _translate_with_chatgpt(text, source_lang, lang, hedge=hedge)
+    return translations
 
 
+def _image_url(config: dict, img: bytes, prepared: dict) -> str:
+    """
+    Returns the data URL of the screenshot preprocessed with the image settings of the model.
+    `prepared` keeps the URLs already built for this image (main and secondary of a hedged call).
+    """
+    settings = config["image"]
+    key = tuple(sorted(settings.items()))
+    if key not in prepared:
+        data, mime = preprocess_image(img, settings)
+        prepared[key] = f"data:{mime};base64,{base64.b64encode(data).decode('utf-8')}"
+    return prepared[key]
+
+
+def _transcript_messages(config: dict, img: bytes, lang: str, prepared: dict) -> list:
     context = {
         "target_lang": lang,
     }
     prompt = config["prompt"].format(**context)
-    try:
-        response = client.chat.completions.create(
-            model=config["model"],
-            messages=[
-                {"role": "system", "content": prompt},
+    return [
+        {"role": "system", "content": prompt},
+        {
+            "role": "user",
+            "content": [
                 {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{base64_image}"
-                            },
-                        },
-                    ],
+                    "type": "image_url",
+                    "image_url": {
+                        "url": _image_url(config, img, prepared),
+                        "detail": config["image"]["detail"]
+                    },
                 },
             ],
-            max_tokens=1000
-        )
-        transcript = response.choices[0].message.content.strip()
-        return transcript
+        },
+    ]
+
+
+def _generate(config: dict, img: bytes, lang: str, cancel: threading.Event = None, prepared: dict = None) -> str:
+    try:
+        messages = _transcript_messages(config, img, lang, {} if prepared is None else prepared)
+        return _create_completion(config, messages, cancel, max_tokens=1000)
     except Exception as e:
         logger_tech.error(f"Error generating transcript from ChatGPT: {e}")
         raise
+
+
+def generate_design_transcript(img: bytes, lang: str, use_secondary:bool = False) -> str:
+    """
+    Sends the image, preprocessed for the model (utils/image.py), to ChatGPT-4 with a predefined prompt
+    stored in an environment variable (PROMPT).
+    The ChatGPT API key is stored in AWS Secret Manager.
+    The secondary configuration is used if use_secondary, or as a hedge when the main one is slow.
+    """
+    logger_tech.debug("Generating design transcript via ChatGPT.")
+    if use_secondary:
+        return _generate(LLM_CONFIG["transcript"]["secondary"], img, lang)
+    prepared = {}
+    return hedged_call("transcript", lambda config, cancel: _generate(config, img, lang, cancel, prepared))
+
+
+def stream_design_transcript(img: bytes, lang: str, use_secondary:bool = False):
+    """
+    Same as generate_design_transcript, but yields the transcript chunks as the model writes them
+    (provider stream API, not hedged).
+    """
+    logger_tech.debug("Streaming design transcript via ChatGPT.")
+    config = LLM_CONFIG["transcript"]["secondary" if use_secondary else "main"]
+    try:
+        yield from _stream_completion(config, _transcript_messages(config, img, lang, {}), max_tokens=1000)
+    except Exception as e:
+        logger_tech.error(f"Error streaming transcript from ChatGPT: {e}")
+        raise
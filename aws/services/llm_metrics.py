@@ -0,0 +1,164 @@
+"""
+Mesure des appels LLM : tokens, octets d'image, latence, fournisseur et modèle de chaque appel,
+journalisés (champ "llm" du logger technique) et agrégés dans Redis par modèle et par tranche horaire.
+"""
+
+import math
+import time
+
+from services.cache import get_redis_client
+from utils.config import LLM_METRICS, LLM_VARIABLES
+from utils.helpers import logger_tech
+
+
+# metrics:llm:{api}:{model}:{bucket} -> {
+#     "calls", "status:ok|error|cancelled", "task:{task}", "role:{main|secondary}",
+#     "prompt_tokens", "completion_tokens", "image_bytes", "wall_ms", "cost_micro_usd",
+#     "latency_le:{bound ms}|latency_le:inf"   (latency histogram)
+# }
+# bucket = start time of the bucket_seconds slice (epoch seconds)
+LLM_METRICS_PREFIX = "metrics:llm:"
+
+
+def _model_key(api: str, model: str) -> str:
+    return f"{api}:{model}"
+
+
+def _pricing(api: str, model: str) -> dict:
+    for model_def in LLM_VARIABLES.values():
+        if model_def["api"] == api and model_def["model"] == model:
+            return model_def.get("pricing")
+    return None
+
+
+def _latency_bucket(wall_ms: float) -> str:
+    for bound in LLM_METRICS["latency_buckets_ms"]:
+        if wall_ms <= bound:
+            return str(bound)
+    return "inf"
+
+
+def image_bytes_of(messages: list) -> int:
+    """
+    Returns the size of the images sent in the messages (decoded from their base64 data URLs).
+    """
+    size = 0
+    for message in messages:
+        content = message.get("content")
+        if not isinstance(content, list):
+            continue
+        for part in content:
+            if part.get("type") == "image_url":
+                url = part["image_url"]["url"]
+                size += len(url) - url.find(",") - 1
+    return size * 3 // 4
+
+
+def record_llm_call(config: dict, status: str, wall_seconds: float, usage=None,
+                    image_bytes: int = 0, answered_by: str = None) -> None:
+    """
+    Logs one LLM call and adds it to the Redis stats of its model.
+    status is "ok", "error" or "cancelled" (hedged request abandoned), usage the `usage`
+    of the response (None when the provider did not send it), answered_by the model
+    name returned by the provider. Never raises : the call itself has succeeded or failed already.
+    """
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+    wall_ms = wall_seconds * 1000
+    pricing = _pricing(config["api"], config["model"])
+    cost_usd = None
+    if pricing is not None:
+        cost_usd = (prompt_tokens * pricing["prompt"] + completion_tokens * pricing["completion"]) / 1e6
+
+    logger_tech.info("llm_call", extra={"llm": {
+        "task": config.get("task"),
+        "role": config.get("role"),
+        "provider": config["api"],
+        "model": config["model"],
+        "answered_by": answered_by,
+        "status": status,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "image_bytes": image_bytes,
+        "wall_ms": round(wall_ms, 1),
+        "cost_usd": cost_usd,
+    }})
+
+    if not LLM_METRICS["enabled"]:
+        return
+    bucket_seconds = LLM_METRICS["bucket_seconds"]
+    bucket = int(time.time()) // bucket_seconds * bucket_seconds
+    key = f"{LLM_METRICS_PREFIX}{_model_key(config['api'], config['model'])}:{bucket}"
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hincrby(key, "calls", 1)
+        pipe.hincrby(key, f"status:{status}", 1)
+        pipe.hincrby(key, f"task:{config.get('task')}", 1)
+        pipe.hincrby(key, f"role:{config.get('role')}", 1)
+        pipe.hincrby(key, "prompt_tokens", prompt_tokens)
+        pipe.hincrby(key, "completion_tokens", completion_tokens)
+        pipe.hincrby(key, "image_bytes", image_bytes)
+        pipe.hincrby(key, "wall_ms", round(wall_ms))
+        pipe.hincrby(key, f"latency_le:{_latency_bucket(wall_ms)}", 1)
+        if cost_usd is not None:
+            pipe.hincrby(key, "cost_micro_usd", round(cost_usd * 1e6))
+        pipe.expire(key, LLM_METRICS["retention"])
+        pipe.execute()
+    except Exception as e:
+        logger_tech.warning(f"Cannot record LLM metrics: {e}")
+
+
+def _latency_percentile(histogram: dict, calls: int, percentile: float) -> float:
+    """
+    Upper bound (ms) of the histogram bucket holding the percentile, None if it is the open one.
+    """
+    rank = math.ceil(calls * percentile / 100)
+    seen = 0
+    for bound in LLM_METRICS["latency_buckets_ms"]:
+        seen += histogram.get(str(bound), 0)
+        if seen >= rank:
+            return bound
+    return None
+
+
+def get_llm_stats(hours: int = 24) -> dict:
+    """
+    Returns, per configured model ("api:model"), the calls of the last `hours` hours :
+    counts by status, task and role, tokens, image bytes, cost, average and approximate
+    p50/p95 latencies (upper bound of their histogram bucket).
+    """
+    bucket_seconds = LLM_METRICS["bucket_seconds"]
+    now = int(time.time()) // bucket_seconds * bucket_seconds
+    buckets = [now - i * bucket_seconds for i in range(max(1, math.ceil(hours * 3600 / bucket_seconds)))]
+    models = sorted({_model_key(model_def["api"], model_def["model"]) for model_def in LLM_VARIABLES.values()})
+
+    pipe = get_redis_client().pipeline(transaction=False)
+    for model in models:
+        for bucket in buckets:
+            pipe.hgetall(f"{LLM_METRICS_PREFIX}{model}:{bucket}")
+    results = iter(pipe.execute())
+
+    stats = {}
+    for model in models:
+        totals = {}
+        for _ in buckets:
+            for field, value in next(results).items():
+                totals[field] = totals.get(field, 0) + int(value)
+        calls = totals.get("calls", 0)
+        if not calls:
+            continue
+        histogram = {field[len("latency_le:"):]: value for field, value in totals.items() if field.startswith("latency_le:")}
+        stats[model] = {
+            "calls": calls,
+            "status": {field[len("status:"):]: value for field, value in totals.items() if field.startswith("status:")},
+            "tasks": {field[len("task:"):]: value for field, value in totals.items() if field.startswith("task:")},
+            "roles": {field[len("role:"):]: value for field, value in totals.items() if field.startswith("role:")},
+            "prompt_tokens": totals.get("prompt_tokens", 0),
+            "completion_tokens": totals.get("completion_tokens", 0),
+            "image_bytes": totals.get("image_bytes", 0),
+            "cost_usd": totals.get("cost_micro_usd", 0) / 1e6,
+            "avg_wall_ms": totals.get("wall_ms", 0) / calls,
+            "p50_wall_ms": _latency_percentile(histogram, calls, 50),
+            "p95_wall_ms": _latency_percentile(histogram, calls, 95),
+        }
+    return {"hours": hours, "models": stats}
@@ -4,8 +4,6 @@ gestion des emails envoyés au client
 
 
 
-import boto3
-from botocore.exceptions import ClientError
 import json
 from utils.config import TECH_CONFIG
 from utils.helpers import logger_tech
@@ -32,6 +30,8 @@ def send_registration_mail(email: str, validation_key: str):
     return None
     
     # Create SES client
+    import boto3
+    from botocore.exceptions import ClientError
     ses = boto3.client('ses', region_name=TECH_CONFIG["aws_region"])
     
     
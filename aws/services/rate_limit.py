@@ -0,0 +1,71 @@
+"""
+Limitation du nombre de requêtes par IP, email et client_key (fenêtre glissante Redis).
+"""
+
+import time
+
+from services.cache import LazyScript
+from utils.config import BUSINESS_CONFIG
+from utils.helpers import logger_tech
+
+
+# scope -> BUSINESS_CONFIG entry holding the number of requests allowed per window
+RATE_LIMIT_SCOPES = {
+    "ip": "ip_limit",
+    "email": "email_limit",
+    "client_key": "client_key_limit",
+}
+
+# Sliding window counter, evaluated for every scope in one atomic call.
+# KEYS : for each scope, the counter of the current window then the previous one
+# ARGV : window (ms), time elapsed in the current window (ms), then one limit per scope
+# Returns 0 if the request is allowed (and counted), else the index of the exceeded scope.
+_SLIDING_WINDOW_SCRIPT = """
+local window = tonumber(ARGV[1])
+local previous_weight = (window - tonumber(ARGV[2])) / window
+local scopes = #KEYS / 2
+for i = 1, scopes do
+    local current = tonumber(redis.call('GET', KEYS[2 * i - 1]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    if previous * previous_weight + current + 1 > tonumber(ARGV[i + 2]) then
+        return i
+    end
+end
+for i = 1, scopes do
+    redis.call('INCR', KEYS[2 * i - 1])
+    redis.call('PEXPIRE', KEYS[2 * i - 1], window * 2)
+end
+return 0
+"""
+_sliding_window_script = LazyScript(_SLIDING_WINDOW_SCRIPT)
+
+
+def check_rate_limits(identities: dict) -> str:
+    """
+    Counts one request for each identity given ({"ip": ..., "email": ..., "client_key": ...})
+    and returns the name of the first scope over its limit, or None if the request is allowed.
+    A rejected request is not counted.
+    """
+    window_ms = BUSINESS_CONFIG['rate_limit_window'] * 1000
+    window_index, elapsed_ms = divmod(int(time.time() * 1000), window_ms)
+
+    keys = []
+    limits = []
+    scopes = []
+    for scope, limit_name in RATE_LIMIT_SCOPES.items():
+        identity = identities.get(scope)
+        if not identity:
+            continue
+        keys.append(f"ratelimit:{scope}:{identity}:{window_index}")
+        keys.append(f"ratelimit:{scope}:{identity}:{window_index - 1}")
+        limits.append(BUSINESS_CONFIG[limit_name])
+        scopes.append(scope)
+
+    if not scopes:
+        return None
+
+    exceeded = _sliding_window_script(keys=keys, args=[window_ms, elapsed_ms, *limits])
+    if exceeded:
+        logger_tech.info(f"Rate limit exceeded for {scopes[exceeded - 1]}")
+        return scopes[exceeded - 1]
+    return None
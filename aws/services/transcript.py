@@ -2,67 +2,151 @@
 Fonctions principales pour la génération de transcripts de design.
 """
 
-from services.dynamodb import use_credits, test_db
+from services.dynamodb import use_credits
+
+import time
 
 from services.cache import (
-    get_cached_design_transcript, store_cached_design_transcript, 
-    create_cached_url_info, pop_cached_url_info
+    get_cached_design_transcript, lookup_cached_design_transcript, store_cached_design_transcript,
+    TRANSCRIPT_STALE, TRANSCRIPT_REFRESH,
+    create_cached_url_info, pop_cached_url_info,
+    release_transcript_generation, wait_for_cached_design_transcript
+)
+from services.llm import generate_design_transcript, stream_design_transcript, _translate_with_chatgpt
+from services.fingerprint import (
+    compute_image_fingerprint, find_similar_transcripts, index_fingerprint, record_fingerprint_lookup
 )
-from services.llm import generate_design_transcript, _translate_with_chatgpt
 
+from utils.config import BUSINESS_CONFIG
 from utils.helpers import logger_tech, logger_business
 
 
-def get_design_transcript(email: str, key: str, url: str, etag: str,  lang: str = "en", log_data: dict = {}) -> (bool, str):
+def extract_transcript(url: str, lang: str, etag: str, transcripts: list, log_data: dict = None) -> str:
+    """
+    Returns the transcript in the requested language from the cached transcripts,
+    translating (and caching) one of them if this language is missing.
+    """
+    if not transcripts: 
+        return None
+    for (trans_lang, trans_text) in transcripts:
+        if trans_lang == lang:
+            logger_tech.debug(f"Found transcript in requested language ({lang}) in cache.")
+            return trans_text
+
+    # If we have a transcript but not the requested language, translate it
+    for (trans_lang, trans_text) in transcripts:
+        # Translate to requested language
+        translated = _translate_with_chatgpt(trans_text, trans_lang, lang)
+        # Update cache with the newly translated transcript
+        store_cached_design_transcript(url, lang, etag, translated)
+        
+        if log_data is not None:
+            log_data["action"] = "translate_transcript"
+            logger_business.log(status="200", **log_data)
+        logger_tech.debug(f"Added translated transcript ({lang}) to cache.")
+        
+        return translated
+    return None
+
+
+def get_design_transcript(email: str, key: str, url: str, etag: str,  lang: str = "en", log_data: dict = {},
+                          accept_stale: bool = False) -> (bool, str, dict):
     """
     Main orchestration function:
-      1. Cleans the URL of query parameters.
+      1. Lets the cache functions canonicalize the URL (utils.urls).
       2. Uses get_cached_design_transcript to check the cache.
-      3. If no cache or invalid cache, captures a screenshot via get_screen_shot(),
-         calls generate_design_transcript(), and stores in the cache.
-      4. Returns the final transcript in the requested language.
+      3. If no cache or invalid cache, returns a txid for the client to upload
+         a screenshot - unless the same page is already being generated, in which
+         case it waits for that transcript.
+      4. Returns (True, transcript, refresh) in the requested language, (False, txid, None),
+         or (False, None, None) when the generation is still pending.
+         refresh is None, or {"stale": bool, "txid": txid or None} when the transcript
+         is obsolete or elected for an early refresh : the client then uploads
+         a screenshot with this txid to regenerate it.
+         Only clients that do so pass accept_stale : for the others an obsolete
+         transcript is a miss and no early refresh is elected.
     """
-    ## test dynamodb access
-    use_credits(email, 1, url)
-    
-    test_db()
-    
-    
-    
-    # Clean the URL by removing query parameters
+    use_credits(email, 1, url, front_key=key)
+
+    # The cache functions canonicalize the URL (query, fragment, www, ...)
     logger_tech.debug(f"Request to get_design_transcript: url={url}, etag={etag}, lang={lang}")
-    if "?" in url:
-        url = url.split("?")[0]
 
     # Check Cache
-    transcripts = get_cached_design_transcript(url, lang, etag)
-    def extract_transcript(transcripts):
-        if not transcripts: 
-            return None
-        for (trans_lang, trans_text) in transcripts:
-            if trans_lang == lang:
-                logger_tech.debug(f"Found transcript in requested language ({lang}) in cache.")
-                return trans_text
-
-        # If we have a transcript but not the requested language, translate it
-        for (trans_lang, trans_text) in transcripts:
-            # Translate to requested language
-            translated = _translate_with_chatgpt(trans_text, trans_lang, lang)
-            # Update cache with the newly translated transcript
-            store_cached_design_transcript(url, lang, etag, translated)
-            
-            log_data["action"] = "translate_transcript"
-            logger_business.log(status="200", **log_data)
-            logger_tech.debug(f"Added translated transcript ({lang}) to cache.")
-            
-            return translated
-        return None
-    
-    cached_transcript = extract_transcript(transcripts)
+    transcripts, state = lookup_cached_design_transcript(url, lang, etag)
+    stale = state == TRANSCRIPT_STALE
+    if stale and accept_stale:
+        # stale-while-revalidate : serve the previous transcript, the client regenerates it
+        txid = create_cached_url_info(url, lang, etag, refresh=True)
+        return (True, transcripts[0][1], {"stale": True, "txid": txid})
+    cached_transcript = None if stale else extract_transcript(url, lang, etag, transcripts, log_data)
     if cached_transcript is not None:
-        return (True, cached_transcript)
-    
-    return (False, create_cached_url_info(url,lang,etag))
+        refresh = None
+        if state == TRANSCRIPT_REFRESH and accept_stale:
+            refresh = {"stale": False, "txid": create_cached_url_info(url, lang, etag, refresh=True)}
+        return (True, cached_transcript, refresh)
+
+    # Single-flight : only the elected caller uploads a screenshot,
+    # the others wait for its transcript
+    txid = create_cached_url_info(url, lang, etag, refresh=stale)
+    if txid is None:
+        transcripts = wait_for_cached_design_transcript(url, lang, etag, BUSINESS_CONFIG['singleflight_wait'])
+        cached_transcript = extract_transcript(url, lang, etag, transcripts, log_data)
+        if cached_transcript is not None:
+            return (True, cached_transcript, None)
+        # the generation may have been abandoned : try to take it over
+        txid = create_cached_url_info(url, lang, etag, refresh=stale)
+    return (False, txid, None)
+
+
+def get_transcript_by_fingerprint(url: str, fingerprint: str, lang: str) -> str:
+    """
+    Returns the transcript of a near-duplicate screenshot of the same site in the requested
+    language (translating it if needed), or None. Each hit is one vision call avoided.
+    """
+    similar, transcripts = find_similar_transcripts(url, fingerprint)
+    if similar is None:
+        record_fingerprint_lookup(hit=False)
+        return None
+    for (trans_lang, trans_text) in transcripts:
+        if trans_lang == lang:
+            record_fingerprint_lookup(hit=True)
+            return trans_text
+    trans_lang, trans_text = transcripts[0]
+    translated = _translate_with_chatgpt(trans_text, trans_lang, lang)
+    index_fingerprint(url, similar, lang, translated)
+    record_fingerprint_lookup(hit=True, translated=True)
+    return translated
+
+
+def _find_existing_transcript(info: dict, img: bytes, refresh: bool) -> (str, str):
+    """
+    Looks for a transcript of this page that does not need the vision model.
+    Returns (transcript or None, fingerprint of the screenshot or None).
+    """
+    # The transcript may have been generated meanwhile (expired lock)
+    if not refresh:
+        transcripts = get_cached_design_transcript(info['url'], info['lang'], info['etag'])
+        transcript = extract_transcript(info['url'], info['lang'], info['etag'], transcripts)
+        if transcript is not None:
+            return (transcript, None)
+
+    # A visually identical screenshot may already have a transcript
+    fingerprint = None
+    if BUSINESS_CONFIG['phash_enabled']:
+        fingerprint = compute_image_fingerprint(img)
+    if fingerprint is not None:
+        transcript = get_transcript_by_fingerprint(info['url'], fingerprint, info['lang'])
+        if transcript is not None:
+            store_cached_design_transcript(info['url'], info['lang'], info['etag'], transcript, reset=refresh)
+            return (transcript, fingerprint)
+    return (None, fingerprint)
+
+
+def _store_generated_transcript(info: dict, transcript: str, generation_ms: float, refresh: bool, fingerprint: str) -> None:
+    store_cached_design_transcript(info['url'], info['lang'], info['etag'], transcript,
+                                   generation_ms=generation_ms, reset=refresh)
+    if fingerprint is not None:
+        index_fingerprint(info['url'], fingerprint, info['lang'], transcript)
 
 
 def get_design_transcript_with_image(id, img) :
@@ -72,11 +156,51 @@ def get_design_transcript_with_image(id, img) :
     if (info is None):
         return "Internal Error - try again "
     
-    
-    # Generate transcript from ChatGPT
-    transcript = generate_design_transcript(img, info['lang'])
+    refresh = info.get('refresh', False)
+    try:
+        transcript, fingerprint = _find_existing_transcript(info, img, refresh)
+        if transcript is not None:
+            return transcript
+
+        # Generate transcript from ChatGPT
+        start = time.perf_counter()
+        transcript = generate_design_transcript(img, info['lang'])
+        generation_ms = (time.perf_counter() - start) * 1000
 
-    # Store in cache
-    store_cached_design_transcript(info['url'], info['lang'], info['etag'], transcript)
+        # Store in cache
+        _store_generated_transcript(info, transcript, generation_ms, refresh, fingerprint)
+    finally:
+        release_transcript_generation(info['url'], info['etag'], info['txid'])
     
     return transcript
+
+
+def stream_design_transcript_with_image(id, img):
+    """
+    Same as get_design_transcript_with_image, but yields the transcript chunks as the model
+    writes them. The assembled transcript is stored once the stream is complete
+    (not if the client goes away before the end).
+    """
+    info = pop_cached_url_info(id)
+    logger_tech.debug(f"retrived info = {info}")
+    if info is None:
+        yield "Internal Error - try again "
+        return
+
+    refresh = info.get('refresh', False)
+    try:
+        transcript, fingerprint = _find_existing_transcript(info, img, refresh)
+        if transcript is not None:
+            yield transcript
+            return
+
+        start = time.perf_counter()
+        parts = []
+        for chunk in stream_design_transcript(img, info['lang']):
+            parts.append(chunk)
+            yield chunk
+        generation_ms = (time.perf_counter() - start) * 1000
+
+        _store_generated_transcript(info, "".join(parts).strip(), generation_ms, refresh, fingerprint)
+    finally:
+        release_transcript_generation(info['url'], info['etag'], info['txid'])
@@ -0,0 +1,90 @@
+"""
+Version asyncio de get_design_transcript : le débit des crédits (exécuté dans un thread)
+se déroule pendant la lecture du cache Redis (client async).
+"""
+
+import asyncio
+
+from services.aio import run_blocking, run_sync
+from services.dynamodb import use_credits
+from services.cache import (
+    lookup_cached_design_transcript_async, store_cached_design_transcript,
+    TRANSCRIPT_STALE, TRANSCRIPT_REFRESH,
+    create_cached_url_info, wait_for_cached_design_transcript
+)
+from services.llm import _translate_with_chatgpt_async
+
+from utils.config import BUSINESS_CONFIG
+from utils.helpers import logger_tech, logger_business
+
+
+async def extract_transcript_async(url: str, lang: str, etag: str, transcripts: list, log_data: dict = None) -> str:
+    """
+    Same as services.transcript.extract_transcript, with the async LLM client.
+    """
+    if not transcripts:
+        return None
+    for (trans_lang, trans_text) in transcripts:
+        if trans_lang == lang:
+            logger_tech.debug(f"Found transcript in requested language ({lang}) in cache.")
+            return trans_text
+
+    # If we have a transcript but not the requested language, translate it
+    trans_lang, trans_text = transcripts[0]
+    translated = await _translate_with_chatgpt_async(trans_text, trans_lang, lang)
+    # Update cache with the newly translated transcript
+    await run_blocking(store_cached_design_transcript, url, lang, etag, translated)
+
+    if log_data is not None:
+        log_data["action"] = "translate_transcript"
+        logger_business.log(status="200", **log_data)
+    logger_tech.debug(f"Added translated transcript ({lang}) to cache.")
+    return translated
+
+
+async def get_design_transcript_async(email: str, key: str, url: str, etag: str, lang: str = "en",
+                                      log_data: dict = {}, accept_stale: bool = False) -> (bool, str, dict):
+    """
+    Same result as services.transcript.get_design_transcript.
+    The credit debit runs while the cache is read :
+    nothing is returned nor translated before the debit has succeeded.
+    """
+    logger_tech.debug(f"Request to get_design_transcript_async: url={url}, etag={etag}, lang={lang}")
+    debit = asyncio.ensure_future(run_blocking(use_credits, email, 1, url, front_key=key))
+    try:
+        transcripts, state = await lookup_cached_design_transcript_async(url, lang, etag)
+    finally:
+        await debit
+
+    stale = state == TRANSCRIPT_STALE
+    if stale and accept_stale:
+        # stale-while-revalidate : serve the previous transcript, the client regenerates it
+        txid = await run_blocking(create_cached_url_info, url, lang, etag, refresh=True)
+        return (True, transcripts[0][1], {"stale": True, "txid": txid})
+    cached_transcript = None if stale else await extract_transcript_async(url, lang, etag, transcripts, log_data)
+    if cached_transcript is not None:
+        refresh = None
+        if state == TRANSCRIPT_REFRESH and accept_stale:
+            refresh = {"stale": False, "txid": await run_blocking(create_cached_url_info, url, lang, etag, refresh=True)}
+        return (True, cached_transcript, refresh)
+
+    # Single-flight : only the elected caller uploads a screenshot,
+    # the others wait for its transcript
+    txid = await run_blocking(create_cached_url_info, url, lang, etag, refresh=stale)
+    if txid is None:
+        transcripts = await run_blocking(wait_for_cached_design_transcript, url, lang, etag,
+                                         BUSINESS_CONFIG['singleflight_wait'])
+        cached_transcript = await extract_transcript_async(url, lang, etag, transcripts, log_data)
+        if cached_transcript is not None:
+            return (True, cached_transcript, None)
+        # the generation may have been abandoned : try to take it over
+        txid = await run_blocking(create_cached_url_info, url, lang, etag, refresh=stale)
+    return (False, txid, None)
+
+
+def get_design_transcript_concurrently(email: str, key: str, url: str, etag: str, lang: str = "en",
+                                       log_data: dict = {}, accept_stale: bool = False) -> (bool, str, dict):
+    """
+    Sync shim for the Lambda handlers : runs get_design_transcript_async on the service loop.
+    """
+    return run_sync(get_design_transcript_async(email, key, url, etag, lang, log_data, accept_stale))
@@ -0,0 +1,64 @@
+"""
+Initialisation anticipée et concurrente des dépendances (secrets, Redis, DynamoDB, LLM)
+pendant la phase d'init de la Lambda.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.helpers import logger_tech
+
+
+def _warm_secrets() -> None:
+    from utils.auth import _get_keys
+    _get_keys()
+
+
+def _warm_redis() -> None:
+    from services.cache import ping_redis
+    ping_redis()
+
+
+def _warm_dynamodb() -> None:
+    from services.dynamodb import get_dynamodb_id_table
+    get_dynamodb_id_table()
+
+
+def _warm_llm() -> None:
+    from services.llm import get_llm_client
+    from utils.config import LLM_CONFIG
+    for api in {config["api"] for block in LLM_CONFIG.values() for config in block.values()}:
+        get_llm_client(api)
+
+
+WARMUP_TASKS = {
+    "secrets": _warm_secrets,
+    "redis": _warm_redis,
+    "dynamodb": _warm_dynamodb,
+    "llm": _warm_llm,
+}
+
+
+def warm_up(dependencies: list) -> dict:
+    """
+    Initializes the given dependencies (keys of WARMUP_TASKS) concurrently.
+    Redis waits for the secrets it needs, the other ones overlap with the Secrets Manager call.
+    A failure is logged and left to the first request : returns {dependency: ms or error}.
+    """
+    dependencies = [dependency for dependency in dependencies if dependency in WARMUP_TASKS]
+    if not dependencies:
+        return {}
+
+    def run(dependency):
+        start = time.perf_counter()
+        try:
+            WARMUP_TASKS[dependency]()
+        except Exception as e:
+            logger_tech.info(f"Warm-up of {dependency} failed: {e}")
+            return str(e)
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    with ThreadPoolExecutor(max_workers=len(dependencies)) as executor:
+        timings = dict(zip(dependencies, executor.map(run, dependencies)))
+    logger_tech.debug(f"Warm-up done: {timings}")
+    return timings
@@ -0,0 +1,84 @@
+"""
+Encodage des valeurs stockées dans le cache Redis (enveloppe versionnée et compressée).
+"""
+
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from utils.config import CACHE_CODEC
+
+
+# Encoded value : MAGIC | version | codec | payload
+# 0xFF never appears in UTF-8 text, so values written before the envelope
+# existed (plain text) are recognised and decoded as such.
+CODEC_MAGIC = 0xFF
+CODEC_VERSION = 1
+
+CODEC_RAW = 0
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+
+# zstd contexts are not thread safe : one pair per thread
+_zstd_contexts = threading.local()
+
+
+def _compress_zstd(data: bytes, level: int) -> bytes:
+    if getattr(_zstd_contexts, "compressor", None) is None:
+        _zstd_contexts.compressor = zstandard.ZstdCompressor(level=level)
+    return _zstd_contexts.compressor.compress(data)
+
+
+def _decompress_zstd(data: bytes) -> bytes:
+    if getattr(_zstd_contexts, "decompressor", None) is None:
+        _zstd_contexts.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_contexts.decompressor.decompress(data)
+
+
+def encode_value(text: str, compression: str = None) -> bytes:
+    """
+    Wraps a text in the cache envelope. The text is compressed with zstd
+    (when installed) or zlib, unless it is shorter than CACHE_CODEC['min_size']
+    or compression does not make it smaller.
+    """
+    compression = compression or CACHE_CODEC["compression"]
+    data = text.encode("utf-8")
+    codec = CODEC_RAW
+    payload = data
+    if compression != "none" and len(data) >= CACHE_CODEC["min_size"]:
+        if compression == "zstd" and zstandard is not None:
+            compressed, compressed_codec = _compress_zstd(data, CACHE_CODEC["zstd_level"]), CODEC_ZSTD
+        else:
+            compressed, compressed_codec = zlib.compress(data, CACHE_CODEC["zlib_level"]), CODEC_ZLIB
+        if len(compressed) < len(data):
+            codec, payload = compressed_codec, compressed
+    return bytes((CODEC_MAGIC, CODEC_VERSION, codec)) + payload
+
+
+def decode_value(value) -> str:
+    """
+    Returns the text of a cache value, whether it was written with the envelope or as plain text.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if not value or value[0] != CODEC_MAGIC:
+        return value.decode("utf-8")
+    version, codec = value[1], value[2]
+    if version != CODEC_VERSION:
+        raise ValueError(f"Unsupported cache value version: {version}")
+    payload = value[3:]
+    if codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise ValueError("Cache value compressed with zstd but zstandard is not installed")
+        payload = _decompress_zstd(payload)
+    elif codec != CODEC_RAW:
+        raise ValueError(f"Unknown cache value codec: {codec}")
+    return payload.decode("utf-8")
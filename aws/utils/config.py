@@ -1,4 +1,6 @@
 
+import os
+
 from utils.helpers import logger_tech
 
 
@@ -6,30 +8,162 @@ TECH_CONFIG = {
     "redis_host": "crisp-moray-17911.upstash.io",
     "redis_port": "6379",
     "dynamodb_id_table": "design_emotion_id",
+    "dynamodb_history_table": "design_emotion_history",
+    # index de la table d'historique : clé front -> email
+    "dynamodb_front_key_index": "front-key-index",
     "dynamodb_region": "eu-west-3",
+    # DynamoDB local (ex. http://localhost:8000) pour le développement et scripts/stress_credits.py
+    "dynamodb_endpoint": os.environ.get("DYNAMODB_ENDPOINT") or None,
     "secret_name": "openai-key",
     "aws_region": "eu-west-3",
     "moderation-checker-main": "openai",
     "moderation-checker-secondary": "openrouter",
     "openrouter_url": "https://openrouter.ai/api/v1",
+    # dépendances initialisées en parallèle pendant l'init de la Lambda (services/warmup.py),
+    # définies par fonction dans template.yaml : "secrets,redis,dynamodb,llm"
+    "warmup": [name for name in os.environ.get("WARMUP", "").split(",") if name],
+    # /transcript : étapes indépendantes (DynamoDB, Redis) en parallèle (services/transcript_async.py)
+    "async_request_path": os.environ.get("ASYNC_REQUEST_PATH", "1") == "1",
+    "async_blocking_workers": 8,   # appels bloquants (boto3, scripts Redis) attendus depuis la boucle asyncio
 }
 
 BUSINESS_CONFIG = {
     "id_cache_limit": 240,
+    # single-flight : un seul appel génère le transcript d'une (url, etag)
+    "singleflight_lock_ttl": 90,
+    "singleflight_wait": 8,
+    "singleflight_poll_interval": 0.5,
+    "singleflight_retry_after": 3,  # délai conseillé au client quand la génération est en cours
     "transcript_cache_limit": 60*60*24*15,
+    # stale-while-revalidate : un transcript obsolète est servi (et régénéré) pendant ce délai
+    "serve_stale": True,
+    "transcript_stale_grace": 60*60*24*7,
+    # rafraîchissement anticipé probabiliste des transcripts proches de l'expiration
+    "early_refresh_beta": 1.0,
+    "early_refresh_min_delta": 60*60,
+    # réutilisation du transcript d'une capture visuellement identique d'un même domaine
+    # (distance de Hamming du dHash, <= 3 : au-delà l'index par bandes ne garantit plus de trouver les candidats)
+    "phash_enabled": True,
+    "phash_max_distance": 3,
+    # bits à 1 (et à 0) requis dans le dHash : une page presque uniforme (hash proche de 0) n'est ni indexée ni cherchée
+    "phash_min_bits": 8,
     "email_validation_limit": 60*60*24,
-    "ip_limit": 120
+    # nombre de requêtes autorisées par fenêtre glissante de rate_limit_window secondes.
+    # Limite de rafale, comme l'ancien blocage par IP, sans plafond horaire : une page analysée
+    # coûte 2 requêtes (/transcript puis l'envoi de la capture), soit 15 pages par minute et par compte.
+    # email_limit et client_key_limit ne comptent que les requêtes dont la clé front a été vérifiée
+    "rate_limit_window": 60,
+    "ip_limit": 60,
+    "email_limit": 30,
+    "client_key_limit": 30,
+    # cache mémoire local au conteneur, devant Redis
+    "memory_cache_ttl": 60,
+    "memory_cache_max_entries": 500,
+    "memory_cache_max_bytes": 5*1024*1024,
+    # envoi à Redis des compteurs de popularité des requêtes servies par le cache mémoire
+    "popularity_flush_interval": 60,
+    # cache de validation des clés front (services/front_keys.py) : Redis, puis mémoire du conteneur
+    "front_key_cache_ttl": 5*60,
+    "front_key_memory_ttl": 30,
+    "front_key_memory_max_entries": 2000,
+    "front_key_metrics_flush_interval": 60,
+    # préchauffage du cache (scripts/warm_cache.py) : nb d'urls, traductions en parallèle, traductions max par exécution
+    "warm_cache_top": 300,
+    "warm_cache_workers": 4,
+    "warm_cache_budget": 1000,
+    # traductions demandées en un seul appel LLM (réponse JSON), au-delà elles sont réparties en plusieurs appels
+    "translate_batch_size": 5,
+    # taille de page par défaut des historiques d'usage et de rechargement
+    "history_page_size": 50
 }
  
+# Encodage des transcripts dans Redis (voir utils/codec.py)
+CACHE_CODEC = {
+    "compression": "zstd",   # "zstd" (si zstandard est installé, sinon zlib), "zlib" ou "none"
+    "min_size": 128,         # en dessous (octets), la valeur est stockée sans compression
+    "zlib_level": 6,
+    "zstd_level": 6,
+}
+
+# Règles de canonicalisation des URLs (clés du cache des transcripts)
+URL_CANONICALIZATION = {
+    "force_https": True,
+    "strip_www": True,
+    "remove_default_port": True,
+    "remove_trailing_slash": True,
+    "remove_fragment": True,
+    # True : supprime toute la query string, False : ne retire que les paramètres de tracking
+    "strip_query": True,
+    "tracking_params": ["utm_*", "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid",
+                        "mc_cid", "mc_eid", "_ga", "_gl", "ref", "ref_src"],
+}
+
+# Clients HTTP des API LLM (services/llm.py), réutilisés entre les invocations d'un conteneur :
+# "default" s'applique à toutes les API, les autres clés ("openai", "openrouter") le surchargent
+LLM_HTTP_CONFIG = {
+    "default": {
+        "max_connections": 20,
+        "max_keepalive_connections": 10,
+        "keepalive_expiry": 120,   # secondes
+        "connect_timeout": 5,
+        "read_timeout": 60,
+        "max_retries": 2,
+        "http2": True,             # si le paquet h2 est installé, HTTP/1.1 sinon
+    },
+    "openai": {},
+    "openrouter": {},
+}
+
+# Hedging (services/hedging.py) : la configuration "secondary" d'une tâche est appelée quand
+# la "main" n'a pas répondu après le percentile de ses latences récentes
+LLM_HEDGING = {
+    "enabled": True,
+    "tasks": {"transcript": True, "translate": True, "translate_multi": True},
+    "percentile": 95,
+    "window": 200,           # latences conservées par tâche
+    "min_samples": 20,       # en dessous, le délai est initial_delay
+    "initial_delay": 15.0,   # secondes
+    "min_delay": 2.0,
+    "max_hedge_rate": 0.1,   # part maximale des requêtes doublées
+    "rate_window": 200,
+    "max_workers": 16,
+}
+
+# Suivi des appels LLM (services/llm_metrics.py) : tokens, octets d'image, latence et coût,
+# agrégés dans Redis par modèle et par tranche de bucket_seconds
+LLM_METRICS = {
+    "enabled": True,
+    "bucket_seconds": 60*60,
+    "retention": 60*60*24*14,
+    # bornes (ms) de l'histogramme des latences, pour les percentiles approchés
+    "latency_buckets_ms": [500, 1000, 2000, 3000, 5000, 8000, 12000, 20000, 30000],
+}
+
+# Préparation des captures d'écran avant l'appel au modèle de vision (utils/image.py) :
+# valeurs par défaut, surchargées par la clé "image" de chaque modèle de LLM_VARIABLES
+IMAGE_PREPROCESSING = {
+    "enabled": True,
+    "viewport_ratio": None,  # hauteur / largeur max (ex. 0.5625 pour 16:9), le haut de la page est conservé
+    "max_width": 1536,       # réduction (proportions conservées)
+    "max_height": 1536,
+    "format": "jpeg",        # "png", "jpeg" ou "webp"
+    "quality": 85,           # jpeg et webp
+    "detail": "auto",        # niveau de détail de la vision : "low", "high" ou "auto"
+}
+
 LLM_VARIABLES = {
     "gpt4o": {
       "api":   "openai",
       "model": "gpt-4o",
+      "pricing": {"prompt": 2.5, "completion": 10.0},   # USD par million de tokens
+      "image": {},
       "prompts": {
         "transcript": """Analyse cette image de site web en te concentrant sur les émotions et l’ambiance générale véhiculées par la structure, les couleurs, et les éléments graphiques. Ignore le contenu textuel sauf s’il contribue directement à l’émotion. Traduis ces émotions en une expérience sensorielle et intellectuelle pour une personne aveugle, en utilisant des références au toucher, au son, aux odeurs, au goût, ou à des concepts abstraits. Par exemple, décris une ambiance comme une sensation de texture douce et chaleureuse, un bruit apaisant ou stimulant, ou une odeur évoquant une atmosphère spécifique. Ne fais aucune référence explicite aux aspects visuels ou à la disposition graphique. Ne soit pas trop ambiance publicité. essaie de faire vivre l’émotion sans enjoliver. Commence par Ce site …
         Fait ce transcript dans la langue : {target_lang}""",
         
         "translate":  "Translate from {source_lang} to {target_lang}. If it is the same language, just return the given text with no additional comment. If you translate, just return the translation.",
+
+        "translate_multi": "Translate the given text from {source_lang} to each of these languages: {target_langs}. Answer with a JSON object whose keys are exactly these language names and whose values are the translations, with no additional comment. For a language that is the same as {source_lang}, the value is the given text.",
         
         "moderated":  "Analyse cette image de site web en te concentrant sur les émotions… (même que transcript)"
       },
@@ -38,6 +172,8 @@ LLM_VARIABLES = {
     "gpt4.1-or": {
       "api":   "openrouter",
       "model": "openai/gpt-4.1",
+      "pricing": {"prompt": 2.0, "completion": 8.0},
+      "image": {},
       "prompts": {
         "transcript": """Analyse cette image de site web en te concentrant sur les émotions et l’ambiance générale véhiculées par la structure, les couleurs, et les éléments graphiques. Ignore le contenu textuel sauf s’il contribue directement à l’émotion. Traduis ces émotions en une expérience sensorielle et intellectuelle pour une personne aveugle, en utilisant des références au toucher, au son, aux odeurs, au goût, ou à des concepts abstraits. Par exemple, décris une ambiance comme une sensation de texture douce et chaleureuse, un bruit apaisant ou stimulant, ou une odeur évoquant une atmosphère spécifique. Ne fais aucune référence explicite aux aspects visuels ou à la disposition graphique et ne prend pas en compte les publicité qui semble hors contexte. 
 Pose toi d’abord la question de l’emotion que le designer a voulu faire passer sur ce site. Voit à quelles situations de la vie peut amener des  ambiance similaires et comment les autres sens que le visuels peuvent capter ce type d’émotion. 
@@ -51,6 +187,7 @@ Commence par Ce site …
 
 Fait ce transcript dans la langue : {target_lang}""",
         "translate":  None,
+        "translate_multi": None,
         "moderated":  None
       }
     }
@@ -67,6 +204,11 @@ LLM_CONFIG_WITH_VARIABLES = {
     "secondary": "$$gpt4.1-or/translate"
   },
 
+  "translate_multi": {
+    "main":      "$$gpt4o/translate_multi",
+    "secondary": "$$gpt4.1-or/translate_multi"
+  },
+
   "moderated": {
     "main":      "$$gpt4o/moderated",
     "secondary": "$$gpt4.1-or/moderated"
@@ -79,7 +221,9 @@ def resolve_llm_config(variables, config):
       {
         "api":   variables[modelX]["api"],
         "model": variables[modelX]["model"],
-        "prompt": variables[modelX]["prompts"][promptY]
+        "prompt": variables[modelX]["prompts"][promptY],
+        "image": IMAGE_PREPROCESSING overridden by variables[modelX]["image"],
+        "task":  block name ("transcript", ...), "role": "main" or "secondary"
       }
     """
     def resolve_entry(ref: str):
@@ -92,14 +236,15 @@ def resolve_llm_config(variables, config):
         return {
             "api":    model_def["api"],
             "model":  model_def["model"],
-            "prompt": prompt_text
+            "prompt": prompt_text,
+            "image":  {**IMAGE_PREPROCESSING, **model_def.get("image", {})}
         }
 
     resolved = {}
     for block_name, block in config.items():
         resolved_block = {}
         for role, ref in block.items():  # role = "main" ou "secondary"
-            resolved_block[role] = resolve_entry(ref)
+            resolved_block[role] = {**resolve_entry(ref), "task": block_name, "role": role}
         resolved[block_name] = resolved_block
     
     logger_tech.debug("LLM config resolved") 
@@ -77,8 +77,8 @@ class JsonFormatter(logging.Formatter):
             "message": record.getMessage()
         }
 
-        # Ajout des champs métier si présents
-        for key in ["action", "email", "url", "credits", "status"]:
+        # Ajout des champs métier si présents ("llm" : mesures d'un appel LLM)
+        for key in ["action", "email", "url", "credits", "status", "llm"]:
             if hasattr(record, key):
                 log_record[key] = getattr(record, key)
 
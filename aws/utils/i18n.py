@@ -10,6 +10,15 @@ from utils.helpers import logger_tech
 SUPPORTED_LANGUAGES = ['en', 'fr', 'es', 'de', 'ja', 'pt', 'ru', 'it', 'nl', 'pl', 'zh']
 DEFAULT_LANGUAGE = 'en'
 
+# Langues envoyées par l'extension (paramètre "lang", langMap de browser/background.js) :
+# c'est sous ce nom que les transcripts sont stockés dans le cache, et dans ces langues
+# que scripts/warm_cache.py les traduit. À tenir à jour avec l'extension.
+TRANSCRIPT_LANGUAGE_NAMES = {
+    'en': 'english', 'fr': 'french', 'es': 'spanish', 'de': 'german', 'it': 'italian',
+    'pt': 'portuguese', 'ru': 'russian', 'ja': 'japanese', 'zh': 'chinese', 'ko': 'korean',
+    'ar': 'arabic', 'hi': 'hindi',
+}
+
 # Chemin vers le dossier des traductions
 LOCALE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'locales')
 
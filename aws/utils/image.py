@@ -0,0 +1,65 @@
+"""
+Préparation des captures d'écran avant l'appel au modèle de vision
+(recadrage, réduction, conversion en JPEG ou WebP), selon les réglages de IMAGE_PREPROCESSING.
+"""
+
+import io
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+from utils.helpers import logger_tech
+
+
+IMAGE_FORMATS = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+def preprocess_image(img: bytes, settings: dict) -> (bytes, str):
+    """
+    Crops the screenshot to the viewport ratio, downscales it to fit max_width x max_height
+    and converts it to the configured format.
+    Returns (image bytes, mime type). The PNG sent by the extension is returned untouched
+    when preprocessing is disabled, Pillow is not available or the image cannot be read.
+    """
+    if not isinstance(img, bytes):
+        logger_tech.error("Expected bytes for image data")
+        raise ValueError("Image data must be bytes")
+    if not settings.get("enabled") or Image is None:
+        return (img, "image/png")
+
+    pil_format, mime = IMAGE_FORMATS[settings["format"]]
+    try:
+        with Image.open(io.BytesIO(img)) as image:
+            image.load()
+            width, height = image.size
+
+            # Keep the top of the page (what the user sees first)
+            ratio = settings.get("viewport_ratio")
+            if ratio and height > width * ratio:
+                height = round(width * ratio)
+                image = image.crop((0, 0, width, height))
+
+            scale = min(1.0, settings["max_width"] / width, settings["max_height"] / height)
+            if scale < 1.0:
+                image = image.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.LANCZOS)
+
+            if pil_format == "JPEG" and image.mode != "RGB":
+                image = image.convert("RGB")
+            output = io.BytesIO()
+            if pil_format == "PNG":
+                image.save(output, pil_format, optimize=True)
+            else:
+                image.save(output, pil_format, quality=settings["quality"])
+    except Exception as e:
+        logger_tech.info(f"Cannot preprocess image, sending it untouched: {e}")
+        return (img, "image/png")
+
+    data = output.getvalue()
+    logger_tech.debug(f"Image preprocessed: {len(img)} -> {len(data)} bytes ({mime})")
+    return (data, mime)
@@ -0,0 +1,90 @@
+"""
+Canonicalisation des URLs utilisées comme clés de cache.
+"""
+
+from fnmatch import fnmatch
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+from utils.config import URL_CANONICALIZATION
+
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_host(host: str, rules: dict = None) -> str:
+    rules = rules or URL_CANONICALIZATION
+    host = host.lower().rstrip(".")
+    if rules["strip_www"] and host.startswith("www."):
+        host = host[len("www."):]
+    return host
+
+
+def canonicalize_url_prefix(prefix: str, rules: dict = None) -> str:
+    """
+    Canonical form of an URL prefix (e.g. to select cache keys) : same rules as canonicalize_url,
+    but a prefix without path stays a host prefix and a trailing slash is kept.
+    """
+    try:
+        path = urlsplit(prefix.strip()).path
+    except ValueError:
+        return prefix
+    canonical = canonicalize_url(prefix, rules)
+    if not path:
+        return canonical.rstrip("/")
+    if path.endswith("/") and not canonical.endswith("/"):
+        return canonical + "/"
+    return canonical
+
+
+def url_domain(url: str) -> str:
+    """
+    Returns the canonical host of an URL ("" when it has none).
+    """
+    try:
+        return canonicalize_host(urlsplit(url.strip()).hostname or "")
+    except ValueError:
+        return ""
+
+
+def _is_tracking_param(name: str, rules: dict) -> bool:
+    return any(fnmatch(name.lower(), pattern) for pattern in rules["tracking_params"])
+
+
+def canonicalize_url(url: str, rules: dict = None) -> str:
+    """
+    Returns the canonical form of an URL so that its variants share one cache key :
+    scheme and host in lowercase, no fragment, no default port, no "www.",
+    no trailing slash, and no query (or only its non-tracking parameters, sorted).
+    Each rule can be switched off in URL_CANONICALIZATION.
+    """
+    rules = rules or URL_CANONICALIZATION
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.netloc:
+        return url
+
+    scheme = parts.scheme.lower()
+    if rules["force_https"] and scheme == "http":
+        scheme = "https"
+
+    host = canonicalize_host(parts.hostname or "", rules)
+    if port is not None and not (rules["remove_default_port"] and port == DEFAULT_PORTS.get(parts.scheme.lower())):
+        host = f"{host}:{port}"
+    if parts.username:
+        host = f"{parts.username}@{host}"
+
+    path = parts.path or "/"
+    if rules["remove_trailing_slash"] and len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    query = ""
+    if not rules["strip_query"]:
+        params = [(name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+                  if not _is_tracking_param(name, rules)]
+        query = urlencode(sorted(params))
+
+    fragment = "" if rules["remove_fragment"] else parts.fragment
+    return urlunsplit((scheme, host, path, query, fragment))